@@ -0,0 +1,81 @@
+import os
+from logging.config import fileConfig
+
+from sqlalchemy import engine_from_config, pool
+
+from alembic import context
+
+from src import models  # noqa: F401  (registra todas as tabelas no metadata)
+from src.database import Base
+
+config = context.config
+
+# Quando chamado de dentro da aplicação (src/migrations.py), o logging já está configurado
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# DATABASE_URL (docker-compose, .env) tem prioridade sobre o alembic.ini
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"])
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # O índice de busca (0004) é criado por SQL, fora dos modelos: tabelas
+    # search_* do FTS5 e índices de trigramas do PostgreSQL
+    if type_ == "table":
+        return not name.startswith("search_")
+    if type_ == "index":
+        return not name.endswith("_trgm")
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Gera o SQL das migrações sem conectar ao banco (alembic upgrade --sql)."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Quem chama pode repassar uma conexão já aberta (ver src/migrations.py)
+    connectable = config.attributes.get("connection")
+    if connectable is None:
+        connectable = engine_from_config(
+            config.get_section(config.config_ini_section, {}),
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
+        )
+        with connectable.connect() as connection:
+            _run_with_connection(connection)
+    else:
+        _run_with_connection(connectable)
+
+
+def _run_with_connection(connection) -> None:
+    # render_as_batch: o SQLite só altera colunas recriando a tabela
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
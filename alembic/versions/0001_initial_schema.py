@@ -0,0 +1,201 @@
+"""Esquema inicial (equivalente ao antigo Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("bio", sa.String(), nullable=True),
+        sa.Column("avatar_url", sa.String(), nullable=True),
+        sa.Column("notify_on_join_request", sa.Boolean(), nullable=True),
+        sa.Column("notify_on_request_approved", sa.Boolean(), nullable=True),
+        sa.Column("notify_on_new_story", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_users_id"), "users", ["id"], unique=False)
+    op.create_index(op.f("ix_users_username"), "users", ["username"], unique=True)
+    op.create_index(op.f("ix_users_email"), "users", ["email"], unique=True)
+
+    op.create_table(
+        "stories",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("synopsis", sa.Text(), nullable=True),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_stories_id"), "stories", ["id"], unique=False)
+    op.create_index(op.f("ix_stories_title"), "stories", ["title"], unique=False)
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("rarity", sa.String(), nullable=True),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_items_id"), "items", ["id"], unique=False)
+    op.create_index(op.f("ix_items_name"), "items", ["name"], unique=False)
+
+    op.create_table(
+        "monsters",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("size", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("armor_class", sa.Integer(), nullable=True),
+        sa.Column("hit_points", sa.String(), nullable=True),
+        sa.Column("speed", sa.String(), nullable=True),
+        sa.Column("actions", sa.Text(), nullable=True),
+        sa.Column("challenge_rating", sa.String(), nullable=True),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_monsters_id"), "monsters", ["id"], unique=False)
+    op.create_index(op.f("ix_monsters_name"), "monsters", ["name"], unique=False)
+
+    op.create_table(
+        "npcs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_npcs_id"), "npcs", ["id"], unique=False)
+    op.create_index(op.f("ix_npcs_name"), "npcs", ["name"], unique=False)
+
+    op.create_table(
+        "characters",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("race", sa.String(), nullable=True),
+        sa.Column("character_class", sa.String(), nullable=True),
+        sa.Column("level", sa.Integer(), nullable=True),
+        sa.Column("owner_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_characters_id"), "characters", ["id"], unique=False)
+    op.create_index(op.f("ix_characters_name"), "characters", ["name"], unique=False)
+
+    op.create_table(
+        "tables",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("master_id", sa.String(), nullable=True),
+        sa.Column("story_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["master_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_tables_id"), "tables", ["id"], unique=False)
+    op.create_index(op.f("ix_tables_title"), "tables", ["title"], unique=False)
+
+    op.create_table(
+        "join_requests",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("table_id", sa.String(), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["table_id"], ["tables.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_join_requests_id"), "join_requests", ["id"], unique=False)
+
+    op.create_table(
+        "story_item_association",
+        sa.Column("story_id", sa.String(), nullable=False),
+        sa.Column("item_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("story_id", "item_id"),
+    )
+    op.create_table(
+        "story_monster_association",
+        sa.Column("story_id", sa.String(), nullable=False),
+        sa.Column("monster_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["monster_id"], ["monsters.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("story_id", "monster_id"),
+    )
+    op.create_table(
+        "story_npc_association",
+        sa.Column("story_id", sa.String(), nullable=False),
+        sa.Column("npc_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["npc_id"], ["npcs.id"]),
+        sa.ForeignKeyConstraint(["story_id"], ["stories.id"]),
+        sa.PrimaryKeyConstraint("story_id", "npc_id"),
+    )
+    op.create_table(
+        "table_players_association",
+        sa.Column("table_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["table_id"], ["tables.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("table_id", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("table_players_association")
+    op.drop_table("story_npc_association")
+    op.drop_table("story_monster_association")
+    op.drop_table("story_item_association")
+    op.drop_index(op.f("ix_join_requests_id"), table_name="join_requests")
+    op.drop_table("join_requests")
+    op.drop_index(op.f("ix_tables_title"), table_name="tables")
+    op.drop_index(op.f("ix_tables_id"), table_name="tables")
+    op.drop_table("tables")
+    op.drop_index(op.f("ix_characters_name"), table_name="characters")
+    op.drop_index(op.f("ix_characters_id"), table_name="characters")
+    op.drop_table("characters")
+    op.drop_index(op.f("ix_npcs_name"), table_name="npcs")
+    op.drop_index(op.f("ix_npcs_id"), table_name="npcs")
+    op.drop_table("npcs")
+    op.drop_index(op.f("ix_monsters_name"), table_name="monsters")
+    op.drop_index(op.f("ix_monsters_id"), table_name="monsters")
+    op.drop_table("monsters")
+    op.drop_index(op.f("ix_items_name"), table_name="items")
+    op.drop_index(op.f("ix_items_id"), table_name="items")
+    op.drop_table("items")
+    op.drop_index(op.f("ix_stories_title"), table_name="stories")
+    op.drop_index(op.f("ix_stories_id"), table_name="stories")
+    op.drop_table("stories")
+    op.drop_index(op.f("ix_users_email"), table_name="users")
+    op.drop_index(op.f("ix_users_username"), table_name="users")
+    op.drop_index(op.f("ix_users_id"), table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,45 @@
+"""Coluna created_at para a paginação por cursor
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("tables", "characters", "items", "monsters", "npcs", "stories", "join_requests")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # Mesmo formato que o SQLAlchemy grava ("YYYY-MM-DD HH:MM:SS.ffffff"),
+        # senão a comparação textual do cursor fica inconsistente.
+        now = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+    else:
+        now = "CURRENT_TIMESTAMP"
+
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        # Bancos criados com create_all depois da paginação já têm a coluna
+        if "created_at" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("created_at", sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET created_at = {now} WHERE created_at IS NULL")
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("created_at")
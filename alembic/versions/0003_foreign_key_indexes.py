@@ -0,0 +1,76 @@
+"""Índices nas chaves estrangeiras e solicitação pendente única por mesa
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+
+
+def upgrade() -> None:
+    # Dono/criador + ordem de paginação: cobre o filtro e o ORDER BY
+    op.create_index("ix_characters_owner_id_created_at", "characters", ["owner_id", "created_at", "id"])
+    for table in ("items", "monsters", "npcs", "stories"):
+        op.create_index(f"ix_{table}_creator_id_created_at", table, ["creator_id", "created_at", "id"])
+
+    op.create_index(op.f("ix_tables_master_id"), "tables", ["master_id"])
+    op.create_index(op.f("ix_tables_story_id"), "tables", ["story_id"])
+    op.create_index("ix_tables_created_at_id", "tables", ["created_at", "id"])
+
+    op.create_index("ix_join_requests_table_id_status", "join_requests", ["table_id", "status", "created_at", "id"])
+    op.create_index("ix_join_requests_user_id", "join_requests", ["user_id"])
+
+    # Solicitações pendentes duplicadas (criadas antes da restrição) são
+    # recusadas, mantendo a mais antiga, para que o índice único possa existir.
+    op.execute(
+        """
+        UPDATE join_requests SET status = 'declined'
+        WHERE status = 'pending' AND EXISTS (
+            SELECT 1 FROM join_requests AS older
+            WHERE older.table_id = join_requests.table_id
+              AND older.user_id = join_requests.user_id
+              AND older.status = 'pending'
+              AND (older.created_at < join_requests.created_at
+                   OR (older.created_at = join_requests.created_at AND older.id < join_requests.id))
+        )
+        """
+    )
+    op.create_index(
+        "uq_join_requests_pending", "join_requests", ["table_id", "user_id"], unique=True,
+        sqlite_where=PENDING, postgresql_where=PENDING,
+    )
+
+    # Caminho inverso das tabelas de associação (a PK começa pela outra coluna)
+    op.create_index("ix_story_item_association_item_id", "story_item_association", ["item_id"])
+    op.create_index("ix_story_monster_association_monster_id", "story_monster_association", ["monster_id"])
+    op.create_index("ix_story_npc_association_npc_id", "story_npc_association", ["npc_id"])
+    op.create_index("ix_table_players_association_user_id", "table_players_association", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_table_players_association_user_id", table_name="table_players_association")
+    op.drop_index("ix_story_npc_association_npc_id", table_name="story_npc_association")
+    op.drop_index("ix_story_monster_association_monster_id", table_name="story_monster_association")
+    op.drop_index("ix_story_item_association_item_id", table_name="story_item_association")
+    op.drop_index("uq_join_requests_pending", table_name="join_requests")
+    op.drop_index("ix_join_requests_user_id", table_name="join_requests")
+    op.drop_index("ix_join_requests_table_id_status", table_name="join_requests")
+    op.drop_index("ix_tables_created_at_id", table_name="tables")
+    op.drop_index(op.f("ix_tables_story_id"), table_name="tables")
+    op.drop_index(op.f("ix_tables_master_id"), table_name="tables")
+    for table in ("stories", "npcs", "monsters", "items"):
+        op.drop_index(f"ix_{table}_creator_id_created_at", table_name=table)
+    op.drop_index("ix_characters_owner_id_created_at", table_name="characters")
@@ -0,0 +1,170 @@
+"""Índice de busca textual (FTS5 no SQLite, trigramas no PostgreSQL)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, tipo, coluna do dono, título, corpo) — o corpo junta os campos de texto livre
+SOURCES = (
+    ("items", "item", "creator_id", "name", ("type", "rarity", "description")),
+    ("monsters", "monster", "creator_id", "name", ("type", "size", "actions")),
+    ("npcs", "npc", "creator_id", "name", ("role", "location", "description", "notes")),
+    ("stories", "story", "creator_id", "title", ("synopsis",)),
+)
+
+
+def _body(prefix: str, columns) -> str:
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+
+
+def _owner(prefix: str, column: str) -> str:
+    # Sem hífens o UUID vira um único token, usado como filtro dentro do MATCH
+    return f"replace({prefix}{column}, '-', '')"
+
+
+def _has_fts5(bind) -> bool:
+    try:
+        bind.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sa.exc.OperationalError:
+        return False
+    bind.exec_driver_sql("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        if _has_fts5(bind):
+            _create_fts5()
+    elif bind.dialect.name == "postgresql":
+        _create_trigram_indexes()
+
+
+def _create_fts5() -> None:
+    # search_documents guarda o texto indexado; search_fts é um índice FTS5 de
+    # conteúdo externo sobre ela (rowid = search_documents.id, estável no VACUUM).
+    op.execute(
+        """
+        CREATE TABLE search_documents (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            owner TEXT,
+            title TEXT,
+            body TEXT,
+            UNIQUE (kind, entity_id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE search_fts USING fts5(
+            title, body, owner, kind,
+            content='search_documents', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    # Ranking padrão: o título pesa mais que o corpo; dono e tipo só filtram
+    op.execute("INSERT INTO search_fts(search_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0, 0.0)')")
+    op.execute(
+        """
+        CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+            INSERT INTO search_fts(rowid, title, body, owner, kind)
+            VALUES (new.id, new.title, new.body, new.owner, new.kind);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+            INSERT INTO search_fts(search_fts, rowid, title, body, owner, kind)
+            VALUES ('delete', old.id, old.title, old.body, old.owner, old.kind);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+            INSERT INTO search_fts(search_fts, rowid, title, body, owner, kind)
+            VALUES ('delete', old.id, old.title, old.body, old.owner, old.kind);
+            INSERT INTO search_fts(rowid, title, body, owner, kind)
+            VALUES (new.id, new.title, new.body, new.owner, new.kind);
+        END
+        """
+    )
+
+    # Gatilhos nas tabelas de conteúdo: cobrem o ORM e os INSERTs em massa da importação
+    for table, kind, owner, title, body in SOURCES:
+        op.execute(
+            f"""
+            CREATE TRIGGER search_{table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO search_documents(kind, entity_id, owner, title, body)
+                VALUES ('{kind}', new.id, {_owner("new.", owner)}, new.{title}, {_body("new.", body)});
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER search_{table}_au AFTER UPDATE ON {table} BEGIN
+                UPDATE search_documents
+                SET entity_id = new.id, owner = {_owner("new.", owner)},
+                    title = new.{title}, body = {_body("new.", body)}
+                WHERE kind = '{kind}' AND entity_id = old.id;
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER search_{table}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM search_documents WHERE kind = '{kind}' AND entity_id = old.id;
+            END
+            """
+        )
+        op.execute(
+            f"""
+            INSERT INTO search_documents(kind, entity_id, owner, title, body)
+            SELECT '{kind}', id, {_owner("", owner)}, {title}, {_body("", body)} FROM {table}
+            """
+        )
+
+
+def _create_trigram_indexes() -> None:
+    # Sem FTS5, a busca usa ILIKE '%termo%'; o pg_trgm permite indexar esse padrão
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, _, _, title, body in SOURCES:
+        for column in (title,) + body:
+            op.create_index(
+                f"ix_{table}_{column}_trgm", table, [column],
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for table, _, _, _, _ in SOURCES:
+            for suffix in ("ai", "au", "ad"):
+                op.execute(f"DROP TRIGGER IF EXISTS search_{table}_{suffix}")
+        for suffix in ("ai", "au", "ad"):
+            op.execute(f"DROP TRIGGER IF EXISTS search_documents_{suffix}")
+        op.execute("DROP TABLE IF EXISTS search_fts")
+        op.execute("DROP TABLE IF EXISTS search_documents")
+    elif bind.dialect.name == "postgresql":
+        for table, _, _, title, body in SOURCES:
+            for column in (title,) + body:
+                op.drop_index(f"ix_{table}_{column}_trgm", table_name=table)
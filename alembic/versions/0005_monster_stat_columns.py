@@ -0,0 +1,44 @@
+"""Colunas numéricas derivadas do bloco de estatísticas dos monstros
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("hp_average", sa.Integer()),
+    ("hp_dice_count", sa.Integer()),
+    ("hp_dice_size", sa.Integer()),
+    ("hp_modifier", sa.Integer()),
+    ("cr_value", sa.Float()),
+    ("xp", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    # Só ADD COLUMN: a tabela não é recriada e os gatilhos da busca (0004) continuam lá.
+    # Os valores dos monstros existentes são preenchidos por statblock.backfill_stat_blocks.
+    for name, type_ in COLUMNS:
+        op.add_column("monsters", sa.Column(name, type_, nullable=True))
+    op.create_index("ix_monsters_creator_id_cr_value", "monsters", ["creator_id", "cr_value"])
+    op.create_index("ix_monsters_creator_id_xp", "monsters", ["creator_id", "xp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monsters_creator_id_xp", table_name="monsters")
+    op.drop_index("ix_monsters_creator_id_cr_value", table_name="monsters")
+    # DROP COLUMN direto (SQLite >= 3.35): o modo batch recriaria a tabela sem os gatilhos da busca
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("monsters", name)
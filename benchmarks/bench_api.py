@@ -0,0 +1,296 @@
+"""
+Benchmark da API em processo (httpx com ASGITransport, sem rede nem servidor).
+
+    python -m benchmarks.bench_api [--users 50 --stories 5 --links 10 ...] [--requests 200]
+        [--concurrency 1] [--scenarios list_stories,login] [--output resultado.json]
+        [--compare anterior.json] [--max-regression 20]
+
+Cria um banco SQLite temporário (ou usa --database-url, que deve estar vazio),
+roda o startup da aplicação (migrações), preenche com benchmarks.datagen e mede
+cada cenário: latência p50/p95/p99, vazão e consultas SQL por requisição.
+Login, exportação e importação de backup são caros e usam --heavy-requests.
+
+O cache de respostas fica desligado, para medir o trabalho de cada endpoint;
+--response-cache o liga. O cenário conditional_stories manda If-None-Match
+e mede o caminho do 304.
+
+Com --compare, imprime a variação de p95 e vazão em relação a um resultado
+anterior; com --max-regression, termina com código 1 se o p95 de algum
+cenário piorar mais que essa porcentagem (útil no CI).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks import datagen
+
+# Consulta de um cenário: recebe o cliente e o número da requisição
+Call = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    call: Call
+    heavy: bool = False
+
+
+class QueryCounter:
+    """Conta os comandos SQL enviados ao banco pelos engines síncrono e assíncrono."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil pelo método nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+# --- CENÁRIOS ---
+def build_scenarios(usernames: List[str], password: str, token: str, import_token: str,
+                    backup: bytes) -> List[Scenario]:
+    auth = {"Authorization": f"Bearer {token}"}
+    # A importação grava num usuário à parte, para não inflar o que os outros cenários leem
+    import_auth = {"Authorization": f"Bearer {import_token}"}
+    conditional_path = "/api/v1/stories/?limit=20"
+    etag = None
+
+    def get(path: str) -> Call:
+        async def call(client, i):
+            return await client.get(path, headers=auth)
+        return call
+
+    async def login(client, i):
+        username = usernames[i % len(usernames)]
+        return await client.post("/api/v1/token", json={"username": username, "password": password})
+
+    async def conditional_stories(client, i):
+        nonlocal etag
+        if etag is None:
+            etag = (await client.get(conditional_path, headers=auth)).headers.get("etag", "")
+        return await client.get(conditional_path, headers={**auth, "If-None-Match": etag})
+
+    async def backup_import(client, i):
+        files = {"file": ("backup.json", backup, "application/json")}
+        return await client.post("/api/v1/backup/import", headers=import_auth, files=files)
+
+    scenarios = [
+        Scenario("login", login, heavy=True),
+        Scenario("profile", get("/api/v1/users/me")),
+        Scenario("list_stories", get(conditional_path)),
+        Scenario("list_items", get("/api/v1/items/?limit=50")),
+        Scenario("list_monsters", get("/api/v1/monsters/?limit=50")),
+        Scenario("list_npcs", get("/api/v1/npcs/?limit=50")),
+        Scenario("list_tables", get("/api/v1/tables?limit=20")),
+        Scenario("list_tables_summary", get("/api/v1/tables?limit=20&view=summary")),
+        # Não há GET de um recurso só: o detalhe é a primeira página de um item com o perfil completo
+        Scenario("story_detail", get("/api/v1/stories/?limit=1")),
+        Scenario("table_detail", get("/api/v1/tables?limit=1")),
+        Scenario("conditional_stories", conditional_stories),
+        Scenario("backup_export", get("/api/v1/backup/export"), heavy=True),
+        Scenario("backup_export_stream", get("/api/v1/backup/export/stream"), heavy=True),
+        Scenario("backup_import", backup_import, heavy=True),
+    ]
+    return scenarios
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int,
+                       warmup: int, counter: QueryCounter) -> dict:
+    for i in range(warmup):
+        await scenario.call(client, i)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    sizes = 0
+    indices = iter(range(requests))
+
+    async def worker():
+        nonlocal sizes
+        for i in indices:
+            start = time.perf_counter()
+            response = await scenario.call(client, warmup + i)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            sizes += len(response.content)
+
+    queries_before = counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+    queries = counter.count - queries_before
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if int(status) >= 400),
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "queries_per_request": round(queries / requests, 2) if requests else 0.0,
+        "bytes_per_response": round(sizes / requests) if requests else 0,
+    }
+
+
+async def run(args, selected: Optional[set]) -> dict:
+    # Importados só aqui: as variáveis de ambiente do main() precisam valer antes de carregar a config
+    from src.main import create_app
+
+    app = create_app()
+    database = app.state.database
+
+    counter = QueryCounter()
+    counter.attach(database.engine)
+    counter.attach(database.async_engine.sync_engine)
+
+    async with app.router.lifespan_context(app):
+        with database.SessionLocal() as db:
+            dataset = datagen.generate(db, datagen.scale_from_args(args), seed=args.seed)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def login(username: str) -> str:
+                response = await client.post("/api/v1/token", json={"username": username, "password": dataset.password})
+                response.raise_for_status()
+                return response.json()["access_token"]
+
+            token = await login(dataset.usernames[0])
+            backup = (await client.get("/api/v1/backup/export", headers={"Authorization": f"Bearer {token}"})).content
+            import_token = await login(dataset.usernames[-1])
+            scenarios = build_scenarios(dataset.usernames, dataset.password, token, import_token, backup)
+
+            results = {}
+            for scenario in scenarios:
+                if selected and scenario.name not in selected:
+                    continue
+                requests = args.heavy_requests if scenario.heavy else args.requests
+                results[scenario.name] = await run_scenario(
+                    client, scenario, requests, args.concurrency, args.warmup, counter
+                )
+                print(f"{scenario.name}: p95 {results[scenario.name]['p95_ms']} ms", file=sys.stderr)
+
+    import fastapi
+    import sqlalchemy
+
+    dataset_report = asdict(dataset)
+    dataset_report.pop("usernames")
+    dataset_report.pop("password")
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "fastapi": fastapi.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "database": database.engine.dialect.name,
+        "settings": {
+            "requests": args.requests,
+            "heavy_requests": args.heavy_requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "response_cache": args.response_cache,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "dataset": dataset_report,
+        "scenarios": results,
+    }
+
+
+# --- COMPARAÇÃO ---
+def compare(previous: dict, current: dict) -> Dict[str, float]:
+    """Imprime a variação por cenário; retorna a variação percentual do p95."""
+    changes = {}
+    print(f"{'cenário':<24}{'p95 antes':>12}{'p95 agora':>12}{'Δ p95':>10}{'Δ vazão':>10}", file=sys.stderr)
+    for name, now in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before or not before["p95_ms"] or not before["throughput_rps"]:
+            continue
+        changes[name] = (now["p95_ms"] / before["p95_ms"] - 1) * 100
+        throughput = (now["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        print(f"{name:<24}{before['p95_ms']:>12.2f}{now['p95_ms']:>12.2f}{changes[name]:>9.1f}%{throughput:>9.1f}%",
+              file=sys.stderr)
+    return changes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_scale_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições medidas por cenário")
+    parser.add_argument("--heavy-requests", type=int, default=20, help="Requisições de login e backup")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--scenarios", help="Lista separada por vírgulas (padrão: todos)")
+    parser.add_argument("--database-url", help="Banco vazio a usar (padrão: SQLite temporário)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--response-cache", action="store_true", help="Mantém o cache de respostas ligado")
+    parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para comparar")
+    parser.add_argument("--max-regression", type=float, help="Falha se o p95 de algum cenário piorar mais que isso (%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="dk-bench-") as workdir:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        os.environ["AUTO_MIGRATE"] = "true"
+        os.environ["AVATAR_DIR"] = os.path.join(workdir, "avatars")
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        os.environ["SMTP_HOST"] = ""
+        # Os cenários repetem login e importação do mesmo cliente
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        if not args.response_cache:
+            os.environ["RESPONSE_CACHE_MAX_BYTES"] = "0"
+        selected = set(args.scenarios.split(",")) if args.scenarios else None
+        report = asyncio.run(run(args, selected))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            changes = compare(json.load(f), report)
+        if args.max_regression is not None:
+            regressed = [name for name, change in changes.items() if change > args.max_regression]
+            if regressed:
+                print(f"p95 piorou mais de {args.max_regression}% em: {', '.join(regressed)}", file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
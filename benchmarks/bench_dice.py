@@ -0,0 +1,93 @@
+"""
+Benchmark do motor de dados e do simulador de combate.
+
+    python -m benchmarks.bench_dice [--rounds 100000] [--output resultado.json] [--max-seconds 1.0]
+
+Mede rolagens por segundo de algumas expressões e o tempo para simular pelo
+menos `--rounds` rodadas de combate num único núcleo. Com `--max-seconds`,
+termina com código 1 se a simulação passar do limite (útil no CI).
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from src.dice import compile_dice
+from src.simulation import Combatant, run_fights
+
+EXPRESSIONS = ("1d20+5", "1d20+5 adv", "4d8+4", "2d6+3", "8d6", "4d6kh3")
+ROLLS = 1_000_000
+
+
+def _party():
+    return [
+        Combatant("Guerreiro", compile_dice("44"), 18, 7, compile_dice("1d8+4"), 2),
+        Combatant("Clérigo", compile_dice("38"), 18, 6, compile_dice("2d8"), 1),
+        Combatant("Ladino", compile_dice("33"), 14, 7, compile_dice("1d6+3d6+4"), 1),
+        Combatant("Mago", compile_dice("27"), 12, 7, compile_dice("2d10"), 1),
+    ]
+
+
+def _monsters():
+    return [Combatant(f"Orc {i}", compile_dice("2d8+6"), 13, 5, compile_dice("1d12+3"), 1) for i in range(6)]
+
+
+def bench_rolls(rng) -> dict:
+    results = {}
+    for expression in EXPRESSIONS:
+        compiled = compile_dice(expression)
+        start = time.perf_counter()
+        compiled.roll(ROLLS, rng)
+        elapsed = time.perf_counter() - start
+        results[expression] = {"rolls_per_second": round(ROLLS / elapsed)}
+    return results
+
+
+def bench_simulation(target_rounds: int, seed: int) -> dict:
+    party, monsters = _party(), _monsters()
+    run_fights(party, monsters, 100, seed=seed)  # aquecimento
+    # Estima rodadas por luta e dimensiona o lote para atingir o alvo
+    sample = run_fights(party, monsters, 1000, seed=seed)
+    fights = max(1, int(target_rounds * 1.05 / sample["rounds"].mean()) + 1)
+    start = time.perf_counter()
+    arrays = run_fights(party, monsters, fights, seed=seed)
+    elapsed = time.perf_counter() - start
+    rounds = int(arrays["rounds"].sum())
+    return {
+        "fights": fights,
+        "rounds": rounds,
+        "seconds": round(elapsed, 4),
+        "rounds_per_second": round(rounds / elapsed),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--max-seconds", type=float, help="Falha se a simulação demorar mais que isso")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "dice": bench_rolls(np.random.default_rng(args.seed)),
+        "simulation": bench_simulation(args.rounds, args.seed),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.max_seconds is not None and report["simulation"]["seconds"] > args.max_seconds:
+        print(f"Simulação acima do limite de {args.max_seconds}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Partida a frio: de `import src.main` até a primeira resposta 200.
+
+    python -m benchmarks.bench_startup [--runs 10] [--warmup 1] [--http] [--workers 1]
+        [--output resultado.json] [--compare anterior.json] [--max-regression 20]
+
+Cada rodada é um interpretador novo (como um worker recém-criado ou o início
+da suíte de testes), contra um banco SQLite temporário já migrado. As fases:
+
+- import: `import src.main`
+- create_app: create_app() (roteadores, middlewares)
+- startup: lifespan (checagem das migrações, conexões iniciais, tarefas)
+- first_request: GET /api/v1/health em processo (httpx com ASGITransport)
+- spawn_to_200: do Popen do processo até a resposta, com o interpretador
+
+Com --http, mede também `python -m src.serve` subindo por HTTP real com
+--workers workers, do Popen até a primeira resposta 200.
+
+Com --compare, imprime a variação das medianas em relação a um resultado
+anterior; com --max-regression, termina com código 1 se a mediana de
+spawn_to_200 piorar mais que essa porcentagem.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_workers import PROJECT_ROOT, _free_port
+
+PHASES = ("import", "create_app", "startup", "first_request", "spawn_to_200")
+
+# Roda no processo novo; httpx vem antes do cronômetro por ser do cliente, não da aplicação
+_CHILD = r"""
+import asyncio, json, time
+import httpx
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+app = src.main.create_app()
+created = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/api/v1/health")
+        return ready, response.status_code, time.perf_counter(), time.time()
+
+ready, status, answered, answered_at = asyncio.run(first_request())
+print(json.dumps({
+    "status": status,
+    "answered_at": answered_at,
+    "import": (imported - started) * 1000,
+    "create_app": (created - imported) * 1000,
+    "startup": (ready - created) * 1000,
+    "first_request": (answered - ready) * 1000,
+}))
+"""
+
+
+def run_in_process() -> Dict[str, float]:
+    spawned_at = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    sample = json.loads(output.splitlines()[-1])
+    if sample.pop("status") != 200:
+        raise RuntimeError("GET /api/v1/health não respondeu 200")
+    sample["spawn_to_200"] = (sample.pop("answered_at") - spawned_at) * 1000
+    return sample
+
+
+def run_http(workers: int) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.serve", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Servidor terminou com código {process.returncode}")
+            try:
+                if httpx.get(url, timeout=1).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() - started > 60:
+                raise RuntimeError("Servidor não respondeu a tempo")
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(values), 2),
+        "min_ms": round(min(values), 2),
+        "max_ms": round(max(values), 2),
+    }
+
+
+def prepare_database():
+    """Migra o banco num processo à parte: as rodadas medem a checagem, não a criação."""
+    subprocess.run(
+        [sys.executable, "-c", "from src import migrations; migrations.upgrade_to_head()"],
+        cwd=PROJECT_ROOT, check=True,
+    )
+
+
+def compare(previous: dict, current: dict) -> Dict[str, float]:
+    """Imprime a variação das medianas por fase; retorna a variação percentual de cada uma."""
+    changes = {}
+    print(f"{'fase':<16}{'antes':>10}{'agora':>10}{'Δ':>9}", file=sys.stderr)
+    for name, now in current["phases"].items():
+        before = previous.get("phases", {}).get(name)
+        if not before or not before["median_ms"]:
+            continue
+        changes[name] = (now["median_ms"] / before["median_ms"] - 1) * 100
+        print(f"{name:<16}{before['median_ms']:>10.1f}{now['median_ms']:>10.1f}{changes[name]:>8.1f}%", file=sys.stderr)
+    return changes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Rodadas medidas")
+    parser.add_argument("--warmup", type=int, default=1, help="Rodadas descartadas (compilação do bytecode)")
+    parser.add_argument("--http", action="store_true", help="Mede também o servidor subindo por HTTP")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do servidor com --http")
+    parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para comparar")
+    parser.add_argument("--max-regression", type=float, help="Falha se spawn_to_200 piorar mais que isso (%%)")
+    args = parser.parse_args(argv)
+
+    samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    http_samples: List[float] = []
+    with tempfile.TemporaryDirectory(prefix="dk-startup-") as workdir:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+            "AVATAR_DIR": os.path.join(workdir, "avatars"),
+            "SECRET_KEY": os.urandom(32).hex(),
+            "SMTP_HOST": "",
+        })
+        prepare_database()
+        for run in range(args.warmup + args.runs):
+            sample = run_in_process()
+            if run >= args.warmup:
+                for phase in PHASES:
+                    samples[phase].append(sample[phase])
+        if args.http:
+            for run in range(args.warmup + args.runs):
+                elapsed = run_http(args.workers)
+                if run >= args.warmup:
+                    http_samples.append(elapsed)
+
+    report = {
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"runs": args.runs, "warmup": args.warmup},
+        "phases": {phase: summarize(values) for phase, values in samples.items()},
+    }
+    if http_samples:
+        report["http"] = {"workers": args.workers, **summarize(http_samples)}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            changes = compare(json.load(f), report)
+        if args.max_regression is not None and changes.get("spawn_to_200", 0) > args.max_regression:
+            print(f"spawn_to_200 piorou mais de {args.max_regression}%", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Vazão da API em função do número de workers (python -m src.serve), por HTTP real.
+
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--duration 10] [--clients 4]
+        [--connections 32] [--users 50 ...] [--output resultado.json]
+
+Prepara um banco SQLite temporário com benchmarks.datagen e, para cada número
+de workers, sobe o servidor com chaves JWT compartilhadas e mede, durante
+--duration segundos por cenário, requisições por segundo e latência p50/p95/p99.
+A carga vem de --clients processos com --connections conexões no total, para
+que o gerador de carga não seja o gargalo. `scaling` é a vazão de cada rodada
+dividida pela da primeira.
+
+A vazão só cresce até o número de núcleos livres (cpu_count no resultado): numa
+máquina com poucos núcleos, servidor e clientes disputam os mesmos.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks import datagen
+from benchmarks.bench_api import percentile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- GERADOR DE CARGA (roda nos processos clientes) ---
+async def _drive(url: str, method: str, body: Optional[dict], headers: dict, duration: float, connections: int):
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, json=body, headers=headers)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(connections)))
+    return latencies, errors
+
+
+def _client(url: str, method: str, body: Optional[dict], headers: dict, duration: float, connections: int):
+    return asyncio.run(_drive(url, method, body, headers, duration, connections))
+
+
+def run_load(pool: ProcessPoolExecutor, clients: int, connections: int, duration: float,
+             url: str, method: str = "GET", body: Optional[dict] = None, headers: Optional[dict] = None) -> dict:
+    per_client = max(1, connections // clients)
+    futures = [pool.submit(_client, url, method, body, headers or {}, duration, per_client) for _ in range(clients)]
+    latencies: List[float] = []
+    errors = 0
+    for future in futures:
+        client_latencies, client_errors = future.result()
+        latencies += client_latencies
+        errors += client_errors
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+# --- SERVIDOR ---
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor terminou com código {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/v1/health", timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+
+def prepare_database(args):
+    """Migra e preenche o banco; roda num processo à parte para não carregar src aqui."""
+    from src import database, migrations
+
+    migrations.upgrade_to_head()
+    with database.SessionLocal() as db:
+        dataset = datagen.generate(db, datagen.scale_from_args(args), seed=args.seed)
+    database.engine.dispose()
+    return dataset.usernames[0], dataset.password
+
+
+def bench_workers(args, workers: int, username: str, password: str, pool: ProcessPoolExecutor) -> Dict[str, dict]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.serve", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+    )
+    try:
+        _wait_ready(base_url, process)
+        login = {"username": username, "password": password}
+        token = httpx.post(f"{base_url}/api/v1/token", json=login, timeout=30).json()["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        scenarios = {
+            "list_items": dict(url=f"{base_url}/api/v1/items/?limit=50", headers=auth),
+            "list_stories": dict(url=f"{base_url}/api/v1/stories/?limit=20", headers=auth),
+            "login": dict(url=f"{base_url}/api/v1/token", method="POST", body=login),
+        }
+        results = {}
+        for name, request in scenarios.items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            results[name] = run_load(pool, args.clients, args.connections, args.duration, **request)
+            print(f"{workers} worker(s) {name}: {results[name]['throughput_rps']} req/s", file=sys.stderr)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_scale_arguments(parser)
+    parser.add_argument("--workers", default="1,2,4", help="Números de workers, separados por vírgula")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por cenário")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1), help="Processos geradores de carga")
+    parser.add_argument("--connections", type=int, default=32, help="Conexões simultâneas no total")
+    parser.add_argument("--scenarios", type=lambda value: set(value.split(",")), help="Padrão: todos")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo")
+    args = parser.parse_args(argv)
+    counts = [int(value) for value in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory(prefix="dk-workers-") as workdir:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "AVATAR_DIR": os.path.join(workdir, "avatars"),
+            "SECRET_KEY": secrets.token_hex(32),
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "RESPONSE_CACHE_MAX_BYTES": "0",
+            "SMTP_HOST": "",
+            "RATE_LIMIT_ENABLED": "false",
+        })
+        with ProcessPoolExecutor(max_workers=1) as setup:
+            username, password = setup.submit(prepare_database, args).result()
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            for workers in counts:
+                results[str(workers)] = bench_workers(args, workers, username, password, pool)
+
+    baseline = results[str(counts[0])]
+    scaling = {
+        name: {workers: round(run[name]["throughput_rps"] / baseline[name]["throughput_rps"], 2)
+               for workers, run in results.items() if baseline[name]["throughput_rps"]}
+        for name in baseline
+    }
+    report = {
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "duration": args.duration,
+            "clients": args.clients,
+            "connections": args.connections,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "workers": results,
+        "scaling": scaling,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Gerador de dados sintéticos e reprodutíveis para benchmarks e testes de carga.
+
+    python -m benchmarks.datagen [--users 50] [--stories 5] [--links 10] [--seed 1]
+
+Grava no banco de DATABASE_URL (que já deve estar migrado): usuários com
+personagens, itens, monstros e NPCs; histórias ligadas a `--links` itens,
+monstros e NPCs do autor; mesas com jogadores aprovados e solicitações
+pendentes. A mesma semente gera sempre os mesmos ids, nomes e datas.
+Todos os usuários têm a senha PASSWORD.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+PASSWORD = "benchmark-password"
+BASE_TIME = datetime(2024, 1, 1)
+
+_ITEM_TYPES = ("Weapon", "Armor", "Potion", "Mundane", "Wondrous")
+_RARITIES = ("Common", "Uncommon", "Rare", "Very Rare", "Legendary")
+_SIZES = ("Small", "Medium", "Large", "Huge")
+_MONSTER_TYPES = ("Beast", "Undead", "Aberration", "Humanoid", "Dragon", "Fiend")
+_CHALLENGE_RATINGS = ("1/8", "1/4", "1/2", "1", "2", "3", "5", "8", "10")
+_ROLES = ("Lojista", "Guarda", "Nobre", "Vilão", "Taverneiro", "Sacerdote")
+_RACES = ("Humano", "Elfo", "Anão", "Halfling", "Tiefling")
+_CLASSES = ("Guerreiro", "Mago", "Ladino", "Clérigo", "Bardo")
+_WORDS = (
+    "antiga", "sombria", "dragão", "coroa", "floresta", "cripta", "lâmina", "torre",
+    "rubi", "névoa", "guilda", "profecia", "ruína", "forja", "lua", "serpente",
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int = 50
+    characters: int = 2   # por usuário
+    stories: int = 5      # por usuário
+    links: int = 10       # itens, monstros e NPCs ligados a cada história
+    tables: int = 2       # mesas mestradas por usuário
+    players: int = 4      # jogadores aprovados por mesa
+    join_requests: int = 3  # solicitações pendentes por mesa
+
+
+@dataclass
+class Dataset:
+    """Resumo do que foi gerado; o benchmark usa os nomes de usuário para logar."""
+
+    seed: int
+    scale: Scale
+    usernames: List[str]
+    password: str
+    counts: dict
+    seconds: float = 0.0
+
+
+class _Generator:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self._clock = 0
+
+    def id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def now(self) -> datetime:
+        # Datas distintas e crescentes: a paginação por (created_at, id) fica estável
+        self._clock += 1
+        return BASE_TIME + timedelta(seconds=self._clock)
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(count))
+
+    def sample(self, population: list, count: int) -> list:
+        return self.rng.sample(population, min(count, len(population)))
+
+
+def generate(db: Session, scale: Scale = Scale(), seed: int = 1, batch_size: int = 1000) -> Dataset:
+    """Insere o conjunto de dados em lotes (insert executemany) e faz commit."""
+    # src é importado só aqui: quem usa o gerador (bench_api) ajusta o ambiente antes
+    from src import models
+    from src.hashing import pwd_context
+    from src.statblock import derived_columns
+
+    started = time.perf_counter()
+    gen = _Generator(seed)
+    # Um hash só para todos: bcrypt por usuário dominaria o tempo de geração
+    hashed_password = pwd_context.hash(PASSWORD)
+    rows = {name: [] for name in (
+        "users", "characters", "items", "monsters", "npcs", "stories",
+        "story_items", "story_monsters", "story_npcs", "tables", "players", "join_requests",
+    )}
+
+    users = []
+    for n in range(scale.users):
+        user_id = gen.id()
+        username = f"bench_{seed}_{n:05d}"
+        users.append(user_id)
+        rows["users"].append({
+            "id": user_id, "username": username, "email": f"{username}@example.com",
+            "hashed_password": hashed_password, "is_active": True, "bio": gen.words(8),
+        })
+
+    pool_size = max(scale.links, 1) * 2
+    for user_id in users:
+        for _ in range(scale.characters):
+            rows["characters"].append({
+                "id": gen.id(), "name": gen.words(2).title(), "race": gen.rng.choice(_RACES),
+                "character_class": gen.rng.choice(_CLASSES), "level": gen.rng.randint(1, 20),
+                "owner_id": user_id, "created_at": gen.now(),
+            })
+
+        # Cada usuário tem um acervo próprio; as histórias sorteiam dele
+        items, monsters, npcs = [], [], []
+        for _ in range(pool_size if scale.stories else 0):
+            item_id, monster_id, npc_id = gen.id(), gen.id(), gen.id()
+            items.append(item_id)
+            monsters.append(monster_id)
+            npcs.append(npc_id)
+            rows["items"].append({
+                "id": item_id, "name": gen.words(2).title(), "description": gen.words(20),
+                "type": gen.rng.choice(_ITEM_TYPES), "rarity": gen.rng.choice(_RARITIES),
+                "creator_id": user_id, "created_at": gen.now(),
+            })
+            dice = gen.rng.randint(1, 12)
+            hit_points = f"{dice * 5} ({dice}d8 + {dice})"
+            challenge_rating = gen.rng.choice(_CHALLENGE_RATINGS)
+            rows["monsters"].append({
+                "id": monster_id, "name": gen.words(2).title(), "size": gen.rng.choice(_SIZES),
+                "type": gen.rng.choice(_MONSTER_TYPES), "armor_class": gen.rng.randint(10, 20),
+                "hit_points": hit_points, "speed": "30 ft.", "actions": gen.words(40),
+                "challenge_rating": challenge_rating, "creator_id": user_id, "created_at": gen.now(),
+                **derived_columns(hit_points, challenge_rating),
+            })
+            rows["npcs"].append({
+                "id": npc_id, "name": gen.words(2).title(), "description": gen.words(20),
+                "role": gen.rng.choice(_ROLES), "location": gen.words(3), "notes": gen.words(10),
+                "creator_id": user_id, "created_at": gen.now(),
+            })
+
+        stories = []
+        for _ in range(scale.stories):
+            story_id = gen.id()
+            stories.append(story_id)
+            rows["stories"].append({
+                "id": story_id, "title": gen.words(3).title(), "synopsis": gen.words(60),
+                "creator_id": user_id, "created_at": gen.now(),
+            })
+            rows["story_items"] += [{"story_id": story_id, "item_id": i} for i in gen.sample(items, scale.links)]
+            rows["story_monsters"] += [{"story_id": story_id, "monster_id": m} for m in gen.sample(monsters, scale.links)]
+            rows["story_npcs"] += [{"story_id": story_id, "npc_id": n} for n in gen.sample(npcs, scale.links)]
+
+        others = [other for other in users if other != user_id]
+        for _ in range(scale.tables):
+            table_id = gen.id()
+            rows["tables"].append({
+                "id": table_id, "title": gen.words(3).title(), "description": gen.words(15),
+                "master_id": user_id, "story_id": gen.rng.choice(stories) if stories else None,
+                "created_at": gen.now(),
+            })
+            chosen = gen.sample(others, scale.players + scale.join_requests)
+            rows["players"] += [{"table_id": table_id, "user_id": p} for p in chosen[:scale.players]]
+            rows["join_requests"] += [
+                {"id": gen.id(), "table_id": table_id, "user_id": r, "status": "pending", "created_at": gen.now()}
+                for r in chosen[scale.players:]
+            ]
+
+    targets = {
+        "users": models.User.__table__,
+        "characters": models.Character.__table__,
+        "items": models.Item.__table__,
+        "monsters": models.Monster.__table__,
+        "npcs": models.NPC.__table__,
+        "stories": models.Story.__table__,
+        "story_items": models.story_item_association,
+        "story_monsters": models.story_monster_association,
+        "story_npcs": models.story_npc_association,
+        "tables": models.Table.__table__,
+        "players": models.table_players_association,
+        "join_requests": models.JoinRequest.__table__,
+    }
+    for name, table in targets.items():
+        data = rows[name]
+        for start in range(0, len(data), batch_size):
+            db.execute(insert(table), data[start:start + batch_size])
+    db.commit()
+
+    return Dataset(
+        seed=seed,
+        scale=scale,
+        usernames=[row["username"] for row in rows["users"]],
+        password=PASSWORD,
+        counts={name: len(data) for name, data in rows.items()},
+        seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    defaults = Scale()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--characters", type=int, default=defaults.characters, help="Personagens por usuário")
+    parser.add_argument("--stories", type=int, default=defaults.stories, help="Histórias por usuário")
+    parser.add_argument("--links", type=int, default=defaults.links, help="Itens/monstros/NPCs por história")
+    parser.add_argument("--tables", type=int, default=defaults.tables, help="Mesas por usuário")
+    parser.add_argument("--players", type=int, default=defaults.players, help="Jogadores aprovados por mesa")
+    parser.add_argument("--join-requests", type=int, default=defaults.join_requests, help="Solicitações pendentes por mesa")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def scale_from_args(args) -> Scale:
+    return Scale(
+        users=args.users, characters=args.characters, stories=args.stories, links=args.links,
+        tables=args.tables, players=args.players, join_requests=args.join_requests,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from src import database
+
+    with database.SessionLocal() as db:
+        dataset = generate(db, scale_from_args(args), seed=args.seed)
+    report = asdict(dataset)
+    report.pop("usernames")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,12 @@ apiClient.interceptors.request.use(
   }
 );
 
+// Envelope de paginação das listagens (ver schemas.Page no backend)
+export type Page<T> = {
+  items: T[];
+  next_cursor: string | null;
+};
+
 // Tipagem base para usuário
 export type UserBase = {
   id: string;
@@ -101,8 +107,8 @@ export type TableData = {
 };
 
 export const getTables = async (): Promise<TableData[]> => {
-  const response = await apiClient.get('/tables');
-  return response.data;
+  const response = await apiClient.get<Page<TableData>>('/tables');
+  return response.data.items;
 };
 
 export const createTable = async (tableData: Omit<TableData, 'id'>): Promise<TableData> => {
@@ -161,8 +167,8 @@ export type CharacterCreateData = Omit<CharacterData, 'id' | 'owner_id'>;
 
 // Funções para personagens
 export const getUserCharacters = async (): Promise<CharacterData[]> => {
-  const response = await apiClient.get('/characters');
-  return response.data;
+  const response = await apiClient.get<Page<CharacterData>>('/characters');
+  return response.data.items;
 };
 
 export const createCharacter = async (characterData: CharacterCreateData): Promise<CharacterData> => {
@@ -189,8 +195,8 @@ export type ItemCreateData = Omit<ItemData, 'id' | 'creator_id'>;
 
 // Funções para itens
 export const getUserItems = async (): Promise<ItemData[]> => {
-  const response = await apiClient.get('/items/');
-  return response.data;
+  const response = await apiClient.get<Page<ItemData>>('/items/');
+  return response.data.items;
 };
 
 export const createItem = async (itemData: ItemCreateData): Promise<ItemData> => {
@@ -216,8 +222,8 @@ export type MonsterCreateData = Omit<MonsterData, 'id' | 'creator_id'>;
 
 // Funções para monstros
 export const getUserMonsters = async (): Promise<MonsterData[]> => {
-  const response = await apiClient.get('/monsters/');
-  return response.data;
+  const response = await apiClient.get<Page<MonsterData>>('/monsters/');
+  return response.data.items;
 };
 
 export const createMonster = async (monsterData: MonsterCreateData): Promise<MonsterData> => {
@@ -240,8 +246,8 @@ export type NpcCreateData = Omit<NpcData, 'id' | 'creator_id'>;
 
 // Funções para NPCs
 export const getUserNpcs = async (): Promise<NpcData[]> => {
-  const response = await apiClient.get('/npcs/');
-  return response.data;
+  const response = await apiClient.get<Page<NpcData>>('/npcs/');
+  return response.data.items;
 };
 
 export const createNpc = async (npcData: NpcCreateData): Promise<NpcData> => {
@@ -270,8 +276,8 @@ export type StoryCreateData = {
 
 // Funções para histórias
 export const getUserStories = async (): Promise<StoryData[]> => {
-  const response = await apiClient.get('/stories/');
-  return response.data;
+  const response = await apiClient.get<Page<StoryData>>('/stories/');
+  return response.data.items;
 };
 
 export const createStory = async (storyData: StoryCreateData): Promise<StoryData> => {
@@ -279,6 +285,25 @@ export const createStory = async (storyData: StoryCreateData): Promise<StoryData
   return response.data;
 };
 
+// Busca textual no conteúdo do usuário
+export type SearchType = 'item' | 'monster' | 'npc' | 'story';
+
+export type SearchHit = {
+  type: SearchType;
+  id: string;
+  title: string | null;
+  snippet: string | null;
+  score: number;
+};
+
+export const searchContent = async (q: string, types?: SearchType[], cursor?: string): Promise<Page<SearchHit>> => {
+  const response = await apiClient.get<Page<SearchHit>>('/search', {
+    params: { q, type: types, cursor },
+    paramsSerializer: { indexes: null },  // type=item&type=npc
+  });
+  return response.data;
+};
+
 // Funções para perfil do usuário
 export const getMe = async (): Promise<UserProfileData> => {
   const response = await apiClient.get('/users/me');
@@ -320,5 +345,22 @@ export const importUserData = async (backupFile: File): Promise<any> => {
   return response.data;
 };
 
+// Eventos em tempo real de uma mesa (WebSocket); retorna a função que fecha a conexão
+export type TableEvent = {
+  type: 'join_request.created' | 'join_request.approved' | 'join_request.declined' | 'overflow';
+  channel: string;
+  data?: { table_id: string; request_id: string; user_id: string; username?: string };
+  dropped?: number;
+  ts?: number;
+};
+
+export const subscribeTableEvents = (tableId: string, onEvent: (event: TableEvent) => void): (() => void) => {
+  const token = useAuthStore.getState().token;
+  const baseURL = (apiClient.defaults.baseURL ?? '').replace(/^http/, 'ws');
+  const socket = new WebSocket(`${baseURL}/tables/${tableId}/events?token=${encodeURIComponent(token ?? '')}`);
+  socket.onmessage = (message) => onEvent(JSON.parse(message.data));
+  return () => socket.close();
+};
+
 // Exportar o apiClient para uso direto quando necessário
 export { apiClient };
\ No newline at end of file
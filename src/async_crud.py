@@ -0,0 +1,101 @@
+# Variantes assíncronas (AsyncSession) das funções de crud.py usadas pelos
+# endpoints mais acessados. As consultas e os perfis de carregamento são os
+# mesmos; como não há lazy load em AsyncSession, todo relacionamento
+# serializado precisa vir de um perfil de loading.py.
+import uuid
+from typing import Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .fieldsets import SUMMARIES, summary_columns
+from .loading import STORY_DETAIL, TABLE_DETAIL
+from .pagination import DEFAULT_PAGE_SIZE, paginate_async
+
+
+# --- USUÁRIOS ---
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    # O hash já vem pronto do executor de hash (auth.hash_password_async)
+    db_user = models.User(
+        id=str(uuid.uuid4()),
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user_password_hash(db: AsyncSession, db_user: models.User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    await db.commit()
+    return db_user
+
+
+# --- MESAS ---
+async def get_tables_page(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None,
+                          options: tuple = TABLE_DETAIL):
+    stmt = select(models.Table).options(*options)
+    return await paginate_async(db, stmt, models.Table, cursor=cursor, limit=limit, skip=skip)
+
+
+async def is_table_member(db: AsyncSession, table_id: str, user_id: str) -> Optional[bool]:
+    """Mestre ou jogador da mesa; None se a mesa não existe."""
+    master_id = (await db.execute(select(models.Table.master_id).where(models.Table.id == table_id))).scalar()
+    if master_id is None:
+        return None
+    if master_id == user_id:
+        return True
+    players = models.table_players_association
+    result = await db.execute(
+        select(exists().where(players.c.table_id == table_id, players.c.user_id == user_id))
+    )
+    return bool(result.scalar())
+
+
+async def get_table_story_role(db: AsyncSession, table_id: str, user_id: str):
+    """(story_id, "master" | "player" | None) do usuário na mesa, numa consulta; None se a mesa não existe."""
+    players = models.table_players_association
+    is_player = exists().where(players.c.table_id == models.Table.id, players.c.user_id == user_id)
+    row = (await db.execute(
+        select(models.Table.story_id, models.Table.master_id, is_player.label("is_player"))
+        .where(models.Table.id == table_id)
+    )).first()
+    if row is None:
+        return None
+    if row.master_id == user_id:
+        return row.story_id, "master"
+    return row.story_id, "player" if row.is_player else None
+
+
+async def get_story_creator_id(db: AsyncSession, story_id: str) -> Optional[str]:
+    return (await db.execute(select(models.Story.creator_id).where(models.Story.id == story_id))).scalar()
+
+
+# --- RESUMOS (?view=summary) ---
+async def get_summary_page(db: AsyncSession, kind: str, owner_id: Optional[str] = None, cursor: Optional[str] = None,
+                           limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    model, owner_column, _ = SUMMARIES[kind]
+    stmt = select(*summary_columns(kind))
+    if owner_column is not None:
+        stmt = stmt.where(owner_column == owner_id)
+    return await paginate_async(db, stmt, model, cursor=cursor, limit=limit, skip=skip, scalars=False)
+
+
+# --- HISTÓRIAS ---
+async def get_user_stories_page(db: AsyncSession, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None,
+                                options: tuple = STORY_DETAIL):
+    stmt = select(models.Story).options(*options).where(models.Story.creator_id == user_id)
+    return await paginate_async(db, stmt, models.Story, cursor=cursor, limit=limit, skip=skip)
+
+
+# --- PERSONAGENS ---
+async def get_characters_page(db: AsyncSession, owner_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    stmt = select(models.Character).where(models.Character.owner_id == owner_id)
+    return await paginate_async(db, stmt, models.Character, cursor=cursor, limit=limit, skip=skip)
@@ -1,26 +1,32 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
-import os
+from starlette.requests import HTTPConnection
 
-from . import crud, schemas, database  # Importar crud, schemas e database
+from . import crud, async_crud, schemas, database  # Importar crud, schemas e database
+from .principal_cache import get_principal_cache
+from .hashing import HashingOverloaded, PasswordHasher, pwd_context
+from .signing_keys import KeyRing
 
 # --- CONFIGURAÇÃO DE SEGURANÇA DO TOKEN ---
-SECRET_KEY = os.urandom(32).hex()
+# Chaves vindas do ambiente ou de arquivo (ver signing_keys.py): todos os
+# workers validam os tokens uns dos outros, e reiniciar não desloga ninguém.
+# create_app() carrega as da aplicação em app.state.key_ring.
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# --- Contexto de Senha ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # --- OAuth2 ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
 
+def get_key_ring(connection: HTTPConnection) -> KeyRing:
+    """Dependência: as chaves de assinatura da aplicação (app.state.key_ring)."""
+    return connection.app.state.key_ring
+
 # --- Modelo para dados do token movido para schemas.py ---
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -29,6 +35,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _hashing_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password_async(password: str, hasher: PasswordHasher) -> str:
+    """Versão de get_password_hash que roda no executor de hash da aplicação."""
+    try:
+        return await hasher.hash(password)
+    except HashingOverloaded:
+        raise _hashing_unavailable()
+
 # --- FUNÇÃO DE AUTENTICAÇÃO CORRIGIDA E CENTRALIZADA ---
 def authenticate_user(db: Session, username: str, password: str) -> Optional[schemas.UserInDB]:
     """
@@ -38,43 +58,107 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[sch
     user = crud.get_user_by_username(db, username=username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        crud.update_user_password_hash(db, user, new_hash)
+    return user
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str,
+                                  hasher: PasswordHasher) -> Optional[schemas.UserInDB]:
+    """
+    Igual a authenticate_user, mas com AsyncSession e com o bcrypt no executor
+    de hash, sem travar o event loop. Responde 503 quando o executor está saturado.
+    """
+    user = await async_crud.get_user_by_username(db, username=username)
+    if not user:
+        return None
+    try:
+        valid, new_hash = await hasher.verify_and_update(password, user.hashed_password)
+    except HashingOverloaded:
+        raise _hashing_unavailable()
+    if not valid:
         return None
+    if new_hash:
+        # Parâmetros de custo mudaram: regrava o hash com a configuração atual
+        await async_crud.update_user_password_hash(db, user, new_hash)
     return user
 
 # --- FUNÇÕES JWT ---
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, key_ring: KeyRing, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, key_ring.active_secret, algorithm=ALGORITHM, headers={"kid": key_ring.active_kid})
     return encoded_jwt
 
-def get_current_user_from_token(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+def _decode_token(token: str, key_ring: KeyRing) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        if username is None or user_id is None:
+        # O kid do cabeçalho escolhe a chave; tokens de chaves já removidas são recusados
+        secret = key_ring.secret_for(jwt.get_unverified_header(token).get("kid"))
+        if secret is None:
             raise credentials_exception
-        token_data = schemas.TokenData(username=username, user_id=user_id)
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
     except JWTError:
         raise credentials_exception
-    return token_data
+    if payload.get("sub") is None or payload.get("user_id") is None:
+        raise credentials_exception
+    return payload
+
+def get_current_user_from_token(
+    token: str = Depends(oauth2_scheme),
+    key_ring: KeyRing = Depends(get_key_ring)
+) -> schemas.TokenData:
+    payload = _decode_token(token, key_ring)
+    return schemas.TokenData(username=payload["sub"], user_id=payload["user_id"])
 
 def get_current_active_user(
-    token_data: schemas.TokenData = Depends(get_current_user_from_token),
+    connection: HTTPConnection,
+    token: str = Depends(oauth2_scheme),
     db: Session = Depends(database.get_db)
-):
-    user = crud.get_user_by_username(db, username=token_data.username)
+) -> schemas.AuthenticatedUser:
+    # Caminho rápido: o mesmo token já foi validado recentemente
+    principal_cache = get_principal_cache(connection)
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token, get_key_ring(connection))
+    user = crud.get_user_by_username(db, username=payload["sub"])
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    principal = schemas.AuthenticatedUser.model_validate(user)
+    principal_cache.put(token, principal, token_exp=payload.get("exp"))
+    return principal
+
+async def get_current_active_user_async(
+    connection: HTTPConnection,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(database.get_async_db)
+) -> schemas.AuthenticatedUser:
+    """Versão de get_current_active_user para endpoints assíncronos (sem threadpool)."""
+    return await authenticate_token_async(connection, token, db)
+
+async def authenticate_token_async(connection: HTTPConnection, token: str, db: AsyncSession) -> schemas.AuthenticatedUser:
+    """Valida um token obtido fora do header Authorization (e.g. WebSocket, via query string)."""
+    principal_cache = get_principal_cache(connection)
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = _decode_token(token, get_key_ring(connection))
+    user = await async_crud.get_user_by_username(db, username=payload["sub"])
     if user is None or not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
\ No newline at end of file
+    principal = schemas.AuthenticatedUser.model_validate(user)
+    principal_cache.put(token, principal, token_exp=payload.get("exp"))
+    return principal
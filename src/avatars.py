@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.datastructures import Headers
+from starlette.requests import HTTPConnection
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from .config import Settings
+
+AVATAR_SIZES = (64, 128, 256)
+DEFAULT_SIZE = 128
+ACCEPTED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+WEBP_QUALITY = 85
+
+# Variantes endereçadas pelo hash nunca mudam: o navegador pode guardá-las para sempre
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Arquivos antigos, enviados antes do pipeline, ficam na raiz com nome arbitrário
+LEGACY_CACHE = "public, max-age=3600"
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}$")
+
+
+class InvalidImage(ValueError):
+    """O arquivo enviado não é uma imagem aceita."""
+
+
+class AvatarOverloaded(Exception):
+    """A fila de processamento está cheia; o chamador deve responder 503."""
+
+
+# --- Processamento (roda nos workers; precisa ser de nível de módulo) ---
+def render_variants(data: bytes, sizes: Tuple[int, ...] = AVATAR_SIZES, max_pixels: int = 25_000_000) -> Dict[int, bytes]:
+    """Valida a imagem, recorta o quadrado central e gera um WebP por tamanho."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in ACCEPTED_FORMATS:
+                raise InvalidImage(f"Formato não suportado: {image.format}")
+            # Checa as dimensões do cabeçalho antes de decodificar (decompression bomb)
+            if image.width * image.height > max_pixels:
+                raise InvalidImage("Imagem grande demais")
+            image.seek(0)  # GIF animado: só o primeiro quadro
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage("Arquivo de imagem inválido") from e
+
+    variants = {}
+    for size in sizes:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        variants[size] = buffer.getvalue()
+    return variants
+
+
+# --- Armazenamento endereçado por conteúdo ---
+class AvatarStore:
+    """
+    Variantes em `<raiz>/<hash[:2]>/<hash>/<tamanho>.webp`, onde hash é o
+    SHA-256 do arquivo enviado: o mesmo upload, de qualquer usuário, é
+    processado e gravado uma única vez.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def ensure_root(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def directory(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        directory = self.directory(digest)
+        return all((directory / f"{size}.webp").is_file() for size in AVATAR_SIZES)
+
+    def save(self, digest: str, variants: Dict[int, bytes]):
+        directory = self.directory(digest)
+        directory.mkdir(parents=True, exist_ok=True)
+        for size, data in variants.items():
+            # Escrita atômica: um leitor nunca vê um arquivo pela metade
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as temp:
+                temp.write(data)
+            os.replace(temp_path, directory / f"{size}.webp")
+
+    @staticmethod
+    def url(digest: str, size: int = DEFAULT_SIZE) -> str:
+        return f"/avatars/{digest[:2]}/{digest}/{size}.webp"
+
+
+class AvatarFiles(StaticFiles):
+    """StaticFiles com Cache-Control imutável e ETag pelo hash nas variantes endereçadas."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        path = Path(full_path)
+        headers = {"Cache-Control": LEGACY_CACHE}
+        if _CONTENT_ADDRESSED.match(path.parent.name):
+            headers = {"Cache-Control": IMMUTABLE_CACHE, "ETag": f'"{path.parent.name}-{path.stem}"'}
+        # FileResponse atende Range (206) e só completa os cabeçalhos que faltam
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# --- Pool de processamento ---
+class AvatarProcessor:
+    """
+    Gera as variantes fora do event loop, num pool de processos (Pillow segura
+    o GIL em boa parte do trabalho). Como em hashing.PasswordHasher, a fila é
+    limitada e o excesso recebe AvatarOverloaded de imediato.
+    """
+
+    def __init__(self, store: AvatarStore, max_workers: int, max_pending: int, max_pixels: int,
+                 use_processes: bool = True):
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.max_pixels = max_pixels
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.deduplicated = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AvatarProcessor":
+        return cls(
+            AvatarStore(settings.avatar_dir),
+            max_workers=settings.avatar_workers,
+            max_pending=settings.avatar_max_pending,
+            max_pixels=settings.avatar_max_pixels,
+            use_processes=settings.avatar_executor == "process",
+        )
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="avatars")
+            return self._executor
+
+    async def process(self, data: bytes) -> str:
+        """Processa e grava o upload (se ainda não existir); retorna o hash do conteúdo."""
+        digest = hashlib.sha256(data).hexdigest()
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self.store.exists, digest):
+            self.deduplicated += 1
+            return digest
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise AvatarOverloaded()
+            self._in_flight += 1
+        try:
+            variants = await loop.run_in_executor(self._get_executor(), render_variants, data, AVATAR_SIZES, self.max_pixels)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        await loop.run_in_executor(None, self.store.save, digest, variants)
+        self.processed += 1
+        return digest
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "processed": self.processed,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+            }
+
+
+
+def get_avatar_processor(connection: HTTPConnection) -> AvatarProcessor:
+    """Dependência: o pool de avatares da aplicação (app.state.avatar_processor)."""
+    return connection.app.state.avatar_processor
@@ -0,0 +1,100 @@
+import json
+import zlib
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+
+BACKUP_FORMAT_VERSION = 1
+DEFAULT_BATCH_SIZE = 500
+
+# Seções na mesma ordem e com os mesmos nomes de schemas.UserBackup.
+# Histórias vêm por último para que, na importação, os itens/monstros/NPCs
+# que elas referenciam já tenham sido criados.
+EXPORT_SECTIONS = (
+    ("characters", crud.iter_user_characters, schemas.Character),
+    ("items", crud.iter_user_items, schemas.Item),
+    ("monsters", crud.iter_user_monsters, schemas.Monster),
+    ("npcs", crud.iter_user_npcs, schemas.NPC),
+    ("stories", crud.iter_user_stories, schemas.Story),
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def _batched_rows(db, user_id: str, batch_size: int) -> Iterator[tuple]:
+    """Gera (seção, lista de JSONs serializados) em lotes de `batch_size`."""
+    for section, iterate, schema in EXPORT_SECTIONS:
+        batch = []
+        for row in iterate(db, user_id, batch_size=batch_size):
+            batch.append(schema.model_validate(row).model_dump_json())
+            if len(batch) >= batch_size:
+                yield section, batch
+                batch = []
+        yield section, batch
+
+
+def iter_ndjson(db, user_id: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Uma linha por registro: `{"section": "items", "data": {...}}`.
+    A primeira linha é um cabeçalho com a versão do formato.
+    """
+    header = {"section": "header", "data": {"version": BACKUP_FORMAT_VERSION}}
+    yield (json.dumps(header, separators=(",", ":")) + "\n").encode()
+    for section, batch in _batched_rows(db, user_id, batch_size):
+        if batch:
+            prefix = '{"section":"%s","data":' % section
+            yield "".join(prefix + data + "}\n" for data in batch).encode()
+
+
+def iter_json(db, user_id: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Mesmo documento de schemas.UserBackup, mas gerado em pedaços."""
+    current = None
+    first_in_section = True
+    yield b"{"
+    for section, batch in _batched_rows(db, user_id, batch_size):
+        if section != current:
+            opening = '"%s":[' % section
+            if current is not None:
+                opening = "]," + opening
+            yield opening.encode()
+            current = section
+            first_in_section = True
+        if batch:
+            chunk = ",".join(batch)
+            if not first_in_section:
+                chunk = "," + chunk
+            first_in_section = False
+            yield chunk.encode()
+    yield b"]}"
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime em formato gzip sem acumular a saída (um flush por pedaço)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_user_backup(session_factory: Callable[[], Session], user_id: str, fmt: str = "ndjson",
+                       compress: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Gerador usado pelo StreamingResponse. Abre a própria sessão (da fábrica
+    da aplicação), porque a sessão da dependência get_db é fechada antes do
+    corpo ser enviado.
+    """
+    db = session_factory()
+    try:
+        chunks = iter_ndjson(db, user_id, batch_size) if fmt == "ndjson" else iter_json(db, user_id, batch_size)
+        if compress:
+            chunks = gzip_chunks(chunks)
+        yield from chunks
+    finally:
+        db.close()
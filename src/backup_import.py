@@ -0,0 +1,278 @@
+import gzip
+import io
+import json
+import re
+import uuid
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import models, schemas, statblock, versions
+from .backup_export import BACKUP_FORMAT_VERSION
+
+DEFAULT_BATCH_SIZE = 500
+MAX_ERRORS_PER_SECTION = 20
+_READ_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r"\s*")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+# --- LEITURA INCREMENTAL DO ARQUIVO ---
+def open_backup_stream(fileobj: BinaryIO) -> io.TextIOBase:
+    """Abre o upload como texto, descomprimindo se for gzip (detectado pelo cabeçalho)."""
+    magic = fileobj.read(2)
+    fileobj.seek(0)
+    if magic == _GZIP_MAGIC:
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    return io.TextIOWrapper(fileobj, encoding="utf-8")
+
+
+class _JsonTokenReader:
+    """
+    Lê um documento JSON aos pedaços. Só o valor sendo decodificado no momento
+    fica no buffer; os elementos das listas são entregues um a um.
+    """
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int = _READ_CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Esperado '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Valor incompleto: lê mais um pedaço e tenta de novo
+                if not self._fill():
+                    raise
+                continue
+            # Um número no fim do buffer pode continuar no próximo pedaço
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_json_records(stream: io.TextIOBase) -> Iterator[Tuple[str, dict]]:
+    """Percorre um documento no formato de schemas.UserBackup gerando (seção, registro)."""
+    reader = _JsonTokenReader(stream)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key in SECTION_SCHEMAS:
+            if reader.peek() != "[":
+                raise ValueError(f"A seção '{key}' deve ser uma lista.")
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.peek() == ",":
+                        reader.pos += 1
+                        continue
+                    reader.expect("]")
+                    break
+        else:
+            reader.value()  # Chaves desconhecidas são ignoradas
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        break
+
+
+def iter_ndjson_records(stream: io.TextIOBase) -> Iterator[Tuple[str, dict]]:
+    """Lê o formato gerado por backup_export.iter_ndjson, uma linha por vez."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"A linha {line_number} não é um objeto JSON.")
+        section = record.get("section")
+        if section == "header":
+            header = record.get("data")
+            version = header.get("version") if isinstance(header, dict) else None
+            if version != BACKUP_FORMAT_VERSION:
+                raise ValueError(f"Versão de backup não suportada: {version}")
+            continue
+        if section in SECTION_SCHEMAS:
+            # `data` vai como veio: se não for um objeto, a validação o pula e reporta
+            yield section, record.get("data")
+
+
+# --- IMPORTAÇÃO EM LOTE ---
+SECTION_SCHEMAS = {
+    "characters": schemas.CharacterCreate,
+    "items": schemas.ItemCreate,
+    "monsters": schemas.MonsterCreate,
+    "npcs": schemas.NPCCreate,
+    "stories": schemas.StoryCreate,
+}
+
+SECTION_MODELS = {
+    "characters": (models.Character, "owner_id"),
+    "items": (models.Item, "creator_id"),
+    "monsters": (models.Monster, "creator_id"),
+    "npcs": (models.NPC, "creator_id"),
+    "stories": (models.Story, "creator_id"),
+}
+
+# Relações das histórias: (campo de ids, lista aninhada do export, modelo, tabela de associação, coluna)
+STORY_LINKS = (
+    ("item_ids", "items", models.Item, models.story_item_association, "item_id"),
+    ("monster_ids", "monsters", models.Monster, models.story_monster_association, "monster_id"),
+    ("npc_ids", "npcs", models.NPC, models.story_npc_association, "npc_id"),
+)
+
+
+class BackupImporter:
+    """
+    Valida e insere registros de backup em lotes, com INSERTs em massa dentro
+    de uma única transação. Quem chama decide entre commit() e rollback().
+
+    Os ids do arquivo são trocados por novos; o mapeamento antigo -> novo dos
+    itens, monstros e NPCs é mantido para religar as histórias.
+    """
+
+    def __init__(self, db: Session, user_id: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self._pending: Dict[str, List[dict]] = {section: [] for section in SECTION_SCHEMAS}
+        self._id_map: Dict[str, Dict[str, str]] = {"items": {}, "monsters": {}, "npcs": {}}
+        self.report = {
+            section: {"received": 0, "imported": 0, "skipped": 0, "errors": []}
+            for section in SECTION_SCHEMAS
+        }
+        self.report["stories"]["unresolved_links"] = 0
+
+    def add(self, section: str, record: dict):
+        self.report[section]["received"] += 1
+        pending = self._pending[section]
+        pending.append(record)
+        if len(pending) >= self.batch_size:
+            self._flush(section)
+
+    def import_records(self, records: Iterator[Tuple[str, dict]]) -> dict:
+        for section, record in records:
+            self.add(section, record)
+        for section in SECTION_SCHEMAS:
+            self._flush(section)
+        versions.bump(self.db, *[
+            versions.scope(section, self.user_id) for section in SECTION_SCHEMAS if self.report[section]["imported"]
+        ])
+        return self.report
+
+    @property
+    def imported_count(self) -> int:
+        return sum(section["imported"] for section in self.report.values())
+
+    @property
+    def skipped_count(self) -> int:
+        return sum(section["skipped"] for section in self.report.values())
+
+    def _flush(self, section: str):
+        records, self._pending[section] = self._pending[section], []
+        if not records:
+            return
+        if section == "stories":
+            # Garante que o conteúdo referenciado já foi inserido e mapeado
+            for linked_section in self._id_map:
+                self._flush(linked_section)
+        model, owner_column = SECTION_MODELS[section]
+        schema = SECTION_SCHEMAS[section]
+        section_report = self.report[section]
+        rows = []
+        story_links = []
+        for record in records:
+            try:
+                validated = schema.model_validate(record)
+            except ValidationError as e:
+                # Registros que nem são objetos (e.g. `"items": [1]`) caem aqui, sem id
+                section_report["skipped"] += 1
+                if len(section_report["errors"]) < MAX_ERRORS_PER_SECTION:
+                    old_id = record.get("id") if isinstance(record, dict) else None
+                    section_report["errors"].append({"id": old_id, "error": e.errors(include_url=False, include_context=False)})
+                continue
+            new_id = str(uuid.uuid4())
+            if section == "stories":
+                row = validated.model_dump(exclude={"item_ids", "monster_ids", "npc_ids"})
+                story_links.append((new_id, record, validated))
+            else:
+                row = validated.model_dump()
+                if section == "monsters":
+                    row.update(statblock.derived_columns(validated.hit_points, validated.challenge_rating))
+                old_id = record.get("id")
+                if section in self._id_map and old_id:
+                    self._id_map[section][old_id] = new_id
+            row["id"] = new_id
+            row[owner_column] = self.user_id
+            rows.append(row)
+
+        if rows:
+            self.db.execute(insert(model), rows)
+        if story_links:
+            self._link_stories(story_links)
+        section_report["imported"] += len(rows)
+
+    def _link_stories(self, story_links: list):
+        for ids_field, nested_field, model, association, column in STORY_LINKS:
+            id_map = self._id_map[nested_field]
+            wanted = []
+            for story_id, record, validated in story_links:
+                old_ids = list(getattr(validated, ids_field))
+                old_ids += [entry.get("id") for entry in record.get(nested_field) or [] if isinstance(entry, dict)]
+                for old_id in dict.fromkeys(filter(None, old_ids)):
+                    wanted.append((story_id, old_id))
+
+            # Ids que não vieram no arquivo podem ser conteúdo que o usuário já tem
+            unknown = {old_id for _, old_id in wanted if old_id not in id_map}
+            existing = set()
+            if unknown:
+                existing = set(self.db.execute(
+                    select(model.id).where(model.id.in_(unknown), model.creator_id == self.user_id)
+                ).scalars())
+
+            links = []
+            for story_id, old_id in wanted:
+                target = id_map.get(old_id) or (old_id if old_id in existing else None)
+                if target is None:
+                    self.report["stories"]["unresolved_links"] += 1
+                    continue
+                links.append({"story_id": story_id, column: target})
+            if links:
+                self.db.execute(insert(association), links)
@@ -0,0 +1,178 @@
+"""
+Pacotes de campanha: a história com itens, monstros e NPCs vinculados,
+serializada uma vez, comprimida com gzip e gravada em campaign_packs.
+
+- Variantes: "full" (schemas.Story, para o criador e o mestre) e "player"
+  (schemas.PlayerStory, sem NPC.notes). As duas saem do mesmo carregamento.
+- Frescor: cada pacote guarda a versão do escopo campaign_pack:<story_id> com
+  que foi montado. Quem altera a história ou algo vinculado a ela chama
+  invalidate() na mesma transação; a próxima leitura vê a versão diferente e
+  remonta o pacote daquela história, só dela.
+- Leitura: pacote e versão vêm numa única consulta. Com o pacote em dia, o
+  corpo vai para a resposta como está, sem ORM nem serialização; o ETag é o
+  hash do conteúdo.
+"""
+import gzip
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models, schemas, versions
+from .loading import STORY_DETAIL
+from .metrics import serialization
+from .response_cache import CACHE_HEADERS, etag_matches
+
+VARIANTS = {"full": schemas.Story, "player": schemas.PlayerStory}
+SCOPE_KIND = "campaign_pack"
+COMPRESS_LEVEL = 6
+
+
+def pack_scope(story_id: str) -> str:
+    return versions.scope(SCOPE_KIND, story_id)
+
+
+@dataclass(frozen=True)
+class Pack:
+    body: bytes  # gzip
+    content_hash: str
+    size: int
+
+
+class PackStats:
+    def __init__(self):
+        self.hits = 0
+        self.builds = 0
+        self.stale = 0
+
+    def snapshot(self) -> dict:
+        return {"hits": self.hits, "builds": self.builds, "stale": self.stale}
+
+
+stats = PackStats()
+
+
+# --- INVALIDAÇÃO ---
+def invalidate(db: Session, story_ids: Iterable[str] = (), item_ids: Iterable[str] = (),
+               monster_ids: Iterable[str] = (), npc_ids: Iterable[str] = ()):
+    """
+    Marca como desatualizados os pacotes das histórias dadas e das que
+    vinculam os itens, monstros ou NPCs dados. Como versions.bump, roda na
+    transação de quem chama, que faz o commit junto com a escrita.
+    """
+    stories = set(story_ids)
+    links = (
+        (models.story_item_association.c.item_id, item_ids),
+        (models.story_monster_association.c.monster_id, monster_ids),
+        (models.story_npc_association.c.npc_id, npc_ids),
+    )
+    for column, ids in links:
+        ids = list(ids)
+        if ids:
+            story_column = column.table.c.story_id
+            stories.update(db.execute(select(story_column).where(column.in_(ids)).distinct()).scalars())
+    versions.bump(db, *[pack_scope(story_id) for story_id in stories])
+
+
+# --- LEITURA ---
+async def get_pack(db: AsyncSession, story_id: str, variant: str) -> Optional[Pack]:
+    """Pacote em dia da história (remontado se preciso); None se ela não existe."""
+    table = models.CampaignPack.__table__
+    version = models.ContentVersion.__table__
+    row = (await db.execute(
+        select(table.c.body, table.c.content_hash, table.c.size, table.c.source_version,
+               func.coalesce(version.c.version, 0).label("current_version"))
+        .outerjoin(version, version.c.scope == literal(f"{SCOPE_KIND}:") + table.c.story_id)
+        .where(table.c.story_id == story_id, table.c.variant == variant)
+    )).first()
+    if row is not None:
+        if row.source_version == row.current_version:
+            stats.hits += 1
+            return Pack(row.body, row.content_hash, row.size)
+        stats.stale += 1
+    packs = await _build(db, story_id)
+    return packs[variant] if packs else None
+
+
+async def _build(db: AsyncSession, story_id: str) -> Optional[Dict[str, Pack]]:
+    # A versão é lida antes do conteúdo: se mudar no meio, o pacote fica com a
+    # versão velha e a próxima leitura o remonta
+    scope = pack_scope(story_id)
+    source_version = (await versions.current_async(db, [scope]))[scope]
+    story = (await db.execute(
+        select(models.Story).options(*STORY_DETAIL).where(models.Story.id == story_id)
+    )).scalar_one_or_none()
+    if story is None:
+        return None
+    packs = {}
+    with serialization():
+        for name, model in VARIANTS.items():
+            raw = model.model_validate(story, from_attributes=True).model_dump_json().encode()
+            packs[name] = Pack(
+                body=gzip.compress(raw, compresslevel=COMPRESS_LEVEL, mtime=0),
+                content_hash=hashlib.blake2b(raw, digest_size=16).hexdigest(),
+                size=len(raw),
+            )
+    await _store(db, story_id, source_version, packs)
+    stats.builds += 1
+    return packs
+
+
+async def _store(db: AsyncSession, story_id: str, source_version: int, packs: Dict[str, Pack]):
+    table = models.CampaignPack.__table__
+    built_at = datetime.utcnow()
+    rows = [
+        {"story_id": story_id, "variant": name, "source_version": source_version,
+         "content_hash": pack.content_hash, "size": pack.size, "body": pack.body, "built_at": built_at}
+        for name, pack in packs.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    try:
+        if dialect in ("sqlite", "postgresql"):
+            factory = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = factory(table).values(rows)
+            columns = ("source_version", "content_hash", "size", "body", "built_at")
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.story_id, table.c.variant],
+                set_={name: stmt.excluded[name] for name in columns},
+                # Um build concorrente mais novo não é sobrescrito por um mais velho
+                where=table.c.source_version <= stmt.excluded.source_version,
+            ))
+        else:
+            await db.execute(delete(table).where(table.c.story_id == story_id))
+            await db.execute(insert(table), rows)
+        await db.commit()
+    except IntegrityError:
+        # Outra requisição gravou o mesmo pacote primeiro; o que já temos serve
+        await db.rollback()
+
+
+# --- RESPOSTA ---
+def _accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().removeprefix("q=")
+            try:
+                return float(quality) > 0 if params.strip() else True
+            except ValueError:
+                return True
+    return False
+
+
+def pack_response(request: Request, pack: Pack) -> Response:
+    """Corpo gravado, em gzip se o cliente aceita; 304 se o ETag confere."""
+    headers = {"ETag": f'W/"{pack.content_hash}"', **CACHE_HEADERS, "Vary": "Authorization, Accept-Encoding"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if _accepts_gzip(request):
+        return Response(content=pack.body, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=gzip.decompress(pack.body), media_type="application/json", headers=headers)
@@ -0,0 +1,201 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from starlette.requests import HTTPConnection
+
+
+# --- Helpers para leitura das variáveis de ambiente ---
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Configurações da aplicação, lidas das variáveis de ambiente."""
+
+    # Banco de dados (ver database.py)
+    database_url: str = "sqlite:///./dungeon_keeper.db"
+    db_echo: bool = False
+    # SQLite: PRAGMAs aplicados em cada nova conexão
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    # Demais bancos (PostgreSQL): QueuePool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    # Conexões abertas (por engine) ao iniciar, para a primeira requisição não pagar por elas
+    db_warmup_connections: int = 1
+
+    # Aplica as migrações do Alembic na inicialização (ver migrations.py)
+    auto_migrate: bool = True
+
+    # Chaves de assinatura dos tokens JWT (ver signing_keys.py). Sem nenhuma,
+    # cada processo gera a sua: tokens não valem em outro worker nem após reiniciar
+    jwt_keys_file: str = ""    # JSON {"active": kid, "keys": {kid: segredo}}
+    jwt_secret_keys: str = ""  # "kid:segredo,kid:segredo"; a primeira assina
+    secret_key: str = ""       # Uma chave só (kid "default")
+
+    # Cache de usuários autenticados (ver principal_cache.py). É por worker: com
+    # vários, é também o atraso máximo de uma desativação (ver serve.py)
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 4096
+
+    # Hash de senhas (ver hashing.py)
+    bcrypt_rounds: int = 12
+    hash_executor: str = "process"  # "process" ou "thread"
+    hash_workers: int = min(4, os.cpu_count() or 1)
+    hash_max_pending: int = 32
+
+    # Simulador de combate (ver simulation.py); 0 ou 1 worker = sem pool de processos
+    simulation_workers: int = 0
+    simulation_pool_threshold: int = 50_000
+    simulation_max_fights: int = 200_000
+
+    # Cache de respostas serializadas (ver response_cache.py); 0 desliga o LRU, os ETags continuam
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_max_entry_bytes: int = 1024 * 1024
+
+    # Eventos em tempo real das mesas (ver events.py); "relay" compartilha entre workers
+    events_backend: str = "memory"  # "memory" ou "relay"
+    events_relay_url: str = "tcp://127.0.0.1:7071"
+    events_queue_size: int = 100
+
+    # Notificações por e-mail (ver notifications.py); sem SMTP_HOST nada é enfileirado
+    smtp_host: str = ""
+    smtp_port: int = 25
+    smtp_username: str = ""
+    smtp_password: str = ""
+    smtp_starttls: bool = False
+    smtp_timeout_seconds: int = 10
+    mail_from: str = "Dungeon Keeper <noreply@dungeonkeeper.local>"
+    notification_digest_seconds: int = 60  # Janela de agrupamento antes do envio
+    notification_poll_seconds: int = 5
+    notification_batch_size: int = 200
+    notification_max_attempts: int = 6
+    notification_retry_base_seconds: int = 30
+    notification_lease_seconds: int = 300
+
+    # Avatares (ver avatars.py)
+    avatar_dir: str = "static/avatars"
+    avatar_executor: str = "process"  # "process" ou "thread"
+    avatar_workers: int = min(2, os.cpu_count() or 1)
+    avatar_max_pending: int = 16
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_max_pixels: int = 25_000_000
+
+    # Servidor com vários workers (ver serve.py)
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    web_workers: int = os.cpu_count() or 1
+    web_graceful_timeout_seconds: int = 30
+
+    # Métricas por rota em /metrics (ver metrics.py); 0 em slow_query_ms desliga o log
+    metrics_enabled: bool = True
+    slow_query_ms: int = 250
+    server_timing: bool = False  # Cabeçalho Server-Timing (db, serialize, app) em cada resposta
+
+    # Limites por cliente (ver rate_limit.py): "N/segundos", vazio desliga a política
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" ou "database" (compartilhado entre workers)
+    rate_limit_login: str = "10/60"  # Por IP e por nome de usuário
+    rate_limit_register: str = "5/300"  # Por IP
+    rate_limit_backup_import: str = "10/3600"  # Por IP e por usuário
+    rate_limit_max_keys: int = 100_000  # Backend memory: chaves mantidas (LRU)
+    # Rotas pesadas (importação, simulação, lotes): em execução por worker e fila de espera
+    heavy_max_concurrency: int = max(2, os.cpu_count() or 1)  # 0 desliga
+    heavy_max_queue: int = 16
+    heavy_queue_timeout_seconds: int = 10
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.getenv("DATABASE_URL") or cls.database_url,
+            db_echo=_env_bool("DB_ECHO", cls.db_echo),
+            sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", cls.sqlite_journal_mode),
+            sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", cls.sqlite_synchronous),
+            sqlite_busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", cls.sqlite_mmap_size),
+            sqlite_cache_size_kib=_env_int("SQLITE_CACHE_SIZE_KIB", cls.sqlite_cache_size_kib),
+            db_pool_size=_env_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_pool_timeout=_env_int("DB_POOL_TIMEOUT", cls.db_pool_timeout),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", cls.db_pool_recycle),
+            db_warmup_connections=_env_int("DB_WARMUP_CONNECTIONS", cls.db_warmup_connections),
+            auto_migrate=_env_bool("AUTO_MIGRATE", cls.auto_migrate),
+            jwt_keys_file=os.getenv("JWT_KEYS_FILE", cls.jwt_keys_file),
+            jwt_secret_keys=os.getenv("JWT_SECRET_KEYS", cls.jwt_secret_keys),
+            secret_key=os.getenv("SECRET_KEY", cls.secret_key),
+            auth_cache_ttl_seconds=_env_int("AUTH_CACHE_TTL_SECONDS", cls.auth_cache_ttl_seconds),
+            auth_cache_max_entries=_env_int("AUTH_CACHE_MAX_ENTRIES", cls.auth_cache_max_entries),
+            bcrypt_rounds=_env_int("BCRYPT_ROUNDS", cls.bcrypt_rounds),
+            hash_executor=os.getenv("HASH_EXECUTOR", cls.hash_executor),
+            hash_workers=_env_int("HASH_WORKERS", cls.hash_workers),
+            hash_max_pending=_env_int("HASH_MAX_PENDING", cls.hash_max_pending),
+            simulation_workers=_env_int("SIMULATION_WORKERS", cls.simulation_workers),
+            simulation_pool_threshold=_env_int("SIMULATION_POOL_THRESHOLD", cls.simulation_pool_threshold),
+            simulation_max_fights=_env_int("SIMULATION_MAX_FIGHTS", cls.simulation_max_fights),
+            response_cache_max_bytes=_env_int("RESPONSE_CACHE_MAX_BYTES", cls.response_cache_max_bytes),
+            response_cache_max_entry_bytes=_env_int("RESPONSE_CACHE_MAX_ENTRY_BYTES", cls.response_cache_max_entry_bytes),
+            events_backend=os.getenv("EVENTS_BACKEND", cls.events_backend),
+            events_relay_url=os.getenv("EVENTS_RELAY_URL", cls.events_relay_url),
+            events_queue_size=_env_int("EVENTS_QUEUE_SIZE", cls.events_queue_size),
+            smtp_host=os.getenv("SMTP_HOST", cls.smtp_host),
+            smtp_port=_env_int("SMTP_PORT", cls.smtp_port),
+            smtp_username=os.getenv("SMTP_USERNAME", cls.smtp_username),
+            smtp_password=os.getenv("SMTP_PASSWORD", cls.smtp_password),
+            smtp_starttls=_env_bool("SMTP_STARTTLS", cls.smtp_starttls),
+            smtp_timeout_seconds=_env_int("SMTP_TIMEOUT_SECONDS", cls.smtp_timeout_seconds),
+            mail_from=os.getenv("MAIL_FROM", cls.mail_from),
+            notification_digest_seconds=_env_int("NOTIFICATION_DIGEST_SECONDS", cls.notification_digest_seconds),
+            notification_poll_seconds=_env_int("NOTIFICATION_POLL_SECONDS", cls.notification_poll_seconds),
+            notification_batch_size=_env_int("NOTIFICATION_BATCH_SIZE", cls.notification_batch_size),
+            notification_max_attempts=_env_int("NOTIFICATION_MAX_ATTEMPTS", cls.notification_max_attempts),
+            notification_retry_base_seconds=_env_int("NOTIFICATION_RETRY_BASE_SECONDS", cls.notification_retry_base_seconds),
+            notification_lease_seconds=_env_int("NOTIFICATION_LEASE_SECONDS", cls.notification_lease_seconds),
+            avatar_dir=os.getenv("AVATAR_DIR", cls.avatar_dir),
+            avatar_executor=os.getenv("AVATAR_EXECUTOR", cls.avatar_executor),
+            avatar_workers=_env_int("AVATAR_WORKERS", cls.avatar_workers),
+            avatar_max_pending=_env_int("AVATAR_MAX_PENDING", cls.avatar_max_pending),
+            avatar_max_bytes=_env_int("AVATAR_MAX_BYTES", cls.avatar_max_bytes),
+            avatar_max_pixels=_env_int("AVATAR_MAX_PIXELS", cls.avatar_max_pixels),
+            web_host=os.getenv("WEB_HOST", cls.web_host),
+            web_port=_env_int("WEB_PORT", cls.web_port),
+            web_workers=_env_int("WEB_WORKERS", cls.web_workers),
+            web_graceful_timeout_seconds=_env_int("WEB_GRACEFUL_TIMEOUT_SECONDS", cls.web_graceful_timeout_seconds),
+            metrics_enabled=_env_bool("METRICS_ENABLED", cls.metrics_enabled),
+            slow_query_ms=_env_int("SLOW_QUERY_MS", cls.slow_query_ms),
+            server_timing=_env_bool("SERVER_TIMING", cls.server_timing),
+            rate_limit_enabled=_env_bool("RATE_LIMIT_ENABLED", cls.rate_limit_enabled),
+            rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", cls.rate_limit_backend),
+            rate_limit_login=os.getenv("RATE_LIMIT_LOGIN", cls.rate_limit_login),
+            rate_limit_register=os.getenv("RATE_LIMIT_REGISTER", cls.rate_limit_register),
+            rate_limit_backup_import=os.getenv("RATE_LIMIT_BACKUP_IMPORT", cls.rate_limit_backup_import),
+            rate_limit_max_keys=_env_int("RATE_LIMIT_MAX_KEYS", cls.rate_limit_max_keys),
+            heavy_max_concurrency=_env_int("HEAVY_MAX_CONCURRENCY", cls.heavy_max_concurrency),
+            heavy_max_queue=_env_int("HEAVY_MAX_QUEUE", cls.heavy_max_queue),
+            heavy_queue_timeout_seconds=_env_int("HEAVY_QUEUE_TIMEOUT_SECONDS", cls.heavy_queue_timeout_seconds),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Settings do processo (variáveis de ambiente): CLIs, scripts e a aplicação padrão."""
+    return Settings.from_env()
+
+
+def app_settings(connection: HTTPConnection) -> Settings:
+    """Dependência: as settings com que create_app() montou a aplicação."""
+    return connection.app.state.settings
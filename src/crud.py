@@ -1,15 +1,32 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
-from .auth import get_password_hash
-from typing import Optional
+from pydantic import ValidationError
+from sqlalchemy import exists, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from . import models, schemas, statblock
+from .fieldsets import SUMMARIES, summary_columns
+from .loading import STORY_DETAIL, TABLE_DETAIL, USER_PROFILE
+from .pagination import DEFAULT_PAGE_SIZE, paginate
+from .config import Settings
+from .hashing import pwd_context
+from .principal_cache import PrincipalCache
+from . import events, notifications, versions
+from typing import Iterator, List, Optional
 import uuid
 
 # --- FUNÇÕES CRUD PARA USUÁRIOS ---
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def get_user_profile(db: Session, user_id: str, options: tuple = USER_PROFILE):
+    """Usuário com as relações de schemas.User já carregadas (todas, por padrão)."""
+    return db.query(models.User).options(*options).filter(models.User.id == user_id).first()
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    # Quem já calculou o hash fora da thread (auth.hash_password_async) o repassa aqui
+    if hashed_password is None:
+        hashed_password = pwd_context.hash(user.password)
     db_user = models.User(
         id=str(uuid.uuid4()),
         username=user.username,
@@ -21,9 +38,47 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+def update_user_password_hash(db: Session, db_user: models.User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
+
 # --- FUNÇÕES CRUD PARA MESAS ---
 def get_tables(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Table).offset(skip).limit(limit).all()
+    return db.query(models.Table).options(*TABLE_DETAIL).offset(skip).limit(limit).all()
+
+def get_tables_page(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.Table).options(*TABLE_DETAIL)
+    return paginate(query, models.Table, cursor=cursor, limit=limit, skip=skip)
+
+def get_table(db: Session, table_id: str):
+    return db.query(models.Table).filter(models.Table.id == table_id).first()
+
+def get_table_party(db: Session, table_id: str, character_ids: Optional[List[str]] = None):
+    """
+    Personagens de uma mesa: os indicados (desde que pertençam a jogadores da
+    mesa) ou, sem indicação, o personagem mais recente de cada jogador.
+    """
+    players = select(models.table_players_association.c.user_id).where(
+        models.table_players_association.c.table_id == table_id
+    )
+    query = db.query(models.Character).filter(models.Character.owner_id.in_(players))
+    if character_ids:
+        return query.filter(models.Character.id.in_(character_ids)).all()
+    latest = {}
+    for character in query.order_by(models.Character.created_at, models.Character.id):
+        latest[character.owner_id] = character
+    return list(latest.values())
+
+def get_user_monsters_by_ids(db: Session, user_id: str, monster_ids: List[str]):
+    """Monstros do usuário na ordem pedida, repetindo os ids que aparecem mais de uma vez."""
+    found = {
+        monster.id: monster
+        for monster in db.query(models.Monster).filter(
+            models.Monster.creator_id == user_id, models.Monster.id.in_(set(monster_ids))
+        )
+    }
+    return [found[monster_id] for monster_id in monster_ids if monster_id in found]
 
 def create_table(db: Session, table: schemas.TableCreate, master_id: str):
     db_table = models.Table(
@@ -34,6 +89,7 @@ def create_table(db: Session, table: schemas.TableCreate, master_id: str):
         story_id=table.story_id
     )
     db.add(db_table)
+    versions.bump(db, versions.TABLES)
     db.commit()
     db.refresh(db_table)
     return db_table
@@ -45,9 +101,14 @@ def get_characters_by_owner(db: Session, owner_id: str):
 def get_user_characters(db: Session, user_id: str):
     return db.query(models.Character).filter(models.Character.owner_id == user_id).all()
 
+def get_characters_page(db: Session, owner_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.Character).filter(models.Character.owner_id == owner_id)
+    return paginate(query, models.Character, cursor=cursor, limit=limit, skip=skip)
+
 def create_character_for_user(db: Session, character: schemas.CharacterCreate, user_id: str):
     db_character = models.Character(**character.model_dump(), owner_id=user_id, id=str(uuid.uuid4()))
     db.add(db_character)
+    versions.bump(db, versions.scope("characters", user_id))
     db.commit()
     db.refresh(db_character)
     return db_character
@@ -56,9 +117,14 @@ def create_character_for_user(db: Session, character: schemas.CharacterCreate, u
 def get_user_items(db: Session, user_id: str, skip: int = 0, limit: int = 100):
     return db.query(models.Item).filter(models.Item.creator_id == user_id).offset(skip).limit(limit).all()
 
+def get_user_items_page(db: Session, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.Item).filter(models.Item.creator_id == user_id)
+    return paginate(query, models.Item, cursor=cursor, limit=limit, skip=skip)
+
 def create_user_item(db: Session, item: schemas.ItemCreate, user_id: str):
     db_item = models.Item(**item.model_dump(), creator_id=user_id, id=str(uuid.uuid4()))
     db.add(db_item)
+    versions.bump(db, versions.scope("items", user_id))
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -67,9 +133,39 @@ def create_user_item(db: Session, item: schemas.ItemCreate, user_id: str):
 def get_user_monsters(db: Session, user_id: str, skip: int = 0, limit: int = 100):
     return db.query(models.Monster).filter(models.Monster.creator_id == user_id).offset(skip).limit(limit).all()
 
+def get_user_monsters_page(db: Session, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.Monster).filter(models.Monster.creator_id == user_id)
+    return paginate(query, models.Monster, cursor=cursor, limit=limit, skip=skip)
+
+def query_user_monsters_page(db: Session, user_id: str, cr_min: Optional[float] = None, cr_max: Optional[float] = None,
+                             monster_type: Optional[str] = None, size: Optional[str] = None,
+                             ac_min: Optional[int] = None, ac_max: Optional[int] = None,
+                             cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    """Filtra pelas colunas numéricas derivadas; a faixa de CR usa ix_monsters_creator_id_cr_value."""
+    query = db.query(models.Monster).filter(models.Monster.creator_id == user_id)
+    if cr_min is not None:
+        query = query.filter(models.Monster.cr_value >= cr_min)
+    if cr_max is not None:
+        query = query.filter(models.Monster.cr_value <= cr_max)
+    if monster_type:
+        query = query.filter(models.Monster.type == monster_type)
+    if size:
+        query = query.filter(models.Monster.size == size)
+    if ac_min is not None:
+        query = query.filter(models.Monster.armor_class >= ac_min)
+    if ac_max is not None:
+        query = query.filter(models.Monster.armor_class <= ac_max)
+    return paginate(query, models.Monster, cursor=cursor, limit=limit, skip=skip)
+
 def create_user_monster(db: Session, monster: schemas.MonsterCreate, user_id: str):
-    db_monster = models.Monster(**monster.model_dump(), creator_id=user_id, id=str(uuid.uuid4()))
+    db_monster = models.Monster(
+        **monster.model_dump(),
+        **statblock.derived_columns(monster.hit_points, monster.challenge_rating),
+        creator_id=user_id,
+        id=str(uuid.uuid4())
+    )
     db.add(db_monster)
+    versions.bump(db, versions.scope("monsters", user_id))
     db.commit()
     db.refresh(db_monster)
     return db_monster
@@ -78,18 +174,68 @@ def create_user_monster(db: Session, monster: schemas.MonsterCreate, user_id: st
 def get_user_npcs(db: Session, user_id: str, skip: int = 0, limit: int = 100):
     return db.query(models.NPC).filter(models.NPC.creator_id == user_id).offset(skip).limit(limit).all()
 
+def get_user_npcs_page(db: Session, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.NPC).filter(models.NPC.creator_id == user_id)
+    return paginate(query, models.NPC, cursor=cursor, limit=limit, skip=skip)
+
 def create_user_npc(db: Session, npc: schemas.NPCCreate, user_id: str):
     db_npc = models.NPC(**npc.model_dump(), creator_id=user_id, id=str(uuid.uuid4()))
     db.add(db_npc)
+    versions.bump(db, versions.scope("npcs", user_id))
     db.commit()
     db.refresh(db_npc)
     return db_npc
 
+# --- CRIAÇÃO EM LOTE (personagens, itens, monstros e NPCs) ---
+BATCH_CONTENT = {
+    "characters": (models.Character, schemas.CharacterCreate, "owner_id"),
+    "items": (models.Item, schemas.ItemCreate, "creator_id"),
+    "monsters": (models.Monster, schemas.MonsterCreate, "creator_id"),
+    "npcs": (models.NPC, schemas.NPCCreate, "creator_id"),
+}
+
+def create_user_content_batch(db: Session, section: str, records: list, user_id: str, strict: bool = False):
+    """
+    Valida cada registro e insere os válidos com um único INSERT em massa,
+    numa só transação. Os inválidos voltam em `errors` com a posição na
+    lista; com strict, basta um inválido para nada ser gravado.
+    """
+    model, schema, owner_column = BATCH_CONTENT[section]
+    rows, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            validated = schema.model_validate(record)
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors(include_url=False, include_context=False, include_input=False)})
+            continue
+        row = validated.model_dump()
+        if section == "monsters":
+            row.update(statblock.derived_columns(validated.hit_points, validated.challenge_rating))
+        row["id"] = str(uuid.uuid4())
+        row[owner_column] = user_id
+        rows.append(row)
+
+    if not rows or (strict and errors):
+        return {"created": [], "errors": errors}
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        created = list(db.execute(stmt, rows).scalars())
+    else:
+        db.execute(insert(model), rows)
+        created = [row["id"] for row in rows]
+    versions.bump(db, versions.scope(section, user_id))
+    db.commit()
+    return {"created": created, "errors": errors}
+
 # --- FUNÇÕES CRUD PARA HISTÓRIAS ---
 def get_user_stories(db: Session, user_id: str):
-    return db.query(models.Story).filter(models.Story.creator_id == user_id).all()
+    return db.query(models.Story).options(*STORY_DETAIL).filter(models.Story.creator_id == user_id).all()
+
+def get_user_stories_page(db: Session, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.Story).options(*STORY_DETAIL).filter(models.Story.creator_id == user_id)
+    return paginate(query, models.Story, cursor=cursor, limit=limit, skip=skip)
 
-def create_user_story(db: Session, story_data: schemas.StoryCreate, user_id: str):
+def create_user_story(db: Session, story_data: schemas.StoryCreate, user_id: str, settings: Optional[Settings] = None):
     db_story = models.Story(
         id=str(uuid.uuid4()),
         title=story_data.title,
@@ -103,27 +249,44 @@ def create_user_story(db: Session, story_data: schemas.StoryCreate, user_id: str
     db_story.npcs = db.query(models.NPC).filter(models.NPC.id.in_(story_data.npc_ids)).all()
     
     db.add(db_story)
+    versions.bump(db, versions.scope("stories", user_id))
+    notifications.story_created(settings, db, db_story)
     db.commit()
     db.refresh(db_story)
     return db_story
 
 # --- FUNÇÕES CRUD PARA SOLICITAÇÕES DE ENTRADA EM MESAS ---
-def create_join_request(db: Session, table_id: str, user_id: str):
-    # Verifica se já não existe um pedido pendente ou se o usuário já está na mesa
-    existing_request = db.query(models.JoinRequest).filter(
-        models.JoinRequest.table_id == table_id,
-        models.JoinRequest.user_id == user_id,
-        models.JoinRequest.status == "pending"
-    ).first()
-    
-    if existing_request:
-        return None  # Já existe uma solicitação pendente
-    
+# `settings` (e-mails da outbox) e `broker` (eventos em tempo real) são os da
+# aplicação; sem eles, como em scripts, nada é enfileirado nem publicado.
+def is_table_player(db: Session, table_id: str, user_id: str) -> bool:
+    # EXISTS direto na chave primária da associação, sem carregar table.players
+    players = models.table_players_association
+    return db.query(exists().where(players.c.table_id == table_id, players.c.user_id == user_id)).scalar()
+
+def _add_players(db: Session, rows: list):
+    """Insere jogadores na mesa ignorando quem já está lá (a PK garante a unicidade)."""
+    if not rows:
+        return
+    players = models.table_players_association
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(sqlite_insert(players).on_conflict_do_nothing(), rows)
+    elif dialect == "postgresql":
+        db.execute(postgresql_insert(players).on_conflict_do_nothing(), rows)
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(players), row)
+            except IntegrityError:
+                pass
+
+def create_join_request(db: Session, table_id: str, user_id: str, settings: Optional[Settings] = None,
+                        broker: Optional[events.EventBroker] = None):
     # Verifica se o usuário já é jogador da mesa
-    table = db.query(models.Table).filter(models.Table.id == table_id).first()
-    if table and any(player.id == user_id for player in table.players):
-        return None  # Usuário já é jogador da mesa
-    
+    if is_table_player(db, table_id, user_id):
+        return None
+
     db_request = models.JoinRequest(
         id=str(uuid.uuid4()),
         table_id=table_id,
@@ -131,42 +294,197 @@ def create_join_request(db: Session, table_id: str, user_id: str):
         status="pending"
     )
     db.add(db_request)
-    db.commit()
+    versions.bump(db, versions.TABLES)
+    # Outbox na mesma transação: o e-mail sai depois, pelo dispatcher
+    notifications.join_request_created(settings, db, table_id, user_id)
+    try:
+        db.commit()
+    except IntegrityError:
+        # uq_join_requests_pending: já existe uma solicitação pendente. O índice
+        # único resolve também duas requisições simultâneas do mesmo usuário.
+        db.rollback()
+        return None
     db.refresh(db_request)
+    events.publish_table_event(
+        broker, table_id, "join_request.created",
+        request_id=db_request.id, user_id=user_id, username=db_request.user.username,
+    )
     return db_request
 
-def manage_join_request(db: Session, request_id: str, new_status: str):
-    db_request = db.query(models.JoinRequest).filter(models.JoinRequest.id == request_id).first()
+def manage_join_request(db: Session, request_id: str, new_status: str, master_id: Optional[str] = None,
+                        settings: Optional[Settings] = None, broker: Optional[events.EventBroker] = None):
+    """
+    Aprova ou recusa uma solicitação pendente. Com `master_id`, só altera
+    solicitações de mesas desse mestre. Retorna None se nada foi alterado.
+    """
+    db_request = db.query(models.JoinRequest).options(joinedload(models.JoinRequest.user)).filter(
+        models.JoinRequest.id == request_id
+    ).first()
     if not db_request:
         return None
-    
-    db_request.status = new_status
-    
+
+    # UPDATE condicionado ao status: duas decisões simultâneas não passam ambas
+    conditions = [models.JoinRequest.id == request_id, models.JoinRequest.status == "pending"]
+    if master_id is not None:
+        conditions.append(models.JoinRequest.table_id.in_(
+            select(models.Table.id).where(models.Table.master_id == master_id)
+        ))
+    result = db.execute(
+        update(models.JoinRequest).where(*conditions).values(status=new_status),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        return None
+
     if new_status == "approved":
         # Se aprovado, adiciona o usuário à lista de jogadores da mesa
-        table = db.query(models.Table).filter(models.Table.id == db_request.table_id).first()
-        user = db.query(models.User).filter(models.User.id == db_request.user_id).first()
-        if table and user:
-            table.players.append(user)
-    
+        _add_players(db, [{"table_id": db_request.table_id, "user_id": db_request.user_id}])
+        notifications.requests_approved(settings, db, db_request.table_id, [db_request.user_id])
+
+    versions.bump(db, versions.TABLES)
     db.commit()
     db.refresh(db_request)
+    # Aprovar muda também quem é jogador da mesa
+    events.publish_table_event(
+        broker, db_request.table_id, f"join_request.{new_status}",
+        request_id=db_request.id, user_id=db_request.user_id, username=db_request.user.username,
+    )
+    # O solicitante ainda não é membro: recebe a decisão no canal pessoal
+    events.publish_user_event(
+        broker, db_request.user_id, f"join_request.{new_status}", request_id=db_request.id, table_id=db_request.table_id,
+    )
     return db_request
 
+def manage_join_requests_batch(db: Session, table_id: str, approve_ids: List[str], decline_ids: List[str],
+                               settings: Optional[Settings] = None, broker: Optional[events.EventBroker] = None):
+    """
+    Processa várias solicitações pendentes de uma mesa numa única transação.
+    Ids que não estão pendentes nessa mesa (ou aparecem nas duas listas) são ignorados.
+    """
+    conflicting = set(approve_ids) & set(decline_ids)
+    wanted = (set(approve_ids) | set(decline_ids)) - conflicting
+    pending = {}
+    if wanted:
+        rows = db.execute(
+            select(models.JoinRequest.id, models.JoinRequest.user_id)
+            .where(
+                models.JoinRequest.table_id == table_id,
+                models.JoinRequest.status == "pending",
+                models.JoinRequest.id.in_(wanted),
+            )
+            .with_for_update()
+        ).all()
+        pending = {row.id: row.user_id for row in rows}
+
+    approved = [request_id for request_id in dict.fromkeys(approve_ids) if request_id in pending]
+    declined = [request_id for request_id in dict.fromkeys(decline_ids) if request_id in pending]
+    for ids, new_status in ((approved, "approved"), (declined, "declined")):
+        if ids:
+            db.execute(
+                update(models.JoinRequest)
+                .where(models.JoinRequest.id.in_(ids), models.JoinRequest.status == "pending")
+                .values(status=new_status),
+                execution_options={"synchronize_session": False},
+            )
+    _add_players(db, [{"table_id": table_id, "user_id": pending[request_id]} for request_id in approved])
+    notifications.requests_approved(settings, db, table_id, [pending[request_id] for request_id in approved])
+    if pending:
+        versions.bump(db, versions.TABLES)
+    db.commit()
+    for ids, new_status in ((approved, "approved"), (declined, "declined")):
+        for request_id in ids:
+            events.publish_table_event(
+                broker, table_id, f"join_request.{new_status}", request_id=request_id, user_id=pending[request_id],
+            )
+            events.publish_user_event(
+                broker, pending[request_id], f"join_request.{new_status}", request_id=request_id, table_id=table_id,
+            )
+
+    skipped = [request_id for request_id in dict.fromkeys(list(approve_ids) + list(decline_ids)) if request_id not in pending]
+    return {"approved": approved, "declined": declined, "skipped": skipped}
+
 def get_table_join_requests(db: Session, table_id: str):
-    return db.query(models.JoinRequest).filter(
+    return db.query(models.JoinRequest).options(joinedload(models.JoinRequest.user)).filter(
         models.JoinRequest.table_id == table_id,
         models.JoinRequest.status == "pending"
     ).all()
 
+def get_table_join_requests_page(db: Session, table_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    query = db.query(models.JoinRequest).options(joinedload(models.JoinRequest.user)).filter(
+        models.JoinRequest.table_id == table_id,
+        models.JoinRequest.status == "pending"
+    )
+    return paginate(query, models.JoinRequest, cursor=cursor, limit=limit, skip=skip)
+
+def get_join_request(db: Session, request_id: str):
+    return db.query(models.JoinRequest).filter(models.JoinRequest.id == request_id).first()
+
 # NOVA FUNÇÃO para atualizar um usuário
-def update_user(db: Session, user_id: str, user_update: schemas.UserUpdate | schemas.NotificationSettingsUpdate):
+def update_user(db: Session, user_id: str, user_update: schemas.UserUpdate | schemas.NotificationSettingsUpdate,
+                principal_cache: Optional[PrincipalCache] = None):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
         # exclude_unset=True é a chave! Garante que só atualizemos os campos enviados.
         update_data = user_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_user, key, value)
+        # O usuário aparece no perfil e, como jogador, nas listagens de mesas
+        versions.bump(db, versions.scope("user", user_id), versions.TABLES)
         db.commit()
         db.refresh(db_user)
-    return db_user
\ No newline at end of file
+        # O snapshot em cache (e.g. is_active, e-mail) deixou de ser válido
+        if principal_cache is not None:
+            principal_cache.invalidate_user(user_id)
+    return db_user
+
+def set_user_avatar(db: Session, user_id: str, avatar_url: str, principal_cache: Optional[PrincipalCache] = None):
+    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    if db_user:
+        db_user.avatar_url = avatar_url
+        versions.bump(db, versions.scope("user", user_id), versions.TABLES)
+        db.commit()
+        db.refresh(db_user)
+        if principal_cache is not None:
+            principal_cache.invalidate_user(user_id)
+    return db_user
+
+# --- RESUMOS (?view=summary) ---
+def get_summary_page(db: Session, kind: str, owner_id: Optional[str] = None, cursor: Optional[str] = None,
+                     limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None):
+    """Página de linhas só com as colunas do resumo de `kind` (?view=summary)."""
+    model, owner_column, _ = SUMMARIES[kind]
+    query = db.query(*summary_columns(kind))
+    if owner_column is not None:
+        query = query.filter(owner_column == owner_id)
+    return paginate(query, model, cursor=cursor, limit=limit, skip=skip)
+
+# --- ITERADORES EM LOTE (exportação de backup) ---
+# Usam yield_per: as linhas chegam do cursor em lotes de `batch_size`, sem
+# carregar a coleção inteira na memória e sem o limite de 100 das listagens.
+def _iter_owned(db: Session, model, owner_column, user_id: str, batch_size: int, *options) -> Iterator:
+    stmt = (
+        select(model)
+        .where(owner_column == user_id)
+        .order_by(model.id)
+        .options(*options)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.execute(stmt).scalars():
+        yield row
+
+def iter_user_characters(db: Session, user_id: str, batch_size: int = 500):
+    return _iter_owned(db, models.Character, models.Character.owner_id, user_id, batch_size)
+
+def iter_user_items(db: Session, user_id: str, batch_size: int = 500):
+    return _iter_owned(db, models.Item, models.Item.creator_id, user_id, batch_size)
+
+def iter_user_monsters(db: Session, user_id: str, batch_size: int = 500):
+    return _iter_owned(db, models.Monster, models.Monster.creator_id, user_id, batch_size)
+
+def iter_user_npcs(db: Session, user_id: str, batch_size: int = 500):
+    return _iter_owned(db, models.NPC, models.NPC.creator_id, user_id, batch_size)
+
+def iter_user_stories(db: Session, user_id: str, batch_size: int = 500):
+    # selectinload carrega as relações de cada lote com uma consulta por relação
+    return _iter_owned(db, models.Story, models.Story.creator_id, user_id, batch_size, *STORY_DETAIL)
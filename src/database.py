@@ -1,20 +1,244 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+from contextlib import AsyncExitStack, ExitStack
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.requests import HTTPConnection
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Contadores de uso do pool, alimentados pelos eventos do SQLAlchemy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+
+    def attach(self, engine: Engine):
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def snapshot(self, engine: Engine) -> dict:
+        pool = engine.pool
+        stats = {
+            "pool_class": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+def _sqlite_pragmas(settings: Settings) -> dict:
+    return {
+        "journal_mode": settings.sqlite_journal_mode,  # WAL: leitores não bloqueiam escritores
+        "synchronous": settings.sqlite_synchronous,    # NORMAL é seguro com WAL e bem mais rápido
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": -settings.sqlite_cache_size_kib,  # valor negativo = KiB
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine, settings: Settings):
+    pragmas = _sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_engine_from_settings(settings: Settings) -> Engine:
+    """Cria o engine conforme o banco configurado em DATABASE_URL."""
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(
+            url,
+            echo=settings.db_echo,
+            connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+        )
+        _install_sqlite_pragmas(engine, settings)
+    else:
+        engine = create_engine(
+            url,
+            echo=settings.db_echo,
+            poolclass=QueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+    return engine
+
+
+# Drivers assíncronos usados por create_async_engine_from_settings
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
 
-DATABASE_URL = "sqlite:///./dungeon_keeper.db"
+def async_database_url(database_url: str) -> URL:
+    """sqlite:///x.db -> sqlite+aiosqlite:///x.db (e postgresql -> asyncpg)."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+def create_async_engine_from_settings(settings: Settings) -> AsyncEngine:
+    """Mesmo banco e mesma configuração do engine síncrono, com driver assíncrono."""
+    url = async_database_url(settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        async_engine = create_async_engine(
+            url,
+            echo=settings.db_echo,
+            connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000},
+        )
+        _install_sqlite_pragmas(async_engine.sync_engine, settings)
+    else:
+        async_engine = create_async_engine(
+            url,
+            echo=settings.db_echo,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+    return async_engine
+
+
+def describe_engine(engine: Engine) -> dict:
+    """Configuração efetiva, lida do próprio banco (PRAGMAs) e do pool."""
+    description = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "dialect": engine.dialect.name,
+        "pool": type(engine.pool).__name__,
+    }
+    if isinstance(engine.pool, QueuePool):
+        description["pool_size"] = engine.pool.size()
+        description["max_overflow"] = engine.pool._max_overflow
+        description["pool_timeout"] = engine.pool.timeout()
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size"):
+                description[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return description
+
+
+class Database:
+    """
+    Engines e fábricas de sessão de uma aplicação, montados a partir das
+    settings recebidas. create_app() guarda uma instância em app.state.database;
+    get_db/get_async_db leem dali, então duas aplicações com configurações
+    diferentes nunca dividem banco nem pool.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.engine = create_engine_from_settings(settings)
+        # Caminho assíncrono (endpoints de leitura mais acessados); o síncrono
+        # continua disponível para scripts, migrações e o restante da API.
+        self.async_engine = create_async_engine_from_settings(settings)
+        self.pool_stats = PoolStats()
+        self.pool_stats.attach(self.engine)
+        self.pool_stats.attach(self.async_engine.sync_engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+    def log_effective_settings(self):
+        logger.info("Banco de dados: %s", describe_engine(self.engine))
+
+    def warm_up(self, connections: int = 1):
+        """Abre conexões de antemão (PRAGMAs, handshake) e as devolve ao pool."""
+        with ExitStack() as stack:
+            for _ in range(connections):
+                stack.enter_context(self.engine.connect()).exec_driver_sql("SELECT 1")
+
+    async def warm_up_async(self, connections: int = 1):
+        """O mesmo para o engine assíncrono."""
+        async with AsyncExitStack() as stack:
+            for _ in range(connections):
+                connection = await stack.enter_async_context(self.async_engine.connect())
+                await connection.exec_driver_sql("SELECT 1")
+
+    async def dispose(self):
+        await self.async_engine.dispose()
+        self.engine.dispose()
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# --- Banco padrão (scripts, CLIs, benchmarks) ---
+# Criado no primeiro acesso a database.engine, database.SessionLocal etc., a
+# partir de get_settings(). A API não o usa: cada aplicação tem o seu.
+_default: Optional[Database] = None
+_default_lock = threading.Lock()
+_DEFAULT_ATTRIBUTES = ("engine", "async_engine", "SessionLocal", "AsyncSessionLocal", "pool_stats")
+
+
+def default_database() -> Database:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Database(get_settings())
+        return _default
+
+
+def __getattr__(name: str):
+    if name in _DEFAULT_ATTRIBUTES:
+        return getattr(default_database(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def app_database(connection: HTTPConnection) -> Database:
+    return connection.app.state.database
+
 # Dependência para obter a sessão do DB
-def get_db():
-    db = SessionLocal()
+def get_db(connection: HTTPConnection):
+    db = app_database(connection).SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependência equivalente com AsyncSession
+async def get_async_db(connection: HTTPConnection):
+    async with app_database(connection).AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from typing import List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from . import database
+
+
+class QueryCounter:
+    """
+    Conta os comandos SQL executados nos engines enquanto está ativo. Um
+    AsyncEngine é observado pelo seu sync_engine.
+    """
+
+    def __init__(self, *engines: Union[Engine, AsyncEngine]):
+        self.engines = [getattr(engine, "sync_engine", engine) for engine in engines]
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+def count_queries(*engines: Union[Engine, AsyncEngine]) -> QueryCounter:
+    """Sem engines, conta no banco padrão do processo (database.engine)."""
+    return QueryCounter(*(engines or (database.engine,)))
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, *engines: Union[Engine, AsyncEngine]):
+    """
+    Falha (AssertionError) se o bloco executar mais de `max_queries` comandos,
+    somados todos os engines. Numa aplicação, passe os dois engines dela:
+
+        db = app.state.database
+        with assert_query_budget(6, db.engine, db.async_engine):
+            client.get("/api/v1/users/me", headers=headers)
+    """
+    with count_queries(*engines) as counter:
+        yield counter
+    if counter.count > max_queries:
+        executed = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(
+            f"Orçamento de consultas excedido: {counter.count} > {max_queries}\n{executed}"
+        )
+
+
+# --- Planos de consulta (SQLite) ---
+def explain_query_plan(connection, statement) -> List[str]:
+    """
+    Retorna as linhas `detail` do EXPLAIN QUERY PLAN de um comando SQLAlchemy,
+    e.g. ["SEARCH items USING INDEX ix_items_creator_id_created_at (creator_id=?)"].
+    """
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(connection, statement, index_name: str):
+    """Falha se o plano do comando não usar o índice `index_name`."""
+    plan = explain_query_plan(connection, statement)
+    if not any(index_name in detail for detail in plan):
+        raise AssertionError(f"Índice {index_name} não usado. Plano:\n  " + "\n  ".join(plan))
+
+
+def assert_no_full_scan(connection, statement, table: str):
+    """Falha se o plano varrer a tabela inteira (`SCAN <table>` sem índice)."""
+    plan = explain_query_plan(connection, statement)
+    scans = [d for d in plan if d.startswith(f"SCAN {table}") and "INDEX" not in d]
+    if scans:
+        raise AssertionError(f"Varredura completa em {table}. Plano:\n  " + "\n  ".join(plan))
@@ -0,0 +1,123 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAX_DICE_PER_TERM = 100
+MAX_SIDES = 1000
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<sign>[+\-])\s*)?"
+    r"(?:(?P<count>\d*)[dD](?P<sides>\d+)(?:k(?P<keep_mode>[hl])(?P<keep>\d+))?|(?P<constant>\d+))"
+)
+_ADVANTAGE = re.compile(r"\s+(adv|advantage|vantagem|dis|disadvantage|desvantagem)\s*$", re.IGNORECASE)
+
+
+class DiceSyntaxError(ValueError):
+    """Expressão de dados inválida."""
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    count: int
+    sides: int
+    sign: int = 1
+    keep: int = 0  # >0 mantém os `keep` maiores, <0 os menores, 0 todos
+
+
+@dataclass(frozen=True)
+class CompiledDice:
+    """
+    Forma compilada de uma expressão como "4d8+4" ou "1d20+5 adv": uma tupla
+    de termos de dados e um modificador constante. É imutável, hashable e
+    serializável (pode ir para os workers do pool de processos).
+    """
+    terms: Tuple[DiceTerm, ...]
+    modifier: int = 0
+
+    @property
+    def minimum(self) -> int:
+        return self.modifier + sum(
+            term.sign * (abs(term.keep) or term.count) * (1 if term.sign > 0 else term.sides)
+            for term in self.terms
+        )
+
+    @property
+    def maximum(self) -> int:
+        return self.modifier + sum(
+            term.sign * (abs(term.keep) or term.count) * (term.sides if term.sign > 0 else 1)
+            for term in self.terms
+        )
+
+    def roll_dice(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Só os dados, sem o modificador (o dano extra de um crítico)."""
+        total = np.zeros(n, dtype=np.int64)
+        for term in self.terms:
+            if term.count == 1 and not term.keep:
+                rolls = rng.integers(1, term.sides + 1, size=n)
+            else:
+                rolls = rng.integers(1, term.sides + 1, size=(n, term.count))
+                if term.keep:
+                    rolls.sort(axis=1)
+                    rolls = rolls[:, -term.keep:] if term.keep > 0 else rolls[:, :-term.keep]
+                rolls = rolls.sum(axis=1)
+            total += term.sign * rolls
+        return total
+
+    def roll(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """`n` rolagens independentes de uma vez, como um array int64."""
+        rng = rng or np.random.default_rng()
+        return self.roll_dice(n, rng) + self.modifier
+
+
+def _with_advantage(terms: Tuple[DiceTerm, ...], keep: int) -> Tuple[DiceTerm, ...]:
+    # Vantagem/desvantagem vale para o d20 (ou, sem d20, para o primeiro dado)
+    index = next((i for i, term in enumerate(terms) if term.sides == 20 and term.count == 1), 0)
+    if not terms or terms[index].count != 1 or terms[index].keep:
+        raise DiceSyntaxError("Vantagem exige um único dado, como 1d20")
+    term = terms[index]
+    return terms[:index] + (DiceTerm(2, term.sides, term.sign, keep),) + terms[index + 1:]
+
+
+@lru_cache(maxsize=1024)
+def compile_dice(expression: str) -> CompiledDice:
+    """
+    Aceita somas de dados e constantes ("2d6+3", "1d8 + 1d6 - 1"), manter
+    maiores/menores ("4d6kh3", "2d20kl1") e os sufixos "adv"/"dis".
+    """
+    text = expression.strip()
+    advantage = _ADVANTAGE.search(text)
+    if advantage:
+        text = text[:advantage.start()]
+    terms = []
+    modifier = 0
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos or (pos > 0 and not match.group("sign")):
+            raise DiceSyntaxError(f"Expressão de dados inválida: {expression!r}")
+        pos = match.end()
+        sign = -1 if match.group("sign") == "-" else 1
+        if match.group("constant") is not None:
+            modifier += sign * int(match.group("constant"))
+            continue
+        count = int(match.group("count") or 1)
+        sides = int(match.group("sides"))
+        keep = int(match.group("keep") or 0)
+        if match.group("keep_mode") == "l":
+            keep = -keep
+        if not (1 <= count <= MAX_DICE_PER_TERM and 1 <= sides <= MAX_SIDES and abs(keep) <= count):
+            raise DiceSyntaxError(f"Dados fora dos limites: {match.group().strip()!r}")
+        terms.append(DiceTerm(count, sides, sign, 0 if keep == count else keep))
+    if pos == 0 and not text.strip():
+        raise DiceSyntaxError("Expressão de dados vazia")
+    compiled = tuple(terms)
+    if advantage:
+        compiled = _with_advantage(compiled, 1 if advantage.group(1).lower().startswith(("adv", "van")) else -1)
+    return CompiledDice(compiled, modifier)
+
+
+def roll(expression: str, n: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    return compile_dice(expression).roll(n, rng)
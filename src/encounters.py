@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .statblock import XP_BY_CR
+
+DIFFICULTIES = ("easy", "medium", "hard", "deadly")
+MIN_MONSTER_XP = min(XP_BY_CR.values())
+
+# Limiares de XP por personagem, por nível (D&D 5e, Dungeon Master's Guide)
+XP_THRESHOLDS = {
+    1: (25, 50, 75, 100), 2: (50, 100, 150, 200), 3: (75, 150, 225, 400),
+    4: (125, 250, 375, 500), 5: (250, 500, 750, 1100), 6: (300, 600, 900, 1400),
+    7: (350, 750, 1100, 1700), 8: (450, 900, 1400, 2100), 9: (550, 1100, 1600, 2400),
+    10: (600, 1200, 1900, 2800), 11: (800, 1600, 2400, 3600), 12: (1000, 2000, 3000, 4500),
+    13: (1100, 2200, 3400, 5100), 14: (1250, 2500, 3800, 5700), 15: (1400, 2800, 4300, 6400),
+    16: (1600, 3200, 4800, 7200), 17: (2000, 3900, 5900, 8800), 18: (2100, 4200, 6300, 9500),
+    19: (2400, 4900, 7300, 10900), 20: (2800, 5700, 8500, 12700),
+}
+
+# Multiplicadores pelo número de monstros; o grupo pequeno (< 3) sobe um degrau
+# e o grande (>= 6) desce um
+_MULTIPLIERS = (0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0)
+_MONSTER_STEPS = ((15, 6), (11, 5), (7, 4), (3, 3), (2, 2), (1, 1))
+
+
+def party_thresholds(levels: Sequence[int]) -> Dict[str, int]:
+    totals = dict.fromkeys(DIFFICULTIES, 0)
+    for level in levels:
+        for difficulty, xp in zip(DIFFICULTIES, XP_THRESHOLDS[max(1, min(20, level))]):
+            totals[difficulty] += xp
+    return totals
+
+
+def encounter_multiplier(monster_count: int, party_size: int) -> float:
+    step = next(step for minimum, step in _MONSTER_STEPS if monster_count >= minimum)
+    if party_size < 3:
+        step += 1
+    elif party_size >= 6:
+        step -= 1
+    return _MULTIPLIERS[step]
+
+
+def classify(adjusted_xp: int, thresholds: Dict[str, int]) -> Optional[str]:
+    reached = None
+    for difficulty in DIFFICULTIES:
+        if adjusted_xp >= thresholds[difficulty]:
+            reached = difficulty
+    return reached
+
+
+class UnknownCharacters(LookupError):
+    """Personagens que não existem ou não são do usuário."""
+
+    def __init__(self, character_ids: Sequence[str]):
+        super().__init__(", ".join(character_ids))
+        self.character_ids = list(character_ids)
+
+
+def party_levels(db: Session, user_id: str, levels: Sequence[int], character_ids: Sequence[str]) -> List[int]:
+    """Níveis informados mais os dos personagens do usuário; UnknownCharacters para ids de outros."""
+    result = list(levels)
+    if character_ids:
+        found = dict(
+            db.query(models.Character.id, models.Character.level)
+            .filter(models.Character.id.in_(set(character_ids)), models.Character.owner_id == user_id)
+            .all()
+        )
+        missing = sorted(set(character_ids) - found.keys())
+        if missing:
+            raise UnknownCharacters(missing)
+        result += [level or 1 for level in found.values()]
+    return result
+
+
+def _strongest_within(db: Session, user_id: str, max_xp: float, monster_type: Optional[str]) -> Optional[models.Monster]:
+    # Busca reversa em ix_monsters_creator_id_xp: o monstro de maior XP que cabe no orçamento
+    query = db.query(models.Monster).filter(
+        models.Monster.creator_id == user_id,
+        models.Monster.xp.isnot(None),
+        models.Monster.xp <= max_xp,
+    )
+    if monster_type:
+        query = query.filter(models.Monster.type == monster_type)
+    return query.order_by(models.Monster.xp.desc(), models.Monster.id).first()
+
+
+def _suggestion(groups: list, multiplier: float, thresholds: Dict[str, int]) -> dict:
+    total_xp = sum(monster.xp * count for monster, count in groups)
+    adjusted_xp = int(total_xp * multiplier)
+    return {
+        "groups": [{"monster": monster, "count": count} for monster, count in groups],
+        "monster_count": sum(count for _, count in groups),
+        "total_xp": total_xp,
+        "adjusted_xp": adjusted_xp,
+        "difficulty": classify(adjusted_xp, thresholds),
+    }
+
+
+def build_encounter(db: Session, user_id: str, levels: Sequence[int], difficulty: str = "medium",
+                    max_monsters: int = 8, monster_type: Optional[str] = None) -> dict:
+    """
+    Sugere encontros com os monstros do usuário dentro do orçamento de XP do
+    grupo. Para cada quantidade de monstros há até duas sugestões: N cópias
+    do mesmo monstro, e um líder com N-1 lacaios. As mais próximas do
+    orçamento vêm primeiro. São até três consultas indexadas por quantidade.
+    """
+    thresholds = party_thresholds(levels)
+    budget = thresholds[difficulty]
+    party_size = len(levels)
+    suggestions = []
+    seen = set()
+
+    def add(groups, multiplier):
+        key = tuple((monster.id, count) for monster, count in groups)
+        if key not in seen:
+            seen.add(key)
+            suggestions.append(_suggestion(groups, multiplier, thresholds))
+
+    for count in range(1, max_monsters + 1):
+        multiplier = encounter_multiplier(count, party_size)
+        raw_budget = budget / multiplier
+        if raw_budget / count < MIN_MONSTER_XP:
+            break
+        monster = _strongest_within(db, user_id, raw_budget / count, monster_type)
+        if monster is None:
+            continue
+        add([(monster, count)], multiplier)
+
+        if count >= 2:
+            leader = _strongest_within(db, user_id, raw_budget / 2, monster_type)
+            if leader is not None:
+                minion = _strongest_within(db, user_id, (raw_budget - leader.xp) / (count - 1), monster_type)
+                if minion is not None and minion.id != leader.id:
+                    add([(leader, 1), (minion, count - 1)], multiplier)
+
+    suggestions.sort(key=lambda s: (abs(budget - s["adjusted_xp"]), s["monster_count"]))
+    return {
+        "party_levels": list(levels),
+        "thresholds": thresholds,
+        "budget": budget,
+        "suggestions": suggestions,
+    }
+
@@ -0,0 +1,70 @@
+"""
+Relay local de eventos para vários workers (EVENTS_BACKEND=relay).
+
+Faz o papel de um broker externo: cada worker abre uma conexão, e cada linha
+recebida (um evento em JSON) é repassada a todas as conexões, inclusive a de
+origem. Não guarda nada: quem estiver desconectado perde os eventos.
+
+    python -m src.event_relay --url tcp://127.0.0.1:7071
+    python -m src.event_relay --url unix:///tmp/dungeon-keeper-events.sock
+"""
+import argparse
+import asyncio
+import logging
+from typing import Set
+from urllib.parse import urlparse
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Uma conexão que não esvazia o buffer de saída é derrubada em vez de segurar as outras
+MAX_WRITE_BUFFER = 1024 * 1024
+
+
+class EventRelay:
+    def __init__(self):
+        self._clients: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        logger.info("Worker conectado (%d conexões)", len(self._clients))
+        try:
+            while line := await reader.readline():
+                for client in tuple(self._clients):
+                    if client.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                        logger.warning("Conexão lenta descartada")
+                        self._drop(client)
+                        continue
+                    client.write(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter):
+        if writer in self._clients:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def serve(self, url: str):
+        parsed = urlparse(url)
+        if parsed.scheme == "unix":
+            server = await asyncio.start_unix_server(self.handle, parsed.path)
+        else:
+            server = await asyncio.start_server(self.handle, parsed.hostname, parsed.port)
+        logger.info("Relay de eventos ouvindo em %s", url)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=get_settings().events_relay_url)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(EventRelay().serve(args.url))
+
+
+if __name__ == "__main__":
+    main()
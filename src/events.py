@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+from starlette.requests import HTTPConnection
+from starlette.websockets import WebSocket
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Callback do broker que entrega uma mensagem de um canal aos assinantes locais
+Deliver = Callable[[str, dict], None]
+
+
+def table_channel(table_id: str) -> str:
+    return f"table:{table_id}"
+
+
+def user_channel(user_id: str) -> str:
+    """Canal pessoal: o que diz respeito ao usuário antes (ou fora) de ser membro de uma mesa."""
+    return f"user:{user_id}"
+
+
+# --- BACKENDS ---
+class EventBackend(ABC):
+    """
+    Transporte das mensagens publicadas. `publish` pode ser chamado de
+    qualquer thread (as escritas do crud rodam no threadpool); cada mensagem
+    deve chegar a `deliver`, no event loop, de todos os workers que usam o
+    mesmo backend, inclusive o que publicou.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Deliver, loop: asyncio.AbstractEventLoop):
+        ...
+
+    @abstractmethod
+    def publish(self, channel: str, message: dict):
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(EventBackend):
+    """Um único processo: entrega direto no event loop."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Deliver, loop: asyncio.AbstractEventLoop):
+        self._deliver, self._loop = deliver, loop
+
+    def publish(self, channel: str, message: dict):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, channel, message)
+
+
+class RelayBackend(EventBackend):
+    """
+    Vários workers: cada um mantém uma conexão com o relay (event_relay.py),
+    que repassa cada linha recebida a todas as conexões. Sem relay disponível
+    as mensagens são entregues só no próprio worker, e a conexão é refeita em
+    segundo plano.
+    """
+
+    def __init__(self, url: str, reconnect_delay: float = 1.0):
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self._deliver: Optional[Deliver] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _open(self):
+        parsed = urlparse(self.url)
+        if parsed.scheme == "unix":
+            return await asyncio.open_unix_connection(parsed.path)
+        return await asyncio.open_connection(parsed.hostname, parsed.port)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await self._open()
+                logger.info("Conectado ao relay de eventos em %s", self.url)
+                while line := await reader.readline():
+                    envelope = json.loads(line)
+                    self._deliver(envelope["channel"], envelope["message"])
+            except (OSError, ValueError) as e:
+                logger.warning("Relay de eventos indisponível (%s): %s", self.url, e)
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                self._writer = None
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self, deliver: Deliver, loop: asyncio.AbstractEventLoop):
+        self._deliver, self._loop = deliver, loop
+        self._task = loop.create_task(self._run())
+
+    def _send(self, channel: str, message: dict):
+        # Roda no event loop
+        if self._writer is None:
+            self._deliver(channel, message)
+            return
+        self._writer.write(json.dumps({"channel": channel, "message": message}).encode() + b"\n")
+
+    def publish(self, channel: str, message: dict):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._send, channel, message)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+# --- ASSINATURAS ---
+class Subscription:
+    """
+    Fila limitada de um cliente. Se o cliente não acompanha, a fila é
+    esvaziada e trocada por um único evento "overflow": ele perdeu eventos e
+    deve reconsultar a mesa (com ETag, isso custa um 304 se nada mudou).
+    """
+
+    def __init__(self, channel: str, max_queue: int):
+        self.channel = channel
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, message: dict) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "overflow", "channel": self.channel, "dropped": self.dropped})
+            return False
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Pub/sub em processo com um canal por mesa; o transporte fica a cargo do backend."""
+
+    def __init__(self, backend: EventBackend, max_queue: int):
+        self.backend = backend
+        self.max_queue = max_queue
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._started = False
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "EventBroker":
+        return cls(create_backend(settings), max_queue=settings.events_queue_size)
+
+    async def start(self):
+        await self.backend.start(self._deliver, asyncio.get_running_loop())
+        self._started = True
+
+    async def close(self):
+        self._started = False
+        await self.backend.close()
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.max_queue)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+
+    def publish(self, channel: str, event_type: str, data: dict):
+        """Publica a partir de qualquer thread; sem broker iniciado (scripts, CLI) não faz nada."""
+        if not self._started:
+            return
+        self.published += 1
+        self.backend.publish(channel, {"type": event_type, "channel": channel, "data": data, "ts": time.time()})
+
+    def _deliver(self, channel: str, message: dict):
+        # Roda no event loop
+        for subscription in tuple(self._channels.get(channel, ())):
+            if subscription.offer(message):
+                self.delivered += 1
+            else:
+                self.overflows += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "channels": len(self._channels),
+            "subscribers": sum(len(subscribers) for subscribers in self._channels.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+
+def create_backend(settings: Settings) -> EventBackend:
+    if settings.events_backend == "relay":
+        return RelayBackend(settings.events_relay_url)
+    if settings.events_backend != "memory":
+        raise ValueError(f"EVENTS_BACKEND desconhecido: {settings.events_backend!r}")
+    return MemoryBackend()
+
+
+def get_broker(connection: HTTPConnection) -> EventBroker:
+    """Dependência: o broker da aplicação (app.state.event_broker)."""
+    return connection.app.state.event_broker
+
+
+def publish_table_event(broker: Optional[EventBroker], table_id: str, event_type: str, **data):
+    """Sem broker (scripts, CLI) não faz nada, como um broker não iniciado."""
+    if broker is not None:
+        broker.publish(table_channel(table_id), event_type, {"table_id": table_id, **data})
+
+
+def publish_user_event(broker: Optional[EventBroker], user_id: str, event_type: str, **data):
+    if broker is not None:
+        broker.publish(user_channel(user_id), event_type, data)
+
+
+# --- WEBSOCKET ---
+def websocket_token(websocket: WebSocket, token: Optional[str]) -> str:
+    """Token da query string ou, se ausente, do cabeçalho Authorization."""
+    if token is None:
+        scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+        token = token if scheme.lower() == "bearer" else None
+    return token or ""
+
+
+async def stream_channel(websocket: WebSocket, channel: str):
+    """Aceita o WebSocket e repassa os eventos do canal até o cliente desconectar."""
+    broker = get_broker(websocket)
+    subscription = broker.subscribe(channel)
+    await websocket.accept()
+
+    async def wait_disconnect():
+        # O cliente não manda nada; só precisamos saber quando ele sai
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnected = asyncio.ensure_future(wait_disconnect())
+    try:
+        while True:
+            next_event = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_event.cancel()
+                break
+            await websocket.send_json(next_event.result())
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(subscription)
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Literal, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from . import models, schemas
+from .loading import RELATIONS, profile_for
+from .metrics import TimedORJSONResponse
+
+# Esquema das colunas e esquema de cada relação, por recurso. A ordem das
+# relações é a mesma dos schemas completos (schemas.User, Table, Story).
+RESOURCES: Dict[str, Tuple[Type[BaseModel], Dict[str, Type[BaseModel]]]] = {
+    "story": (schemas.StoryFields, {
+        "items": schemas.Item,
+        "monsters": schemas.Monster,
+        "npcs": schemas.NPC,
+    }),
+    "table": (schemas.TableFields, {
+        "story": schemas.Story,
+        "players": schemas.UserBase,
+        "join_requests": schemas.JoinRequest,
+    }),
+    "user": (schemas.AuthenticatedUser, {
+        "tables": schemas.Table,
+        "characters": schemas.Character,
+        "items": schemas.Item,
+        "monsters": schemas.Monster,
+        "npcs": schemas.NPC,
+        "stories": schemas.Story,
+        "joined_tables": schemas.Table,
+    }),
+}
+assert all(set(relations) == set(RELATIONS[name]) for name, (_, relations) in RESOURCES.items())
+
+# Projeções de resumo (?view=summary): colunas lidas direto do SQL, sem ORM
+SUMMARIES = {
+    "character": (models.Character, models.Character.owner_id, (
+        models.Character.id, models.Character.name, models.Character.character_class, models.Character.level)),
+    "item": (models.Item, models.Item.creator_id, (
+        models.Item.id, models.Item.name, models.Item.type, models.Item.rarity)),
+    "monster": (models.Monster, models.Monster.creator_id, (
+        models.Monster.id, models.Monster.name, models.Monster.challenge_rating, models.Monster.cr_value, models.Monster.xp)),
+    "npc": (models.NPC, models.NPC.creator_id, (
+        models.NPC.id, models.NPC.name, models.NPC.role)),
+    "story": (models.Story, models.Story.creator_id, (
+        models.Story.id, models.Story.title)),
+    "table": (models.Table, None, (
+        models.Table.id, models.Table.title, models.Table.master_id)),
+}
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Relações e colunas pedidas para um recurso; `sparse` é False sem ?include=/?fields=."""
+    resource: str
+    include: Tuple[str, ...]
+    fields: Optional[FrozenSet[str]]
+    sparse: bool
+
+    @property
+    def options(self) -> tuple:
+        return profile_for(self.resource, self.include)
+
+    def serialize(self, obj) -> dict:
+        scalar_schema, relations = RESOURCES[self.resource]
+        data = scalar_schema.model_validate(obj, from_attributes=True).model_dump(mode="json", include=self.fields)
+        for name in self.include:
+            schema = relations[name]
+            value = getattr(obj, name)
+            if isinstance(value, list):
+                data[name] = [schema.model_validate(v, from_attributes=True).model_dump(mode="json") for v in value]
+            else:
+                data[name] = None if value is None else schema.model_validate(value, from_attributes=True).model_dump(mode="json")
+        return data
+
+
+def _parse_names(value: Optional[str], allowed, parameter: str) -> Optional[List[str]]:
+    if value is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Valores inválidos em `{parameter}`: {', '.join(unknown)}")
+    return names
+
+
+class FieldsetParams:
+    """
+    Dependência com os parâmetros ?include= e ?fields= de um recurso:
+
+        fieldset: Fieldset = Depends(FieldsetParams("table"))
+
+    `include` lista as relações a carregar e serializar. `fields` lista as
+    colunas, e também pode nomear relações. Sem nenhum dos dois vale a resposta
+    completa de sempre. O `id` vem sempre.
+    """
+
+    def __init__(self, resource: str):
+        self.resource = resource
+
+    def __call__(
+        self,
+        include: Optional[str] = Query(None, description="Relações a incluir, separadas por vírgula"),
+        fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    ) -> Fieldset:
+        scalar_schema, relations = RESOURCES[self.resource]
+        scalars = set(scalar_schema.model_fields)
+        included = _parse_names(include, relations, "include")
+        selected = _parse_names(fields, scalars | set(relations), "fields")
+        if included is None:
+            included = [name for name in relations if selected is None or name in selected]
+        return Fieldset(
+            resource=self.resource,
+            include=tuple(included),
+            fields=None if selected is None else frozenset({"id"} | (scalars & set(selected))),
+            sparse=include is not None or fields is not None,
+        )
+
+
+def summary_view(
+    view: Literal["full", "summary"] = Query("full", description="`summary`: só as colunas principais, lidas direto do SQL")
+) -> bool:
+    return view == "summary"
+
+
+def summary_columns(kind: str) -> tuple:
+    """Colunas do resumo mais created_at, que a paginação por cursor precisa."""
+    model, _, columns = SUMMARIES[kind]
+    return columns + (model.created_at,)
+
+
+def summary_rows(rows) -> List[dict]:
+    return [{key: value for key, value in row._mapping.items() if key != "created_at"} for row in rows]
+
+
+def page_response(items: list, next_cursor: Optional[str]) -> TimedORJSONResponse:
+    """Envelope schemas.Page já serializado, sem passar de novo pelo response_model."""
+    return TimedORJSONResponse({"items": items, "next_cursor": next_cursor})
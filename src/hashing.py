@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+from starlette.requests import HTTPConnection
+
+from .config import Settings, get_settings
+
+
+# --- Contexto de Senha ---
+# Ao mudar `bcrypt_rounds`, hashes antigos passam a ser "deprecated" e são
+# refeitos de forma transparente no próximo login (ver verify_and_update).
+@lru_cache
+def crypt_context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Caminho síncrono (crud, scripts): segue get_settings()
+pwd_context = crypt_context(get_settings().bcrypt_rounds)
+
+
+# --- Funções executadas nos workers (precisam ser de nível de módulo) ---
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+class HashingOverloaded(Exception):
+    """A fila do executor de hash está cheia; o chamador deve responder 503."""
+
+
+class PasswordHasher:
+    """
+    Executa bcrypt fora do event loop, num pool dedicado de processos (ou threads).
+
+    No máximo `max_workers` operações rodam ao mesmo tempo e até `max_pending`
+    ficam na fila; além disso, `HashingOverloaded` é levantada imediatamente
+    em vez de deixar a latência crescer sem limite.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, use_processes: bool = True, rounds: int = 12):
+        self.rounds = rounds
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PasswordHasher":
+        return cls(
+            max_workers=settings.hash_workers,
+            max_pending=settings.hash_max_pending,
+            use_processes=settings.hash_executor == "process",
+            rounds=settings.bcrypt_rounds,
+        )
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="hashing"
+                    )
+            return self._executor
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                self._rejected += 1
+                raise HashingOverloaded()
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Retorna (senha válida, novo hash ou None se o hash atual ainda serve)."""
+        return await self._submit(_verify_and_update, password, hashed_password, self.rounds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": "process" if self.use_processes else "thread",
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def get_password_hasher(connection: HTTPConnection) -> PasswordHasher:
+    """Dependência: o executor de hash da aplicação (app.state.password_hasher)."""
+    return connection.app.state.password_hasher
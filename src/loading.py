@@ -0,0 +1,70 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import models
+
+# --- PERFIS DE CARREGAMENTO ---
+# Cada perfil carrega, com um número fixo de consultas, exatamente as relações
+# que o schema de resposta correspondente serializa. Sem eles, cada relação
+# aninhada vira um SELECT por objeto (N+1) durante a serialização.
+
+# schemas.Story -> items, monsters, npcs
+STORY_DETAIL = (
+    selectinload(models.Story.items),
+    selectinload(models.Story.monsters),
+    selectinload(models.Story.npcs),
+)
+
+# schemas.Table -> story (com seu conteúdo), players, join_requests[].user
+TABLE_DETAIL = (
+    joinedload(models.Table.story).options(*STORY_DETAIL),
+    selectinload(models.Table.players),
+    selectinload(models.Table.join_requests).joinedload(models.JoinRequest.user),
+)
+
+# schemas.User -> todas as coleções do usuário
+USER_PROFILE = (
+    selectinload(models.User.characters),
+    selectinload(models.User.items),
+    selectinload(models.User.monsters),
+    selectinload(models.User.npcs),
+    selectinload(models.User.stories).options(*STORY_DETAIL),
+    selectinload(models.User.tables).options(*TABLE_DETAIL),
+    selectinload(models.User.joined_tables).options(*TABLE_DETAIL),
+)
+
+PROFILES = {
+    "story": STORY_DETAIL,
+    "table": TABLE_DETAIL,
+    "user": USER_PROFILE,
+}
+
+# --- RELAÇÕES OPCIONAIS (?include=) ---
+# Cada relação com as opções que a carregam. Com todas incluídas, o resultado
+# equivale aos perfis acima; as que ficam de fora não geram consulta alguma.
+RELATIONS = {
+    "story": {
+        "items": (selectinload(models.Story.items),),
+        "monsters": (selectinload(models.Story.monsters),),
+        "npcs": (selectinload(models.Story.npcs),),
+    },
+    "table": {
+        "story": (joinedload(models.Table.story).options(*STORY_DETAIL),),
+        "players": (selectinload(models.Table.players),),
+        "join_requests": (selectinload(models.Table.join_requests).joinedload(models.JoinRequest.user),),
+    },
+    "user": {
+        "tables": (selectinload(models.User.tables).options(*TABLE_DETAIL),),
+        "characters": (selectinload(models.User.characters),),
+        "items": (selectinload(models.User.items),),
+        "monsters": (selectinload(models.User.monsters),),
+        "npcs": (selectinload(models.User.npcs),),
+        "stories": (selectinload(models.User.stories).options(*STORY_DETAIL),),
+        "joined_tables": (selectinload(models.User.joined_tables).options(*TABLE_DETAIL),),
+    },
+}
+
+
+def profile_for(resource: str, include) -> tuple:
+    """Opções de carregamento só para as relações pedidas de `resource`."""
+    relations = RELATIONS[resource]
+    return tuple(option for name in include for option in relations[name])
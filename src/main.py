@@ -1,23 +1,22 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles  # NOVO IMPORT
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
+"""
+Fábrica da aplicação.
+
+    uvicorn --factory src.main:create_app    # ou src.main:app
 
-from . import crud, models, schemas, auth
-from .database import SessionLocal, engine, get_db
-from .auth import get_current_user_from_token
-from .routers import items, monsters, npcs, stories, tables, users, backup  # Adicionado users e backup
+Importar este módulo não abre banco, pools nem diretórios: create_app()
+monta engines, pools, roteadores e middlewares a partir das settings
+recebidas, e o lifespan conecta (migrações, conexões iniciais, tarefas em
+segundo plano).
+`src.main:app` continua valendo e cria a aplicação padrão no primeiro acesso.
+"""
+import importlib
+from contextlib import asynccontextmanager
+from typing import Optional
 
-# Cria as tabelas no banco de dados (só na primeira vez que rodar)
-models.Base.metadata.create_all(bind=engine)
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(
-    title="Dungeon Keeper API",
-    description="O motor para o seu universo de RPG.",
-    version="0.1.0"
-)
+from .config import Settings, get_settings
 
 # --- Middleware de CORS (ESSENCIAL) ---
 # Isso permite que seu frontend (rodando em localhost:3000)
@@ -28,71 +27,122 @@ origins = [
     # Adicione outros endereços se necessário
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Monte um diretório estático para servir as imagens de avatar
-app.mount("/avatars", StaticFiles(directory="static/avatars"), name="avatars")
-
-# --- Incluir Roteadores ---
-app.include_router(users.router)  # Inclua o novo roteador de usuários
-app.include_router(backup.router)  # Inclua o novo roteador de backup
-app.include_router(items.router)
-app.include_router(monsters.router)
-app.include_router(npcs.router)
-app.include_router(stories.router)
-app.include_router(tables.router)
-
-# --- LISTAS EM MEMÓRIA REMOVIDAS - AGORA USANDO 100% BANCO DE DADOS ---
-
-# --- Endpoints da API ---
-
-# --- Endpoints de Autenticação Refatorados ---
-@app.post("/api/v1/register", response_model=schemas.UserBase)
-def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_username(db, username=user_in.username)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    created_user = crud.create_user(db=db, user=user_in)
-    return schemas.UserBase(username=created_user.username, email=created_user.email)
-
-@app.post("/api/v1/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: schemas.TokenRequestForm, db: Session = Depends(get_db)):
-    # Esta chamada deve usar a função centralizada do módulo auth
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Nome de usuário ou senha incorretos",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.username, "user_id": user.id}, expires_delta=access_token_expires
+# Roteadores de src/routers, na ordem em que são registrados
+ROUTERS = ("auth", "users", "backup", "characters", "items", "monsters", "npcs", "stories", "tables", "search", "health")
+
+
+def _lifespan(settings: Settings):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        from . import statblock
+
+        db = app.state.database
+        # Registra a configuração efetiva do banco (PRAGMAs, pool) ao iniciar
+        db.log_effective_settings()
+        # O esquema é gerenciado pelo Alembic (alembic/versions), não mais por create_all
+        if settings.auto_migrate:
+            from . import migrations
+
+            migrations.upgrade_to_head(db.engine)
+            # Preenche as colunas numéricas dos monstros anteriores à migração 0005
+            with db.SessionLocal() as session:
+                statblock.backfill_stat_blocks(session)
+        if settings.db_warmup_connections > 0:
+            db.warm_up(settings.db_warmup_connections)
+            await db.warm_up_async(settings.db_warmup_connections)
+
+        # Pub/sub dos eventos das mesas (WebSocket /api/v1/tables/{id}/events)
+        await app.state.event_broker.start()
+        # Envio dos e-mails da outbox de notificações (só com SMTP_HOST configurado)
+        await app.state.notification_dispatcher.start()
+        try:
+            yield
+        finally:
+            await app.state.event_broker.close()
+            await app.state.notification_dispatcher.stop()
+            # Fecha as conexões dos engines ao desligar
+            await db.dispose()
+            # Encerra os pools de processos (bcrypt, simulações, avatares) junto com o servidor
+            app.state.password_hasher.shutdown()
+            app.state.simulation_pool.shutdown()
+            app.state.avatar_processor.shutdown()
+
+    return lifespan
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Monta a aplicação a partir de `settings` (padrão: get_settings()). Banco,
+    chaves JWT, caches, pools, broker de eventos, dispatcher de notificações e
+    limitadores são criados aqui e ficam em app.state: cada aplicação usa os
+    seus, e os módulos não leem get_settings() por conta própria. Nada
+    conecta ao banco antes do lifespan.
+    """
+    settings = settings or get_settings()
+    from . import metrics, rate_limit
+    from .avatars import AvatarFiles, AvatarProcessor
+    from .database import Database
+    from .events import EventBroker
+    from .hashing import PasswordHasher
+    from .notifications import NotificationDispatcher
+    from .principal_cache import PrincipalCache
+    from .response_cache import ResponseCache
+    from .signing_keys import load_key_ring
+    from .simulation import SimulationPool
+
+    app = FastAPI(
+        title="Dungeon Keeper API",
+        description="O motor para o seu universo de RPG.",
+        version="0.1.0",
+        # orjson serializa as respostas (datetime, UUID...) bem mais rápido que o json padrão
+        default_response_class=metrics.TimedORJSONResponse,
+        lifespan=_lifespan(settings),
     )
-    return {"access_token": access_token, "token_type": "bearer"}
-
-# --- Endpoints de Personagem ---
-@app.post("/api/v1/characters", response_model=schemas.Character)
-def create_character_for_current_user(
-    character_in: schemas.CharacterCreate,
-    db: Session = Depends(get_db),
-    current_user: schemas.TokenData = Depends(auth.get_current_user_from_token)
-):
-    return crud.create_character_for_user(db=db, character=character_in, owner_id=current_user.user_id)
-
-@app.get("/api/v1/characters", response_model=List[schemas.Character])
-def get_user_characters(
-    db: Session = Depends(get_db),
-    current_user: schemas.TokenData = Depends(auth.get_current_user_from_token)
-):
-    return crud.get_characters_by_owner(db=db, owner_id=current_user.user_id)
-
-@app.get("/")
-def read_root():
-    return {"status": "Dungeon Keeper API está online!"}
\ No newline at end of file
+    db = Database(settings)
+    app.state.settings = settings
+    app.state.database = db
+    app.state.key_ring = load_key_ring(settings)
+    app.state.principal_cache = PrincipalCache.from_settings(settings)
+    app.state.response_cache = ResponseCache.from_settings(settings)
+    app.state.password_hasher = PasswordHasher.from_settings(settings)
+    app.state.avatar_processor = AvatarProcessor.from_settings(settings)
+    app.state.simulation_pool = SimulationPool.from_settings(settings)
+    app.state.event_broker = EventBroker.from_settings(settings)
+    app.state.notification_dispatcher = NotificationDispatcher(settings, db.SessionLocal)
+    app.state.rate_limiter = rate_limit.RateLimiter.from_settings(settings, db.async_engine)
+    # A admissão das rotas pesadas é pela CPU do worker: um worker, uma aplicação
+    app.state.heavy_routes = rate_limit.ConcurrencyLimiter.from_settings(settings)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Métricas por rota (latência, comandos SQL, tempo de banco) em /metrics, no
+    # formato do Prometheus, e log das consultas acima de SLOW_QUERY_MS
+    if settings.metrics_enabled:
+        metrics.instrument(db.engine, db.async_engine.sync_engine, slow_query_ms=settings.slow_query_ms)
+        app.add_middleware(metrics.MetricsMiddleware, server_timing=settings.server_timing)
+        app.add_api_route("/metrics", metrics.metrics_endpoint, include_in_schema=False)
+
+    # Avatares: variantes WebP endereçadas por hash, com cache imutável (ver avatars.py).
+    # O diretório é criado se não existir; antes, a aplicação nem subia sem ele.
+    avatar_store = app.state.avatar_processor.store
+    avatar_store.ensure_root()
+    app.mount("/avatars", AvatarFiles(directory=avatar_store.root), name="avatars")
+
+    # --- Incluir Roteadores ---
+    for name in ROUTERS:
+        app.include_router(importlib.import_module(f".routers.{name}", __package__).router)
+    return app
+
+
+def __getattr__(name: str):
+    # `uvicorn src.main:app` e `from src.main import app` criam a aplicação padrão só quando pedida
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
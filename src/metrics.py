@@ -0,0 +1,323 @@
+import bisect
+import logging
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "dungeon_keeper"
+# Rótulos de rota fora do roteador da API: arquivos montados, 404, e consultas sem requisição
+UNMATCHED = "other"
+BACKGROUND = "background"
+
+
+# --- CONTEXTO DA REQUISIÇÃO ---
+class RequestStats:
+    """
+    O que uma requisição gastou no banco. Fica num contextvar: o threadpool
+    (endpoints síncronos) e os greenlets do engine assíncrono recebem uma
+    cópia do contexto, que aponta para este mesmo objeto.
+    """
+
+    __slots__ = ("scope", "statements", "db_seconds", "rows", "serialize_seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.serialize_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # O roteador do FastAPI grava a rota casada no scope; o modelo do path mantém a cardinalidade baixa
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or UNMATCHED
+
+    def server_timing(self, total_seconds: float) -> str:
+        app_seconds = max(0.0, total_seconds - self.db_seconds - self.serialize_seconds)
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries", '
+            f"serialize;dur={self.serialize_seconds * 1000:.2f}, "
+            f"app;dur={app_seconds * 1000:.2f}, "
+            f"total;dur={total_seconds * 1000:.2f}"
+        )
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def serialization():
+    """Soma o tempo do bloco à serialização da requisição corrente (Server-Timing)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.serialize_seconds += time.perf_counter() - started
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse que conta o tempo de render como serialização."""
+
+    def render(self, content) -> bytes:
+        with serialization():
+            return super().render(content)
+
+
+# --- REGISTRO (formato texto do Prometheus) ---
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Contadores e histogramas por (método, rota), acumulados desde o início do processo."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        # (método, rota) -> contagem por bucket (não cumulativa) + [+Inf], soma, total
+        self._latency: Dict[Tuple[str, str], List[float]] = {}
+        # (método, rota) -> [comandos SQL, segundos no banco, linhas, comandos lentos]
+        self._db: Dict[Tuple[str, str], List[float]] = {}
+
+    def _db_entry(self, key: Tuple[str, str]) -> List[float]:
+        # Deve ser chamado com o lock adquirido
+        entry = self._db.get(key)
+        if entry is None:
+            entry = self._db[key] = [0, 0.0, 0, 0]
+        return entry
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            status_key = (method, route, str(status))
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            latency[bisect.bisect_left(self.buckets, seconds)] += 1
+            latency[-2] += seconds
+            latency[-1] += 1
+            entry = self._db_entry(key)
+            entry[0] += stats.statements
+            entry[1] += stats.db_seconds
+            entry[2] += stats.rows
+
+    def observe_background_statement(self, seconds: float):
+        with self._lock:
+            entry = self._db_entry(("", BACKGROUND))
+            entry[0] += 1
+            entry[1] += seconds
+
+    def observe_slow_statement(self, method: str, route: str):
+        with self._lock:
+            self._db_entry((method, route))[3] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted((key, list(values)) for key, values in self._latency.items())
+            db = sorted((key, list(values)) for key, values in self._db.items())
+
+        lines = [
+            f"# HELP {PREFIX}_http_requests_total Requisições HTTP atendidas.",
+            f"# TYPE {PREFIX}_http_requests_total counter",
+        ]
+        for (method, route, status), count in requests:
+            lines.append(f"{PREFIX}_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        name = f"{PREFIX}_http_request_duration_seconds"
+        lines += [f"# HELP {name} Latência das requisições HTTP.", f"# TYPE {name} histogram"]
+        for (method, route), values in latency:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(method=method, route=route, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(method=method, route=route)} {values[-2]:.6f}")
+            lines.append(f"{name}_count{_labels(method=method, route=route)} {values[-1]}")
+
+        series = (
+            ("db_statements_total", "Comandos SQL executados.", 0),
+            ("db_seconds_total", "Tempo gasto no banco, em segundos.", 1),
+            ("db_rows_total", "Linhas devolvidas pelo banco (SELECT, RETURNING) ou afetadas por INSERT/UPDATE/DELETE.", 2),
+            ("db_slow_statements_total", "Comandos SQL acima de SLOW_QUERY_MS.", 3),
+        )
+        for suffix, description, index in series:
+            name = f"{PREFIX}_{suffix}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+            for (method, route), values in db:
+                value = f"{values[index]:.6f}" if index == 1 else str(values[index])
+                lines.append(f"{name}{_labels(method=method, route=route)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def metrics_endpoint() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+# --- LOG DE CONSULTAS LENTAS ---
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+# IN (?, ?, ?) expandido pelo SQLAlchemy: o tamanho da lista não muda a consulta
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+MAX_STATEMENT_CHARS = 2000
+
+
+def normalize_statement(statement: str) -> str:
+    """Uma linha, sem literais e com listas de parâmetros colapsadas, para agrupar no log."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement[:MAX_STATEMENT_CHARS]
+
+
+# --- INSTRUMENTAÇÃO ---
+_INFO_KEY = "metrics_started"
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+class _CountingCursor:
+    """
+    Cursor DBAPI que soma as linhas buscadas às da requisição. Trocado em
+    after_cursor_execute, antes do SQLAlchemy montar o resultado: vale para
+    ORM, Core e SQL textual, em qualquer driver.
+    """
+
+    __slots__ = ("_cursor", "_stats")
+
+    def __init__(self, cursor, stats: RequestStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def instrument(*engines: Engine, slow_query_ms: int = 0):
+    """Liga os eventos de cursor nos engines (o assíncrono entra pelo sync_engine)."""
+    slow_seconds = slow_query_ms / 1000 if slow_query_ms > 0 else None
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_INFO_KEY, []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info[_INFO_KEY].pop()
+        stats = _current.get()
+        if stats is None:
+            registry.observe_background_statement(elapsed)
+        else:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+            if cursor.description is not None:
+                # Comandos que devolvem linhas (SELECT, RETURNING): conta ao buscar
+                if context is not None and context.cursor is cursor:
+                    context.cursor = _CountingCursor(cursor, stats)
+            elif cursor.rowcount > 0:
+                # INSERT/UPDATE/DELETE sem RETURNING: linhas afetadas
+                stats.rows += cursor.rowcount
+        if slow_seconds is not None and elapsed >= slow_seconds:
+            method, route = (stats.scope.get("method", ""), stats.route) if stats else ("", BACKGROUND)
+            registry.observe_slow_statement(method, route)
+            logger.warning("Consulta lenta (%.1f ms) em %s: %s", elapsed * 1000, f"{method} {route}".lstrip(),
+                           normalize_statement(statement))
+
+    def handle_error(exception_context):
+        # after_cursor_execute não roda quando o comando falha
+        connection = exception_context.connection
+        if connection is not None and connection.info.get(_INFO_KEY):
+            connection.info[_INFO_KEY].pop()
+
+    # Cada create_app() chama de novo com os seus engines; um engine é instrumentado uma vez só
+    for engine in engines:
+        if engine in _instrumented:
+            continue
+        _instrumented.add(engine)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine, "handle_error", handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro: mede cada requisição HTTP, atribui à rota casada o
+    que ela gastou no banco e, com server_timing, anexa o cabeçalho
+    Server-Timing (db, serialize, app e total) à resposta.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            registry.observe_request(scope["method"], stats.route, status, time.perf_counter() - started, stats)
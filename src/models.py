@@ -1,27 +1,34 @@
-from sqlalchemy import Table, Column, Integer, String, Boolean, ForeignKey, Text
+from sqlalchemy import Table, Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Float, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from .database import Base
 
 # --- TABELAS DE ASSOCIAÇÃO (Muitos-para-Muitos) ---
+# A chave primária (story_id, x_id) já cobre a busca por história; os índices
+# em x_id cobrem o caminho inverso (e.g. Item.stories).
 story_item_association = Table('story_item_association', Base.metadata,
     Column('story_id', String, ForeignKey('stories.id'), primary_key=True),
-    Column('item_id', String, ForeignKey('items.id'), primary_key=True)
+    Column('item_id', String, ForeignKey('items.id'), primary_key=True),
+    Index('ix_story_item_association_item_id', 'item_id')
 )
 
 story_monster_association = Table('story_monster_association', Base.metadata,
     Column('story_id', String, ForeignKey('stories.id'), primary_key=True),
-    Column('monster_id', String, ForeignKey('monsters.id'), primary_key=True)
+    Column('monster_id', String, ForeignKey('monsters.id'), primary_key=True),
+    Index('ix_story_monster_association_monster_id', 'monster_id')
 )
 
 story_npc_association = Table('story_npc_association', Base.metadata,
     Column('story_id', String, ForeignKey('stories.id'), primary_key=True),
-    Column('npc_id', String, ForeignKey('npcs.id'), primary_key=True)
+    Column('npc_id', String, ForeignKey('npcs.id'), primary_key=True),
+    Index('ix_story_npc_association_npc_id', 'npc_id')
 )
 
 # Tabela de associação para registrar jogadores APROVADOS em uma mesa
 table_players_association = Table('table_players_association', Base.metadata,
     Column('table_id', String, ForeignKey('tables.id'), primary_key=True),
-    Column('user_id', String, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', String, ForeignKey('users.id'), primary_key=True),
+    Index('ix_table_players_association_user_id', 'user_id')
 )
 
 class User(Base):
@@ -51,12 +58,17 @@ class User(Base):
 # --- NOVO MODELO TABLE ---
 class Table(Base):
     __tablename__ = "tables"
+    __table_args__ = (
+        # Listagem global paginada por (created_at, id)
+        Index("ix_tables_created_at_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
-    master_id = Column(String, ForeignKey("users.id"))
-    story_id = Column(String, ForeignKey("stories.id"))
+    master_id = Column(String, ForeignKey("users.id"), index=True)
+    story_id = Column(String, ForeignKey("stories.id"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Chave estável de paginação
     
     # Relacionamentos
     master = relationship("User", back_populates="tables")
@@ -69,6 +81,10 @@ class Table(Base):
 # --- NOVO MODELO CHARACTER ---
 class Character(Base):
     __tablename__ = "characters"
+    __table_args__ = (
+        # Filtro por dono + ordem de paginação num único índice
+        Index("ix_characters_owner_id_created_at", "owner_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -76,6 +92,7 @@ class Character(Base):
     character_class = Column(String)
     level = Column(Integer, default=1)
     owner_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamento
     owner = relationship("User", back_populates="characters")
@@ -83,6 +100,9 @@ class Character(Base):
 # --- NOVO MODELO ITEM ---
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_creator_id_created_at", "creator_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -90,6 +110,7 @@ class Item(Base):
     type = Column(String, default="Mundane")  # Ex: 'Weapon', 'Armor', 'Potion', 'Mundane'
     rarity = Column(String, default="Common")  # Ex: 'Common', 'Uncommon', 'Rare'
     creator_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamento
     creator = relationship("User", back_populates="items")
@@ -98,6 +119,12 @@ class Item(Base):
 # --- NOVO MODELO MONSTER ---
 class Monster(Base):
     __tablename__ = "monsters"
+    __table_args__ = (
+        Index("ix_monsters_creator_id_created_at", "creator_id", "created_at", "id"),
+        # Filtros por faixa de CR e montagem de encontros por orçamento de XP
+        Index("ix_monsters_creator_id_cr_value", "creator_id", "cr_value"),
+        Index("ix_monsters_creator_id_xp", "creator_id", "xp"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -108,7 +135,15 @@ class Monster(Base):
     speed = Column(String)  # Ex: "30 ft."
     actions = Column(Text)  # Para descrições longas de ataques/habilidades
     challenge_rating = Column(String)  # Ex: "1/2" ou "5"
+    # Valores numéricos derivados de hit_points/challenge_rating (ver statblock.py)
+    hp_average = Column(Integer, nullable=True)
+    hp_dice_count = Column(Integer, nullable=True)
+    hp_dice_size = Column(Integer, nullable=True)
+    hp_modifier = Column(Integer, nullable=True)
+    cr_value = Column(Float, nullable=True)
+    xp = Column(Integer, nullable=True)
     creator_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamento
     creator = relationship("User", back_populates="monsters")
@@ -117,6 +152,9 @@ class Monster(Base):
 # --- NOVO MODELO NPC ---
 class NPC(Base):
     __tablename__ = "npcs"
+    __table_args__ = (
+        Index("ix_npcs_creator_id_created_at", "creator_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -125,19 +163,24 @@ class NPC(Base):
     location = Column(String)  # Ex: "Taverna do Pônei Saltitante"
     notes = Column(Text)  # Notas secretas para o mestre
     creator_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamento
     creator = relationship("User", back_populates="npcs")
-    stories = relationship("Story", secondary=story_npc_association, back_populates="stories")
+    stories = relationship("Story", secondary=story_npc_association, back_populates="npcs")
 
 # --- NOVO MODELO STORY ---
 class Story(Base):
     __tablename__ = "stories"
+    __table_args__ = (
+        Index("ix_stories_creator_id_created_at", "creator_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     title = Column(String, index=True)
     synopsis = Column(Text)
     creator_id = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamentos
     creator = relationship("User", back_populates="stories")
@@ -149,11 +192,86 @@ class Story(Base):
 # Tabela para registrar solicitações PENDENTES
 class JoinRequest(Base):
     __tablename__ = "join_requests"
+    __table_args__ = (
+        # Fila de pendentes da mesa, paginada
+        Index("ix_join_requests_table_id_status", "table_id", "status", "created_at", "id"),
+        Index("ix_join_requests_user_id", "user_id"),
+        # No máximo uma solicitação pendente por usuário em cada mesa
+        Index(
+            "uq_join_requests_pending",
+            "table_id", "user_id",
+            unique=True,
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
     
     id = Column(String, primary_key=True, index=True)
     table_id = Column(String, ForeignKey("tables.id"))
     user_id = Column(String, ForeignKey("users.id"))
     status = Column(String, default="pending")  # pending, approved, declined
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relacionamento
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+# --- VERSÕES DE CONTEÚDO (ETag / cache de respostas, ver versions.py) ---
+# Um contador por escopo ("tables", "items:<user_id>", ...), incrementado na
+# mesma transação de cada escrita que muda as listagens daquele escopo.
+class ContentVersion(Base):
+    __tablename__ = "content_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# --- OUTBOX DE NOTIFICAÇÕES (ver notifications.py) ---
+# Gravada na mesma transação do evento que a origina; o dispatcher em segundo
+# plano envia os e-mails, agrupados por destinatário.
+class Notification(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Fila do dispatcher: só as pendentes, pela próxima tentativa
+        Index(
+            "ix_notification_outbox_pending",
+            "available_at", "id",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index("ix_notification_outbox_claim_token", "claim_token"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # join_request, request_approved, new_story
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String, nullable=False, default="pending")  # pending, sent, failed, skipped
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Próxima tentativa
+    claim_token = Column(String, nullable=True)  # Worker que reservou a linha
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+
+# --- LIMITES POR CLIENTE (ver rate_limit.py, RATE_LIMIT_BACKEND=database) ---
+# Um token bucket por chave, compartilhado por todos os workers
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)  # time.time() do último acesso
+
+# --- PACOTES DE CAMPANHA (ver campaign_packs.py) ---
+# A história com todo o conteúdo vinculado, já serializada e comprimida
+class CampaignPack(Base):
+    __tablename__ = "campaign_packs"
+
+    story_id = Column(String, ForeignKey("stories.id"), primary_key=True)
+    variant = Column(String, primary_key=True)  # "full" ou "player" (sem NPC.notes)
+    source_version = Column(Integer, nullable=False)  # Versão do escopo campaign_pack:<story_id> usada no build
+    content_hash = Column(String, nullable=False)  # blake2b do JSON, vira o ETag
+    size = Column(Integer, nullable=False)  # Bytes do JSON descomprimido
+    body = Column(LargeBinary, nullable=False)  # JSON em gzip
+    built_at = Column(DateTime, default=datetime.utcnow, nullable=False)
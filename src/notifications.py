@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import smtplib
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY_SECONDS = 3600
+
+# Preferência do destinatário que libera cada tipo de notificação
+PREFERENCES = {
+    "join_request": "notify_on_join_request",
+    "request_approved": "notify_on_request_approved",
+    "new_story": "notify_on_new_story",
+}
+
+SUBJECTS = {
+    "join_request": "Nova solicitação para a sua mesa",
+    "request_approved": "Sua entrada na mesa foi aprovada",
+    "new_story": "Nova história do seu mestre",
+}
+
+
+def _render(kind: str, payload: dict) -> str:
+    if kind == "join_request":
+        return f'{payload["username"]} pediu para entrar na mesa "{payload["table_title"]}".'
+    if kind == "request_approved":
+        return f'Seu pedido para entrar na mesa "{payload["table_title"]}" foi aprovado.'
+    return f'{payload["master"]} publicou a história "{payload["story_title"]}".'
+
+
+# --- ENFILEIRAMENTO (chamado pelo crud, antes do commit) ---
+# `settings` são as da aplicação (as mesmas do dispatcher); None, como em
+# scripts e no CLI, não enfileira nada.
+def enabled(settings: Optional[Settings]) -> bool:
+    return settings is not None and bool(settings.smtp_host)
+
+
+def enqueue(settings: Optional[Settings], db: Session, recipient_ids: Iterable[str], kind: str, **payload):
+    """
+    Grava uma notificação por destinatário na transação corrente. Quem
+    desligou a preferência correspondente fica de fora; o dispatcher confere
+    de novo na hora do envio.
+    """
+    recipient_ids = set(filter(None, recipient_ids))
+    if not recipient_ids or not enabled(settings):
+        return
+    preference = getattr(models.User, PREFERENCES[kind])
+    wanted = db.execute(
+        select(models.User.id).where(models.User.id.in_(recipient_ids), preference.isnot(False))
+    ).scalars().all()
+    if not wanted:
+        return
+    # A janela de agrupamento junta várias solicitações num único e-mail
+    available_at = datetime.utcnow() + timedelta(seconds=settings.notification_digest_seconds)
+    body = json.dumps(payload)
+    db.execute(insert(models.Notification), [
+        {"recipient_id": recipient_id, "kind": kind, "payload": body, "status": "pending",
+         "attempts": 0, "available_at": available_at}
+        for recipient_id in wanted
+    ])
+
+
+def join_request_created(settings: Optional[Settings], db: Session, table_id: str, user_id: str):
+    if not enabled(settings):
+        return
+    table = db.get(models.Table, table_id)
+    user = db.get(models.User, user_id)
+    if table is not None and user is not None:
+        enqueue(settings, db, [table.master_id], "join_request", table_id=table_id, table_title=table.title, username=user.username)
+
+
+def requests_approved(settings: Optional[Settings], db: Session, table_id: str, user_ids: Iterable[str]):
+    if not enabled(settings):
+        return
+    table = db.get(models.Table, table_id)
+    if table is not None:
+        enqueue(settings, db, user_ids, "request_approved", table_id=table_id, table_title=table.title)
+
+
+def story_created(settings: Optional[Settings], db: Session, story: models.Story):
+    """Avisa os jogadores das mesas que o autor da história mestra."""
+    if not enabled(settings):
+        return
+    players = models.table_players_association
+    player_ids = db.execute(
+        select(players.c.user_id).distinct()
+        .join(models.Table, models.Table.id == players.c.table_id)
+        .where(models.Table.master_id == story.creator_id)
+    ).scalars().all()
+    master = db.get(models.User, story.creator_id)
+    enqueue(settings, db, player_ids, "new_story", story_id=story.id, story_title=story.title,
+            master=master.username if master else "")
+
+
+# --- ENVIO ---
+class SmtpSender:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+    def __call__(self, message: EmailMessage):
+        settings = self.settings
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds) as smtp:
+            if settings.smtp_starttls:
+                smtp.starttls()
+            if settings.smtp_username:
+                smtp.login(settings.smtp_username, settings.smtp_password)
+            smtp.send_message(message)
+
+
+def compose_digest(user: models.User, notifications: List[models.Notification], sender: str) -> EmailMessage:
+    """Um e-mail por destinatário com tudo o que estava pendente para ele."""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = user.email
+    if len(notifications) == 1:
+        message["Subject"] = SUBJECTS[notifications[0].kind]
+    else:
+        message["Subject"] = f"Dungeon Keeper: {len(notifications)} novidades"
+    lines = [f"Olá, {user.username}!", ""]
+    lines += [f"- {_render(n.kind, json.loads(n.payload))}" for n in notifications]
+    lines += ["", "Você pode mudar estas preferências no seu perfil."]
+    message.set_content("\n".join(lines))
+    return message
+
+
+class NotificationDispatcher:
+    """
+    Esvazia a outbox em segundo plano. Cada rodada reserva um lote de
+    destinatários (UPDATE condicional com um token próprio, então vários
+    workers não enviam a mesma linha) e manda um e-mail por pessoa com tudo
+    o que estava pendente para ela.
+    Falhas voltam para a fila com backoff exponencial até o limite de
+    tentativas. Uma reserva abandonada (worker que caiu) expira após o lease.
+    """
+
+    def __init__(self, settings: Settings, session_factory: Callable[[], Session],
+                 sender: Optional[Callable[[EmailMessage], None]] = None):
+        self.settings = settings
+        self.sender = sender or SmtpSender(settings)
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.emails = 0
+        self.retried = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _retry_delay(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(MAX_RETRY_DELAY_SECONDS, self.settings.notification_retry_base_seconds * 2 ** (attempts - 1)))
+
+    def _claim(self, db: Session, now: datetime) -> List[models.Notification]:
+        """
+        Reserva as notificações dos destinatários com alguma linha vencida.
+        A janela conta a partir da mais antiga: junto com ela vêm as novas do
+        mesmo destinatário ainda dentro da janela, num e-mail só. As que estão
+        em backoff ou reservadas por outro worker esperam a vez delas.
+        """
+        token = uuid.uuid4().hex
+        due = (
+            select(models.Notification.recipient_id)
+            .where(models.Notification.status == "pending", models.Notification.available_at <= now)
+            .group_by(models.Notification.recipient_id)
+            .order_by(func.min(models.Notification.available_at))
+            .limit(self.settings.notification_batch_size)
+        )
+        db.execute(
+            update(models.Notification)
+            .where(
+                models.Notification.recipient_id.in_(due.scalar_subquery()),
+                models.Notification.status == "pending",
+                or_(
+                    models.Notification.available_at <= now,
+                    and_(models.Notification.attempts == 0, models.Notification.claim_token.is_(None)),
+                ),
+            )
+            .values(claim_token=token, available_at=now + timedelta(seconds=self.settings.notification_lease_seconds)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        return db.query(models.Notification).filter(models.Notification.claim_token == token).order_by(
+            models.Notification.recipient_id, models.Notification.id
+        ).all()
+
+    def dispatch_once(self) -> int:
+        """Processa um lote; retorna quantas notificações foram reservadas."""
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            claimed = self._claim(db, now)
+            if not claimed:
+                return 0
+            users: Dict[str, models.User] = {
+                user.id: user for user in db.query(models.User).filter(
+                    models.User.id.in_({notification.recipient_id for notification in claimed})
+                )
+            }
+            for recipient_id, group in groupby(claimed, key=lambda notification: notification.recipient_id):
+                self._deliver(db, users.get(recipient_id), list(group))
+                db.commit()
+            return len(claimed)
+
+    def _deliver(self, db: Session, user: Optional[models.User], notifications: List[models.Notification]):
+        now = datetime.utcnow()
+        wanted = []
+        for notification in notifications:
+            notification.claim_token = None
+            if user and user.is_active and user.email and getattr(user, PREFERENCES[notification.kind]) is not False:
+                wanted.append(notification)
+            else:
+                notification.status = "skipped"
+                self.skipped += 1
+        if not wanted:
+            return
+        try:
+            self.sender(compose_digest(user, wanted, self.settings.mail_from))
+        except Exception as e:
+            logger.warning("Falha ao enviar notificações para %s: %s", user.id, e)
+            for notification in wanted:
+                notification.attempts += 1
+                notification.last_error = str(e)[:1000]
+                if notification.attempts >= self.settings.notification_max_attempts:
+                    notification.status = "failed"
+                    self.failed += 1
+                else:
+                    notification.available_at = now + self._retry_delay(notification.attempts)
+                    self.retried += 1
+            return
+        for notification in wanted:
+            notification.status = "sent"
+            notification.sent_at = now
+        self.sent += len(wanted)
+        self.emails += 1
+
+    # --- Ciclo de vida (startup/shutdown do FastAPI) ---
+    async def _run(self):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.dispatch_once)
+            except Exception:
+                logger.exception("Erro no dispatcher de notificações")
+                claimed = 0
+            if claimed < self.settings.notification_batch_size:
+                await asyncio.sleep(self.settings.notification_poll_seconds)
+
+    async def start(self):
+        if not self.settings.smtp_host:
+            logger.info("SMTP_HOST não configurado: notificações por e-mail desligadas")
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> dict:
+        with self.session_factory() as db:
+            pending = db.execute(
+                select(func.count()).select_from(models.Notification).where(models.Notification.status == "pending")
+            ).scalar()
+        return {
+            "enabled": bool(self.settings.smtp_host),
+            "pending": pending,
+            "sent": self.sent,
+            "emails": self.emails,
+            "retried": self.retried,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
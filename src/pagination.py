@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou adulterado."""
+
+
+# --- CURSORES OPACOS ---
+# O cursor codifica a chave de ordenação estável (created_at, id) do último
+# registro da página. O cliente só precisa devolvê-lo como está.
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _keyset(query, model, cursor: Optional[str], limit: int, skip: Optional[int]):
+    # Funciona tanto com Query (sessão síncrona) quanto com select() (AsyncSession)
+    query = query.order_by(model.created_at, model.id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) > tuple_(created_at, row_id))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def _split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def paginate(query: OrmQuery, model, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             skip: Optional[int] = None) -> Tuple[List, Optional[str]]:
+    """
+    Pagina `query` por (created_at, id) e retorna (registros, próximo cursor).
+
+    Com `cursor`, usa keyset: `WHERE (created_at, id) > (:ts, :id)`, que usa o
+    índice e não degrada em páginas profundas. `skip` mantém o modo antigo por
+    OFFSET para compatibilidade; ambos devolvem `next_cursor`.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = _keyset(query, model, cursor, limit, skip).all()
+    return _split_page(rows, limit)
+
+
+async def paginate_async(db: AsyncSession, stmt: Select, model, cursor: Optional[str] = None,
+                         limit: int = DEFAULT_PAGE_SIZE, skip: Optional[int] = None,
+                         scalars: bool = True) -> Tuple[List, Optional[str]]:
+    """
+    Igual a paginate, para um select() executado numa AsyncSession. Com
+    `scalars=False` devolve as linhas (select de colunas) em vez de entidades.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    result = await db.execute(_keyset(stmt, model, cursor, limit, skip))
+    return _split_page(list(result.scalars() if scalars else result), limit)
+
+
+# --- Dependência FastAPI com os parâmetros de paginação ---
+class PageParams:
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor devolvido em `next_cursor` pela página anterior"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        skip: Optional[int] = Query(None, ge=0, description="Paginação por OFFSET (compatibilidade)"),
+    ):
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except InvalidCursor:
+                raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+        self.cursor = cursor
+        self.limit = limit
+        self.skip = skip
+
+    def as_kwargs(self) -> dict:
+        return {"cursor": self.cursor, "limit": self.limit, "skip": self.skip}
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from starlette.requests import HTTPConnection
+
+from . import schemas
+from .config import Settings
+
+
+class PrincipalCache:
+    """
+    Cache LRU com TTL dos usuários autenticados, indexado pelo token JWT.
+
+    Evita uma consulta à tabela `users` (e a decodificação do JWT) a cada
+    requisição protegida. A validade de cada entrada é o menor valor entre o
+    TTL configurado e o `exp` do próprio token.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[float, schemas.AuthenticatedUser]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PrincipalCache":
+        return cls(max_entries=settings.auth_cache_max_entries, ttl_seconds=settings.auth_cache_ttl_seconds)
+
+    def get(self, token: str) -> Optional[schemas.AuthenticatedUser]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= self._clock():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: schemas.AuthenticatedUser, token_exp: Optional[float] = None):
+        """Armazena o usuário; `token_exp` é o timestamp UNIX do claim `exp`."""
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (self._clock() + ttl, principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        """Descarta todas as entradas de um usuário (perfil alterado, conta desativada...)."""
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, set()):
+                if self._entries.pop(token, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, token: str):
+        # Deve ser chamado com o lock adquirido
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+
+def get_principal_cache(connection: HTTPConnection) -> PrincipalCache:
+    """Dependência: o cache de autenticação da aplicação (app.state.principal_cache)."""
+    return connection.app.state.principal_cache
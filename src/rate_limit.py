@@ -0,0 +1,365 @@
+"""
+Limites por cliente e controle de admissão das rotas caras.
+
+- Limites (429): um token bucket por política e identidade (IP, nome de
+  usuário, id do usuário). "10/60" dá 10 fichas que voltam ao ritmo de uma a
+  cada 6 s; cada requisição gasta uma ficha de cada identidade, e só quando
+  todas têm ficha (uma recusada não gasta nada).
+  RATE_LIMIT_BACKEND=memory guarda os buckets no worker (com N workers, o
+  limite efetivo é até N vezes maior); "database" os guarda na tabela
+  rate_limit_buckets, compartilhada por todos.
+- Admissão (503): no máximo HEAVY_MAX_CONCURRENCY requisições pesadas por
+  worker em execução e HEAVY_MAX_QUEUE esperando; além disso, ou depois de
+  HEAVY_QUEUE_TIMEOUT_SECONDS na fila, a resposta é 503 com Retry-After.
+
+O IP é o de request.client: atrás de proxy, rode o uvicorn com
+--proxy-headers/--forwarded-allow-ips para que seja o do cliente.
+"""
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import HTTPConnection
+
+from . import auth, models, schemas
+from .config import Settings
+
+# Buckets parados há mais que isso já estão cheios e podem ser apagados
+STALE_SECONDS = 24 * 3600
+_CLEANUP_EVERY = 1000
+
+
+# --- POLÍTICAS ---
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    capacity: int
+    period: float  # Segundos para encher o bucket vazio
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_policy(name: str, spec: str) -> Optional[Policy]:
+    """"10/60" -> 10 requisições por 60 s; vazio ou "0" desliga."""
+    spec = spec.strip()
+    if spec in ("", "0"):
+        return None
+    count, separator, seconds = spec.partition("/")
+    try:
+        policy = Policy(name, int(count), float(seconds))
+    except ValueError:
+        policy = None
+    if not separator or policy is None or policy.capacity < 1 or policy.period <= 0:
+        raise ValueError(f"Limite inválido para {name!r}: {spec!r} (esperado N/segundos)")
+    return policy
+
+
+def policies_from_settings(settings: Settings) -> Dict[str, Policy]:
+    specs = {
+        "login": settings.rate_limit_login,
+        "register": settings.rate_limit_register,
+        "backup_import": settings.rate_limit_backup_import,
+    }
+    return {name: policy for name, spec in specs.items() if (policy := parse_policy(name, spec))}
+
+
+# --- BACKENDS ---
+def _refill(policy: Policy, tokens: float, updated_at: float, now: float) -> float:
+    return min(policy.capacity, tokens + max(0.0, now - updated_at) * policy.rate)
+
+
+def _wait(policy: Policy, tokens: float) -> float:
+    return 0.0 if tokens >= 1 else (1 - tokens) / policy.rate
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, keys: List[str], policy: Policy, now: float) -> float:
+        """
+        Tudo ou nada: se todos os buckets têm ficha, gasta uma de cada e
+        retorna 0; senão não gasta nenhuma e retorna os segundos até haver.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets no próprio worker, num LRU limitado a max_keys."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, keys: List[str], policy: Policy, now: float) -> float:
+        with self._lock:
+            tokens = {}
+            for key in keys:
+                stored, updated_at = self._buckets.pop(key, (policy.capacity, now))
+                tokens[key] = _refill(policy, stored, updated_at, now)
+            wait = max(_wait(policy, value) for value in tokens.values())
+            spent = 1 if wait == 0 else 0
+            for key, value in tokens.items():
+                self._buckets[key] = (value - spent, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class DatabaseBackend(RateLimitBackend):
+    """
+    Buckets na tabela rate_limit_buckets, pelo engine assíncrono da
+    aplicação. Cria os que faltam, lê todos travados (FOR UPDATE; no SQLite o
+    INSERT já toma a trava de escrita) e só então gasta, tudo numa transação:
+    workers concorrentes não gastam a mesma ficha nem veem metade do consumo.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._takes = 0
+
+    async def take(self, keys: List[str], policy: Policy, now: float) -> float:
+        table = models.RateLimitBucket.__table__
+        keys = sorted(set(keys))  # Ordem fixa de travamento entre transações
+        async with self.engine.begin() as connection:
+            self._takes += 1
+            if self._takes % _CLEANUP_EVERY == 0:
+                await connection.execute(delete(table).where(table.c.updated_at < now - STALE_SECONDS))
+            await self._create_missing(connection, table, keys, policy.capacity, now)
+            rows = (await connection.execute(
+                select(table.c.key, table.c.tokens, table.c.updated_at)
+                .where(table.c.key.in_(keys))
+                .order_by(table.c.key)
+                .with_for_update()
+            )).all()
+            tokens = {row.key: _refill(policy, row.tokens, row.updated_at, now) for row in rows}
+            wait = max(_wait(policy, value) for value in tokens.values())
+            if wait > 0:
+                return wait
+            await connection.execute(
+                update(table).where(table.c.key == bindparam("bucket")).values(tokens=bindparam("remaining"), updated_at=now),
+                [{"bucket": key, "remaining": value - 1} for key, value in tokens.items()],
+            )
+        return 0.0
+
+    @staticmethod
+    async def _create_missing(connection, table, keys: List[str], tokens: float, now: float):
+        rows = [{"key": key, "tokens": tokens, "updated_at": now} for key in keys]
+        dialect = connection.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            factory = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            await connection.execute(factory(table).values(rows).on_conflict_do_nothing(index_elements=[table.c.key]))
+            return
+        for row in rows:
+            try:
+                async with connection.begin_nested():
+                    await connection.execute(insert(table).values(**row))
+            except IntegrityError:
+                pass
+
+
+def create_backend(settings: Settings, engine: AsyncEngine) -> RateLimitBackend:
+    if settings.rate_limit_backend == "database":
+        return DatabaseBackend(engine)
+    if settings.rate_limit_backend != "memory":
+        raise ValueError(f"RATE_LIMIT_BACKEND desconhecido: {settings.rate_limit_backend!r}")
+    return MemoryBackend(settings.rate_limit_max_keys)
+
+
+# --- LIMITADOR ---
+def _identity(value: str) -> str:
+    # Nomes de usuário vêm do corpo da requisição: tamanho fixo e nada legível na tabela
+    return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, policies: Dict[str, Policy], enabled: bool = True):
+        self.backend = backend
+        self.policies = policies
+        self.enabled = enabled
+        self._allowed: Dict[str, int] = {}
+        self._limited: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings, engine: AsyncEngine) -> "RateLimiter":
+        return cls(create_backend(settings, engine), policies_from_settings(settings), enabled=settings.rate_limit_enabled)
+
+    async def hit(self, policy_name: str, **identities: Optional[str]):
+        """
+        Gasta uma ficha de cada identidade; levanta 429, sem gastar nenhuma,
+        se alguma estiver sem. Assim, tentativas contra um nome de usuário
+        recusadas não consomem o limite do IP de quem as faz, e vice-versa.
+        """
+        policy = self.policies.get(policy_name)
+        if not self.enabled or policy is None:
+            return
+        keys = [f"{policy.name}:{kind}:{_identity(value)}" for kind, value in identities.items() if value]
+        if not keys:
+            return
+        wait = await self.backend.take(keys, policy, time.time())
+        if wait > 0:
+            self._limited[policy.name] = self._limited.get(policy.name, 0) + 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas requisições, tente novamente mais tarde",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        self._allowed[policy.name] = self._allowed.get(policy.name, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "policies": {
+                name: {
+                    "limit": f"{policy.capacity}/{policy.period:g}",
+                    "allowed": self._allowed.get(name, 0),
+                    "limited": self._limited.get(name, 0),
+                }
+                for name, policy in self.policies.items()
+            },
+        }
+
+
+def get_limiter(connection: HTTPConnection) -> RateLimiter:
+    """Dependência: o limitador da aplicação (app.state.rate_limiter)."""
+    return connection.app.state.rate_limiter
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def limit(policy_name: str, per_user: bool = False):
+    """Dependência: aplica a política ao IP do cliente e, com per_user, ao usuário do token."""
+    if per_user:
+        async def dependency(
+            request: Request, current_user: schemas.TokenData = Depends(auth.get_current_user_from_token)
+        ):
+            await get_limiter(request).hit(policy_name, ip=client_ip(request), user=current_user.user_id)
+    else:
+        async def dependency(request: Request):
+            await get_limiter(request).hit(policy_name, ip=client_ip(request))
+    return dependency
+
+
+# --- ADMISSÃO DAS ROTAS PESADAS ---
+class Overloaded(Exception):
+    """Sem vaga nem lugar na fila (ou a espera expirou)."""
+
+
+class ConcurrencyLimiter:
+    """
+    Semáforo com fila limitada, usado só do event loop. Quem sai passa a vaga
+    direto ao primeiro da fila. Não guarda o loop: vale para qualquer um.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ConcurrencyLimiter":
+        return cls(settings.heavy_max_concurrency, settings.heavy_max_queue, settings.heavy_queue_timeout_seconds)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    async def acquire(self):
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise Overloaded()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            # asyncio.wait não cancela o waiter no timeout nem engole o cancelamento da tarefa
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # release() já passou a vaga para cá (e.g. o cliente desconectou): devolve
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        if not waiter.done():
+            waiter.cancel()
+            self.timeouts += 1
+            raise Overloaded()
+        self.admitted += 1
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "timeouts": self.timeouts,
+        }
+
+
+def get_heavy_routes(connection: HTTPConnection) -> ConcurrencyLimiter:
+    """A admissão das rotas pesadas da aplicação (app.state.heavy_routes), uma por worker."""
+    return connection.app.state.heavy_routes
+
+
+async def heavy_route(request: Request):
+    """Dependência das rotas pesadas: espera vaga ou responde 503."""
+    heavy_routes = get_heavy_routes(request)
+    if not heavy_routes.enabled:
+        yield
+        return
+    try:
+        await heavy_routes.acquire()
+    except Overloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": str(max(1, math.ceil(heavy_routes.queue_timeout)))},
+        )
+    try:
+        yield
+    finally:
+        heavy_routes.release()
+
+
+def stats(limiter: RateLimiter, heavy_routes: ConcurrencyLimiter) -> dict:
+    return {"rate_limits": limiter.stats(), "heavy_routes": heavy_routes.stats()}
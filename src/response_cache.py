@@ -0,0 +1,162 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from starlette.requests import HTTPConnection
+
+from .config import Settings
+from .metrics import serialization
+
+# Respostas autenticadas: o navegador pode guardar, mas sempre revalida com If-None-Match
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+class ResponseCache:
+    """
+    Cache LRU dos corpos JSON já serializados, limitado pelo total de bytes.
+
+    A chave é (endpoint com query string, usuário) e cada entrada guarda o
+    ETag com que foi gerada: uma versão nova não casa com o ETag guardado, e a
+    entrada velha é descartada na hora em vez de esperar a evicção.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResponseCache":
+        return cls(max_bytes=settings.response_cache_max_bytes, max_entry_bytes=settings.response_cache_max_entry_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Tuple[str, str], etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != etag:
+                self._remove(key)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], etag: str, body: bytes):
+        if not self.enabled or len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (etag, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "stale": self.stale,
+            }
+
+    def _remove(self, key: Tuple[str, str]):
+        # Deve ser chamado com o lock adquirido
+        _, body = self._entries.pop(key)
+        self._size -= len(body)
+
+
+def get_response_cache(connection: HTTPConnection) -> ResponseCache:
+    """O cache de respostas da aplicação (app.state.response_cache)."""
+    return connection.app.state.response_cache
+
+
+# --- GET CONDICIONAL ---
+def make_etag(versions: Dict[str, int], user_id: str, variant: str = "") -> str:
+    """ETag fraco das versões dos escopos, do usuário e da variante (query string)."""
+    source = "|".join([user_id, variant] + [f"{name}={version}" for name, version in sorted(versions.items())])
+    return 'W/"%s"' % hashlib.blake2b(source.encode(), digest_size=12).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match com comparação fraca (RFC 9110): o prefixo W/ é ignorado."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _lookup(request: Request, user_id: str, versions: Dict[str, int]):
+    etag = make_etag(versions, user_id, request.url.query)
+    headers = {"ETag": etag, **CACHE_HEADERS}
+    if etag_matches(request, etag):
+        return etag, Response(status_code=304, headers=headers)
+    key = (f"{request.url.path}?{request.url.query}", user_id)
+    response_cache = get_response_cache(request)
+    body = response_cache.get(key, etag) if response_cache.enabled else None
+    if body is not None:
+        return etag, Response(content=body, media_type="application/json", headers=headers)
+    return etag, None
+
+
+def _store(request: Request, user_id: str, etag: str, payload, model: Optional[Type[BaseModel]]) -> Response:
+    if isinstance(payload, Response):
+        body = payload.body
+    else:
+        with serialization():
+            body = model.model_validate(payload, from_attributes=True).model_dump_json().encode()
+    get_response_cache(request).put((f"{request.url.path}?{request.url.query}", user_id), etag, body)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, **CACHE_HEADERS})
+
+
+def cached_response(request: Request, user_id: str, versions: Dict[str, int],
+                    build: Callable[[], object], model: Optional[Type[BaseModel]] = None) -> Response:
+    """
+    Responde 304 se o If-None-Match casa com o ETag das versões, ou o corpo do
+    cache se houver; só então chama `build`. `build` devolve o payload do
+    `model` (o response_model do endpoint) ou uma Response já serializada.
+    """
+    etag, response = _lookup(request, user_id, versions)
+    if response is not None:
+        return response
+    return _store(request, user_id, etag, build(), model)
+
+
+async def cached_response_async(request: Request, user_id: str, versions: Dict[str, int],
+                                build: Callable[[], Awaitable[object]], model: Optional[Type[BaseModel]] = None) -> Response:
+    """Igual a cached_response, com `build` assíncrono."""
+    etag, response = _lookup(request, user_id, versions)
+    if response is not None:
+        return response
+    return _store(request, user_id, etag, await build(), model)
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import async_crud, schemas, auth, database, rate_limit
+from ..hashing import PasswordHasher, get_password_hasher
+from ..signing_keys import KeyRing
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["auth"]
+)
+
+@router.post("/register", response_model=schemas.UserBase, dependencies=[Depends(rate_limit.limit("register"))])
+async def register_user(
+    user_in: schemas.UserCreate,
+    db: AsyncSession = Depends(database.get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher)
+):
+    db_user = await async_crud.get_user_by_username(db, username=user_in.username)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Username already registered")
+    hashed_password = await auth.hash_password_async(user_in.password, hasher)
+    created_user = await async_crud.create_user(db=db, user=user_in, hashed_password=hashed_password)
+    return schemas.UserBase(username=created_user.username, email=created_user.email)
+
+@router.post("/token", response_model=schemas.Token)
+async def login_for_access_token(
+    request: Request,
+    form_data: schemas.TokenRequestForm,
+    db: AsyncSession = Depends(database.get_async_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    limiter: rate_limit.RateLimiter = Depends(rate_limit.get_limiter),
+    key_ring: KeyRing = Depends(auth.get_key_ring)
+):
+    # Por IP e por conta: limita tanto um cliente quanto tentativas distribuídas contra um usuário
+    await limiter.hit("login", ip=rate_limit.client_ip(request), username=form_data.username)
+    # Esta chamada deve usar a função centralizada do módulo auth
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password, hasher)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Nome de usuário ou senha incorretos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": user.username, "user_id": user.id}, key_ring=key_ring, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Literal
 import json
-from .. import crud, schemas, auth, database
+from .. import crud, schemas, auth, database, backup_export, backup_import, rate_limit
 
 router = APIRouter(
     prefix="/api/v1/backup",
@@ -15,86 +17,81 @@ def export_user_data(
     current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Exporta todos os dados criados pelo usuário logado."""
-    # Usamos as funções CRUD que já existem!
-    characters = crud.get_user_characters(db, user_id=current_user.id)
-    items = crud.get_user_items(db, user_id=current_user.id)
-    monsters = crud.get_user_monsters(db, user_id=current_user.id)
-    npcs = crud.get_user_npcs(db, user_id=current_user.id)
-    stories = crud.get_user_stories(db, user_id=current_user.id)
-    
+    # Iteradores em lote: sem o limite de 100 registros das listagens.
+    # Para contas grandes, prefira /export/stream.
     backup_data = schemas.UserBackup(
-        characters=characters,
-        items=items,
-        monsters=monsters,
-        npcs=npcs,
-        stories=stories
+        characters=list(crud.iter_user_characters(db, user_id=current_user.id)),
+        items=list(crud.iter_user_items(db, user_id=current_user.id)),
+        monsters=list(crud.iter_user_monsters(db, user_id=current_user.id)),
+        npcs=list(crud.iter_user_npcs(db, user_id=current_user.id)),
+        stories=list(crud.iter_user_stories(db, user_id=current_user.id))
     )
     return backup_data
 
-@router.post("/import")
+@router.get("/export/stream")
+def stream_user_data(
+    request: Request,
+    format: Literal["ndjson", "json"] = "ndjson",
+    compress: bool = Query(False, description="Envia o arquivo comprimido com gzip"),
+    batch_size: int = Query(backup_export.DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Exporta os dados do usuário em streaming, com memória constante."""
+    filename = f"dungeon-keeper-backup.{format}"
+    media_type = backup_export.MEDIA_TYPES[format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        backup_export.stream_user_backup(
+            database.app_database(request).SessionLocal, current_user.id,
+            fmt=format, compress=compress, batch_size=batch_size,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/import", dependencies=[Depends(rate_limit.limit("backup_import", per_user=True)), Depends(rate_limit.heavy_route)])
 def import_user_data(
     file: UploadFile = File(...),
+    format: Literal["auto", "json", "ndjson"] = "auto",
+    strict: bool = Query(False, description="Cancela a importação inteira se algum registro for inválido"),
+    batch_size: int = Query(backup_import.DEFAULT_BATCH_SIZE, ge=1, le=5000),
     db: Session = Depends(database.get_db),
-    current_user: schemas.User = Depends(auth.get_current_active_user)
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
 ):
-    """Importa dados de um arquivo de backup JSON para o usuário logado."""
-    try:
-        contents = file.file.read()
-        backup_data = json.loads(contents)
-        
-        imported_count = 0
-        
-        # Importar itens
-        if "items" in backup_data:
-            for item_data in backup_data["items"]:
-                # Remove campos que não devem ser importados
-                item_data.pop("id", None)
-                item_data.pop("owner_id", None)
-                item_schema = schemas.ItemCreate(**item_data)
-                crud.create_user_item(db=db, item=item_schema, user_id=current_user.id)
-                imported_count += 1
-        
-        # Importar monstros
-        if "monsters" in backup_data:
-            for monster_data in backup_data["monsters"]:
-                monster_data.pop("id", None)
-                monster_data.pop("owner_id", None)
-                monster_schema = schemas.MonsterCreate(**monster_data)
-                crud.create_user_monster(db=db, monster=monster_schema, user_id=current_user.id)
-                imported_count += 1
-        
-        # Importar NPCs
-        if "npcs" in backup_data:
-            for npc_data in backup_data["npcs"]:
-                npc_data.pop("id", None)
-                npc_data.pop("owner_id", None)
-                npc_schema = schemas.NPCCreate(**npc_data)
-                crud.create_user_npc(db=db, npc=npc_schema, user_id=current_user.id)
-                imported_count += 1
-        
-        # Importar histórias
-        if "stories" in backup_data:
-            for story_data in backup_data["stories"]:
-                story_data.pop("id", None)
-                story_data.pop("owner_id", None)
-                story_schema = schemas.StoryCreate(**story_data)
-                crud.create_user_story(db=db, story=story_schema, user_id=current_user.id)
-                imported_count += 1
-        
-        # Importar personagens
-        if "characters" in backup_data:
-            for character_data in backup_data["characters"]:
-                character_data.pop("id", None)
-                character_data.pop("owner_id", None)
-                character_schema = schemas.CharacterCreate(**character_data)
-                crud.create_character_for_user(db=db, character=character_schema, user_id=current_user.id)
-                imported_count += 1
+    """
+    Importa um backup (JSON ou NDJSON, opcionalmente com gzip) para o usuário logado.
+    O arquivo é lido aos pedaços e gravado em lotes numa única transação.
+    """
+    if format == "auto":
+        filename = (file.filename or "").lower().removesuffix(".gz")
+        is_ndjson = filename.endswith((".ndjson", ".jsonl")) or file.content_type == "application/x-ndjson"
+        format = "ndjson" if is_ndjson else "json"
 
-        return {
-            "status": "success", 
-            "message": f"Dados importados com sucesso. {imported_count} itens processados."
-        }
-    except json.JSONDecodeError:
+    importer = backup_import.BackupImporter(db, user_id=current_user.id, batch_size=batch_size)
+    try:
+        stream = backup_import.open_backup_stream(file.file)
+        if format == "ndjson":
+            records = backup_import.iter_ndjson_records(stream)
+        else:
+            records = backup_import.iter_json_records(stream)
+        report = importer.import_records(records)
+        if strict and importer.skipped_count:
+            db.rollback()
+            raise HTTPException(status_code=400, detail={"message": "Backup contém registros inválidos.", "report": report})
+        db.commit()
+    except HTTPException:
+        raise
+    except (json.JSONDecodeError, UnicodeDecodeError, EOFError, OSError):
+        db.rollback()
         raise HTTPException(status_code=400, detail="Arquivo JSON inválido.")
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao processar o arquivo de backup: {str(e)}")
\ No newline at end of file
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Erro ao processar o arquivo de backup: {str(e)}")
+
+    return {
+        "status": "success",
+        "message": f"Dados importados com sucesso. {importer.imported_count} itens processados.",
+        "report": report
+    }
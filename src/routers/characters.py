@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import crud, async_crud, versions, schemas, auth, database, rate_limit
+from ..fieldsets import page_response, summary_rows, summary_view
+from ..pagination import PageParams
+from ..response_cache import cached_response_async
+
+router = APIRouter(
+    prefix="/api/v1/characters",
+    tags=["characters"]
+)
+
+@router.post("", response_model=schemas.Character)
+def create_character_for_current_user(
+    character_in: schemas.CharacterCreate,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.TokenData = Depends(auth.get_current_user_from_token)
+):
+    return crud.create_character_for_user(db=db, character=character_in, user_id=current_user.user_id)
+
+@router.post("/batch", response_model=schemas.ContentBatchResult, dependencies=[Depends(rate_limit.heavy_route)])
+def create_characters_batch(
+    batch: schemas.ContentBatch,
+    strict: bool = Query(False, description="Não grava nada se algum registro for inválido"),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Personagens em lote, numa única transação; devolve os ids criados e os erros por posição."""
+    result = crud.create_user_content_batch(db, "characters", batch.items, user_id=current_user.id, strict=strict)
+    if strict and result["errors"]:
+        raise HTTPException(status_code=422, detail={"message": "Lote contém registros inválidos.", "errors": result["errors"]})
+    return result
+
+@router.get("", response_model=schemas.Page[schemas.Character])
+async def get_user_characters(
+    request: Request,
+    page: PageParams = Depends(),
+    summary: bool = Depends(summary_view),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    async def build():
+        if summary:
+            rows, next_cursor = await async_crud.get_summary_page(db, "character", owner_id=current_user.id, **page.as_kwargs())
+            return page_response(summary_rows(rows), next_cursor)
+        rows, next_cursor = await async_crud.get_characters_page(db=db, owner_id=current_user.id, **page.as_kwargs())
+        return {"items": rows, "next_cursor": next_cursor}
+
+    scopes = [versions.scope("characters", current_user.id)]
+    return await cached_response_async(
+        request, current_user.id, await versions.current_async(db, scopes), build, schemas.Page[schemas.Character]
+    )
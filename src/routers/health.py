@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Request, Response, status
+from .. import campaign_packs, database, rate_limit
+
+router = APIRouter(tags=["health"])
+
+# --- Endpoints de Diagnóstico ---
+@router.get("/api/v1/health")
+def health(request: Request, response: Response):
+    """Estado do banco e estatísticas de checkout do pool de conexões."""
+    db = database.app_database(request)
+    try:
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+        database_status = "ok"
+    except Exception:
+        database_status = "unavailable"
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ok" if database_status == "ok" else "degraded",
+        "database": database_status,
+        "pool": db.pool_stats.snapshot(db.engine),
+    }
+
+@router.get("/api/v1/health/database")
+def database_settings(request: Request):
+    """Configuração efetiva do banco (PRAGMAs do SQLite ou parâmetros do pool)."""
+    return database.describe_engine(database.app_database(request).engine)
+
+@router.get("/api/v1/health/auth-cache")
+def auth_cache_stats(request: Request):
+    """Contadores do cache de usuários autenticados (hits, misses, evicções)."""
+    return request.app.state.principal_cache.stats()
+
+@router.get("/api/v1/health/response-cache")
+def response_cache_stats(request: Request):
+    """Contadores do cache de respostas serializadas (hits, misses, evicções)."""
+    return request.app.state.response_cache.stats()
+
+@router.get("/api/v1/health/events")
+def events_stats(request: Request):
+    """Assinantes e contadores do pub/sub de eventos das mesas."""
+    return request.app.state.event_broker.stats()
+
+@router.get("/api/v1/health/notifications")
+def notification_stats(request: Request):
+    """Pendências e contadores do dispatcher de notificações por e-mail."""
+    return request.app.state.notification_dispatcher.stats()
+
+@router.get("/api/v1/health/avatars")
+def avatar_stats(request: Request):
+    """Ocupação do pool de processamento de avatares e uploads deduplicados."""
+    return request.app.state.avatar_processor.stats()
+
+@router.get("/api/v1/health/hashing")
+def hashing_stats(request: Request):
+    """Ocupação do executor de hash de senhas."""
+    return request.app.state.password_hasher.stats()
+
+@router.get("/api/v1/health/rate-limits")
+def rate_limit_stats(request: Request):
+    """Limites por cliente (permitidas e recusadas por política) e fila das rotas pesadas."""
+    return rate_limit.stats(request.app.state.rate_limiter, request.app.state.heavy_routes)
+
+@router.get("/api/v1/health/campaign-packs")
+def campaign_pack_stats():
+    """Pacotes de campanha servidos direto do banco e remontados."""
+    return campaign_packs.stats.snapshot()
+
+@router.get("/")
+def read_root():
+    return {"status": "Dungeon Keeper API está online!"}
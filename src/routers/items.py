@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from .. import crud, versions, schemas, auth, database, rate_limit
+from ..fieldsets import page_response, summary_rows, summary_view
+from ..pagination import PageParams
+from ..response_cache import cached_response
+
+router = APIRouter(
+    prefix="/api/v1/items",
+    tags=["items"]
+)
+
+@router.get("/", response_model=schemas.Page[schemas.Item])
+def list_user_items(
+    request: Request,
+    page: PageParams = Depends(),
+    summary: bool = Depends(summary_view),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Itens criados pelo usuário logado, paginados por cursor."""
+    def build():
+        if summary:
+            rows, next_cursor = crud.get_summary_page(db, "item", owner_id=current_user.id, **page.as_kwargs())
+            return page_response(summary_rows(rows), next_cursor)
+        rows, next_cursor = crud.get_user_items_page(db, user_id=current_user.id, **page.as_kwargs())
+        return {"items": rows, "next_cursor": next_cursor}
+
+    scopes = [versions.scope("items", current_user.id)]
+    return cached_response(request, current_user.id, versions.current(db, scopes), build, schemas.Page[schemas.Item])
+
+@router.post("/", response_model=schemas.Item)
+def create_item(
+    item_in: schemas.ItemCreate,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return crud.create_user_item(db, item=item_in, user_id=current_user.id)
+
+@router.post("/batch", response_model=schemas.ContentBatchResult, dependencies=[Depends(rate_limit.heavy_route)])
+def create_items_batch(
+    batch: schemas.ContentBatch,
+    strict: bool = Query(False, description="Não grava nada se algum registro for inválido"),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Itens em lote, numa única transação; devolve os ids criados e os erros por posição."""
+    result = crud.create_user_content_batch(db, "items", batch.items, user_id=current_user.id, strict=strict)
+    if strict and result["errors"]:
+        raise HTTPException(status_code=422, detail={"message": "Lote contém registros inválidos.", "errors": result["errors"]})
+    return result
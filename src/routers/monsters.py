@@ -0,0 +1,89 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from .. import crud, versions, encounters, schemas, auth, database, rate_limit
+from ..fieldsets import page_response, summary_rows, summary_view
+from ..pagination import PageParams
+from ..response_cache import cached_response
+
+router = APIRouter(
+    prefix="/api/v1/monsters",
+    tags=["monsters"]
+)
+
+@router.get("/", response_model=schemas.Page[schemas.Monster])
+def list_user_monsters(
+    request: Request,
+    page: PageParams = Depends(),
+    summary: bool = Depends(summary_view),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Monstros criados pelo usuário logado, paginados por cursor."""
+    def build():
+        if summary:
+            rows, next_cursor = crud.get_summary_page(db, "monster", owner_id=current_user.id, **page.as_kwargs())
+            return page_response(summary_rows(rows), next_cursor)
+        rows, next_cursor = crud.get_user_monsters_page(db, user_id=current_user.id, **page.as_kwargs())
+        return {"items": rows, "next_cursor": next_cursor}
+
+    scopes = [versions.scope("monsters", current_user.id)]
+    return cached_response(request, current_user.id, versions.current(db, scopes), build, schemas.Page[schemas.Monster])
+
+@router.post("/", response_model=schemas.Monster)
+def create_monster(
+    monster_in: schemas.MonsterCreate,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return crud.create_user_monster(db, monster=monster_in, user_id=current_user.id)
+
+@router.post("/batch", response_model=schemas.ContentBatchResult, dependencies=[Depends(rate_limit.heavy_route)])
+def create_monsters_batch(
+    batch: schemas.ContentBatch,
+    strict: bool = Query(False, description="Não grava nada se algum registro for inválido"),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Monstros em lote, numa única transação; devolve os ids criados e os erros por posição."""
+    result = crud.create_user_content_batch(db, "monsters", batch.items, user_id=current_user.id, strict=strict)
+    if strict and result["errors"]:
+        raise HTTPException(status_code=422, detail={"message": "Lote contém registros inválidos.", "errors": result["errors"]})
+    return result
+
+@router.get("/query", response_model=schemas.Page[schemas.Monster])
+def query_user_monsters(
+    cr_min: Optional[float] = Query(None, ge=0),
+    cr_max: Optional[float] = Query(None, ge=0),
+    type: Optional[str] = None,
+    size: Optional[str] = None,
+    ac_min: Optional[int] = None,
+    ac_max: Optional[int] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Monstros do usuário filtrados por faixa de CR e CA, tipo e tamanho."""
+    rows, next_cursor = crud.query_user_monsters_page(
+        db, user_id=current_user.id, cr_min=cr_min, cr_max=cr_max, monster_type=type, size=size,
+        ac_min=ac_min, ac_max=ac_max, **page.as_kwargs()
+    )
+    return {"items": rows, "next_cursor": next_cursor}
+
+@router.post("/encounter", response_model=schemas.EncounterPlan)
+def build_encounter(
+    request: schemas.EncounterRequest,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Sugere encontros com os monstros do usuário para o orçamento de XP do grupo."""
+    try:
+        levels = encounters.party_levels(db, current_user.id, request.levels, request.character_ids)
+    except encounters.UnknownCharacters as e:
+        raise HTTPException(status_code=404, detail=f"Personagem não encontrado: {e}")
+    if not levels:
+        raise HTTPException(status_code=400, detail="Informe os níveis ou os personagens do grupo")
+    return encounters.build_encounter(
+        db, user_id=current_user.id, levels=levels, difficulty=request.difficulty,
+        max_monsters=request.max_monsters, monster_type=request.monster_type
+    )
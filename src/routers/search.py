@@ -0,0 +1,28 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, auth, database, search
+from ..pagination import InvalidCursor, MAX_PAGE_SIZE
+
+router = APIRouter(
+    prefix="/api/v1/search",
+    tags=["search"]
+)
+
+@router.get("", response_model=schemas.Page[schemas.SearchHit])
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200, description="Termos; cada um casa como prefixo"),
+    types: Optional[List[schemas.SearchType]] = Query(None, alias="type", description="Restringe a item, monster, npc e/ou story"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido em `next_cursor` pela página anterior"),
+    limit: int = Query(search.DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    """Busca nos itens, monstros, NPCs e histórias do usuário, por relevância."""
+    try:
+        rows, next_cursor = await search.search_content(
+            db, owner_id=current_user.id, q=q, types=types, cursor=cursor, limit=limit
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor de busca inválido")
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,68 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import crud, async_crud, versions, schemas, auth, campaign_packs, database
+from ..config import Settings, app_settings
+from ..fieldsets import Fieldset, FieldsetParams, page_response, summary_rows, summary_view
+from ..pagination import PageParams
+from ..response_cache import cached_response_async
+
+router = APIRouter(
+    prefix="/api/v1/stories",
+    tags=["stories"]
+)
+
+@router.get("/", response_model=schemas.Page[schemas.Story])
+async def list_user_stories(
+    request: Request,
+    page: PageParams = Depends(),
+    summary: bool = Depends(summary_view),
+    fieldset: Fieldset = Depends(FieldsetParams("story")),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    """Histórias do usuário logado com itens, monstros e NPCs vinculados."""
+    async def build():
+        if summary:
+            rows, next_cursor = await async_crud.get_summary_page(db, "story", owner_id=current_user.id, **page.as_kwargs())
+            return page_response(summary_rows(rows), next_cursor)
+        rows, next_cursor = await async_crud.get_user_stories_page(
+            db, user_id=current_user.id, options=fieldset.options, **page.as_kwargs()
+        )
+        if fieldset.sparse:
+            return page_response([fieldset.serialize(row) for row in rows], next_cursor)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    scopes = [versions.scope("stories", current_user.id)]
+    return await cached_response_async(
+        request, current_user.id, await versions.current_async(db, scopes), build, schemas.Page[schemas.Story]
+    )
+
+@router.post("/", response_model=schemas.Story)
+def create_story(
+    story_in: schemas.StoryCreate,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return crud.create_user_story(db, story_data=story_in, user_id=current_user.id, settings=settings)
+
+@router.get("/{story_id}/pack")
+async def get_story_campaign_pack(
+    story_id: str,
+    request: Request,
+    variant: Literal["full", "player"] = Query("full", description="player omite as notas dos NPCs"),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    """História com todo o conteúdo vinculado, servida pré-serializada e comprimida (somente o criador)."""
+    creator_id = await async_crud.get_story_creator_id(db, story_id)
+    if creator_id is None:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    if creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Apenas o criador da história pode fazer isso")
+    pack = await campaign_packs.get_pack(db, story_id, variant)
+    if pack is None:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    return campaign_packs.pack_response(request, pack)
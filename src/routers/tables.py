@@ -0,0 +1,195 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, status
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import crud, async_crud, schemas, auth, campaign_packs, database, events, rate_limit, simulation, versions
+from ..config import Settings, app_settings
+from ..dice import DiceSyntaxError
+from ..fieldsets import Fieldset, FieldsetParams, page_response, summary_rows, summary_view
+from ..pagination import PageParams
+from ..response_cache import cached_response_async
+
+router = APIRouter(
+    prefix="/api/v1/tables",
+    tags=["tables"]
+)
+
+def _get_table_as_master(db: Session, table_id: str, user_id: str):
+    table = crud.get_table(db, table_id=table_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail="Mesa não encontrada")
+    if table.master_id != user_id:
+        raise HTTPException(status_code=403, detail="Apenas o mestre da mesa pode fazer isso")
+    return table
+
+@router.get("", response_model=schemas.Page[schemas.Table])
+async def list_tables(
+    request: Request,
+    page: PageParams = Depends(),
+    summary: bool = Depends(summary_view),
+    fieldset: Fieldset = Depends(FieldsetParams("table")),
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    async def build():
+        if summary:
+            rows, next_cursor = await async_crud.get_summary_page(db, "table", **page.as_kwargs())
+            return page_response(summary_rows(rows), next_cursor)
+        rows, next_cursor = await async_crud.get_tables_page(db, options=fieldset.options, **page.as_kwargs())
+        if fieldset.sparse:
+            return page_response([fieldset.serialize(row) for row in rows], next_cursor)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    return await cached_response_async(
+        request, current_user.id, await versions.current_async(db, [versions.TABLES]), build, schemas.Page[schemas.Table]
+    )
+
+@router.post("", response_model=schemas.Table)
+def create_table(
+    table_in: schemas.TableCreate,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return crud.create_table(db, table=table_in, master_id=current_user.id)
+
+@router.get("/{table_id}/pack")
+async def get_table_campaign_pack(
+    table_id: str,
+    request: Request,
+    db: AsyncSession = Depends(database.get_async_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user_async)
+):
+    """Pacote da história da mesa: completo para o mestre, sem as notas dos NPCs para os jogadores."""
+    access = await async_crud.get_table_story_role(db, table_id, current_user.id)
+    if access is None:
+        raise HTTPException(status_code=404, detail="Mesa não encontrada")
+    story_id, role = access
+    if role is None:
+        raise HTTPException(status_code=403, detail="Apenas membros da mesa podem ver o pacote da campanha")
+    pack = await campaign_packs.get_pack(db, story_id, "full" if role == "master" else "player") if story_id else None
+    if pack is None:
+        raise HTTPException(status_code=404, detail="Mesa sem história")
+    return campaign_packs.pack_response(request, pack)
+
+# --- Solicitações de entrada ---
+@router.post("/{table_id}/join", response_model=schemas.JoinRequest)
+def request_to_join_table(
+    table_id: str,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    broker: events.EventBroker = Depends(events.get_broker),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    if crud.get_table(db, table_id=table_id) is None:
+        raise HTTPException(status_code=404, detail="Mesa não encontrada")
+    db_request = crud.create_join_request(db, table_id=table_id, user_id=current_user.id, settings=settings, broker=broker)
+    if db_request is None:
+        raise HTTPException(status_code=400, detail="Solicitação já enviada ou usuário já está na mesa")
+    return db_request
+
+@router.get("/{table_id}/requests", response_model=schemas.Page[schemas.JoinRequest])
+def list_join_requests(
+    table_id: str,
+    page: PageParams = Depends(),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Solicitações pendentes da mesa (somente o mestre)."""
+    _get_table_as_master(db, table_id, current_user.id)
+    rows, next_cursor = crud.get_table_join_requests_page(db, table_id=table_id, **page.as_kwargs())
+    return {"items": rows, "next_cursor": next_cursor}
+
+def _manage_request(db: Session, request_id: str, new_status: str, user_id: str,
+                    settings: Settings, broker: events.EventBroker):
+    # Uma única atualização condicionada ao status e ao mestre da mesa
+    db_request = crud.manage_join_request(
+        db, request_id=request_id, new_status=new_status, master_id=user_id, settings=settings, broker=broker
+    )
+    if db_request is None:
+        raise HTTPException(status_code=404, detail="Solicitação pendente não encontrada")
+    return db_request
+
+@router.post("/{table_id}/requests/batch", response_model=schemas.JoinRequestBatchResult)
+def manage_join_requests_batch(
+    table_id: str,
+    batch: schemas.JoinRequestBatch,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    broker: events.EventBroker = Depends(events.get_broker),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Aprova e recusa várias solicitações pendentes da mesa numa única transação."""
+    _get_table_as_master(db, table_id, current_user.id)
+    return crud.manage_join_requests_batch(
+        db, table_id=table_id, approve_ids=batch.approve, decline_ids=batch.decline, settings=settings, broker=broker
+    )
+
+@router.post("/requests/{request_id}/approve", response_model=schemas.JoinRequest)
+def approve_join_request(
+    request_id: str,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    broker: events.EventBroker = Depends(events.get_broker),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return _manage_request(db, request_id, "approved", current_user.id, settings, broker)
+
+@router.post("/requests/{request_id}/decline", response_model=schemas.JoinRequest)
+def decline_join_request(
+    request_id: str,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    broker: events.EventBroker = Depends(events.get_broker),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    return _manage_request(db, request_id, "declined", current_user.id, settings, broker)
+
+# --- Eventos em tempo real ---
+@router.websocket("/{table_id}/events")
+async def table_events(
+    websocket: WebSocket,
+    table_id: str,
+    token: Optional[str] = Query(None, description="JWT de acesso (navegadores não enviam Authorization no WebSocket)"),
+):
+    """
+    Canal da mesa para mestre e jogadores: solicitações de entrada criadas,
+    aprovadas e recusadas chegam como JSON `{type, channel, data, ts}`, sem
+    polling. Um evento "overflow" indica eventos perdidos: reconsulte a mesa.
+    Quem ainda não é membro acompanha a própria solicitação em /users/me/events.
+    """
+    # Sessão só para autenticar: a conexão do pool não fica presa ao WebSocket
+    async with database.app_database(websocket).AsyncSessionLocal() as db:
+        try:
+            user = await auth.authenticate_token_async(websocket, events.websocket_token(websocket, token), db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        if not await async_crud.is_table_member(db, table_id, user.id):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    await events.stream_channel(websocket, events.table_channel(table_id))
+
+@router.post("/{table_id}/simulate", response_model=schemas.SimulationResult, dependencies=[Depends(rate_limit.heavy_route)])
+def simulate_combat(
+    table_id: str,
+    request: schemas.SimulationRequest,
+    db: Session = Depends(database.get_db),
+    settings: Settings = Depends(app_settings),
+    pool: simulation.SimulationPool = Depends(simulation.get_simulation_pool),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Simula N lutas dos personagens da mesa contra monstros do mestre."""
+    _get_table_as_master(db, table_id, current_user.id)
+    max_fights = settings.simulation_max_fights
+    if request.fights > max_fights:
+        raise HTTPException(status_code=400, detail=f"No máximo {max_fights} lutas por simulação")
+    characters = crud.get_table_party(db, table_id=table_id, character_ids=request.character_ids)
+    if not characters:
+        raise HTTPException(status_code=400, detail="A mesa não tem personagens de jogadores")
+    monsters = crud.get_user_monsters_by_ids(db, user_id=current_user.id, monster_ids=request.monster_ids)
+    if len(monsters) != len(request.monster_ids):
+        raise HTTPException(status_code=404, detail="Monstro não encontrado")
+    try:
+        return simulation.simulate(pool, characters, monsters, request.fights, request.max_rounds, request.seed)
+    except DiceSyntaxError as e:
+        raise HTTPException(status_code=400, detail=str(e))
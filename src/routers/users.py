@@ -0,0 +1,102 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from .. import crud, schemas, auth, database, events, versions
+from ..avatars import AvatarOverloaded, AvatarProcessor, AvatarStore, InvalidImage, get_avatar_processor
+from ..fieldsets import Fieldset, FieldsetParams
+from ..metrics import TimedORJSONResponse
+from ..principal_cache import PrincipalCache, get_principal_cache
+from ..response_cache import cached_response
+
+router = APIRouter(
+    prefix="/api/v1/users",
+    tags=["users"]
+)
+
+@router.get("/me", response_model=schemas.User)
+def read_current_user(
+    request: Request,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user),
+    fieldset: Fieldset = Depends(FieldsetParams("user")),
+):
+    """
+    Perfil do usuário logado, com todas as suas coleções. `?include=stories,tables`
+    carrega só as coleções pedidas; `?fields=username,email` limita as colunas.
+    """
+    def build():
+        # Perfil USER_PROFILE: número fixo de consultas, independente do tamanho das coleções
+        db_user = crud.get_user_profile(db, user_id=current_user.id, options=fieldset.options)
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if fieldset.sparse:
+            return TimedORJSONResponse(fieldset.serialize(db_user))
+        return db_user
+
+    scopes = versions.profile_scopes(current_user.id)
+    return cached_response(request, current_user.id, versions.current(db, scopes), build, schemas.User)
+
+@router.put("/me", response_model=schemas.AuthenticatedUser)
+def update_current_user(
+    user_update: schemas.UserUpdate,
+    db: Session = Depends(database.get_db),
+    principal_cache: PrincipalCache = Depends(get_principal_cache),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Atualiza e-mail e bio do usuário logado."""
+    return crud.update_user(db, user_id=current_user.id, user_update=user_update, principal_cache=principal_cache)
+
+@router.put("/me/notifications", response_model=schemas.AuthenticatedUser)
+def update_notification_settings(
+    settings: schemas.NotificationSettingsUpdate,
+    db: Session = Depends(database.get_db),
+    principal_cache: PrincipalCache = Depends(get_principal_cache),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """Atualiza as preferências de notificação por e-mail."""
+    return crud.update_user(db, user_id=current_user.id, user_update=settings, principal_cache=principal_cache)
+
+@router.post("/me/avatar", response_model=schemas.AuthenticatedUser)
+async def upload_avatar(
+    request: Request,
+    file: UploadFile = File(...),
+    avatar_processor: AvatarProcessor = Depends(get_avatar_processor),
+    principal_cache: PrincipalCache = Depends(get_principal_cache),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.AuthenticatedUser = Depends(auth.get_current_active_user)
+):
+    """
+    Recebe a imagem, gera as variantes de 64/128/256 px em WebP fora do event
+    loop e aponta `avatar_url` para a de 128 px. Uploads idênticos (de qualquer
+    usuário) reaproveitam as variantes já gravadas.
+    """
+    max_bytes = request.app.state.settings.avatar_max_bytes
+    data = await file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Imagem maior que {max_bytes // 1024} KiB")
+    try:
+        digest = await avatar_processor.process(data)
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AvatarOverloaded:
+        raise HTTPException(status_code=503, detail="Processamento de imagens sobrecarregado, tente novamente", headers={"Retry-After": "2"})
+    return await run_in_threadpool(crud.set_user_avatar, db, current_user.id, AvatarStore.url(digest), principal_cache)
+
+@router.websocket("/me/events")
+async def user_events(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="JWT de acesso (navegadores não enviam Authorization no WebSocket)"),
+):
+    """
+    Canal pessoal do usuário: a aprovação ou recusa das suas solicitações de
+    entrada chega aqui (`join_request.approved` / `join_request.declined`),
+    antes de ele ser membro e poder assinar o canal da mesa.
+    """
+    async with database.app_database(websocket).AsyncSessionLocal() as db:
+        try:
+            user = await auth.authenticate_token_async(websocket, events.websocket_token(websocket, token), db)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    await events.stream_channel(websocket, events.user_channel(user.id))
@@ -1,7 +1,14 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Any, Optional, List, Generic, Literal, TypeVar
 import uuid
 
+T = TypeVar("T")
+
+# --- Envelope de paginação compartilhado pelas listagens ---
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # None quando não há próxima página
+
 # --- Schemas de Personagem ---
 class CharacterBase(BaseModel):
     name: str
@@ -38,6 +45,15 @@ class Table(TableBase):
     class Config:
         from_attributes = True
 
+# Só as colunas da mesa, sem relações (?include= / ?fields=)
+class TableFields(TableBase):
+    id: str
+    master_id: str
+    story_id: str
+
+    class Config:
+        from_attributes = True
+
 # --- Schemas de Item ---
 class ItemBase(BaseModel):
     name: str
@@ -72,10 +88,74 @@ class MonsterCreate(MonsterBase):
 class Monster(MonsterBase):
     id: str
     creator_id: str
+    # Derivados de hit_points/challenge_rating; None quando o texto não pôde ser lido
+    hp_average: Optional[int] = None
+    hp_dice_count: Optional[int] = None
+    hp_dice_size: Optional[int] = None
+    hp_modifier: Optional[int] = None
+    cr_value: Optional[float] = None
+    xp: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+# --- Montagem de encontros ---
+EncounterDifficulty = Literal["easy", "medium", "hard", "deadly"]
+
+class EncounterRequest(BaseModel):
+    # Níveis do grupo, informados diretamente e/ou pelos personagens
+    levels: List[int] = Field(default_factory=list)
+    character_ids: List[str] = Field(default_factory=list)
+    difficulty: EncounterDifficulty = "medium"
+    max_monsters: int = Field(8, ge=1, le=20)
+    monster_type: Optional[str] = None
+
+class EncounterGroup(BaseModel):
+    monster: Monster
+    count: int
+
+class EncounterSuggestion(BaseModel):
+    groups: List[EncounterGroup]
+    monster_count: int
+    total_xp: int
+    adjusted_xp: int  # XP com o multiplicador pelo número de monstros
+    difficulty: Optional[EncounterDifficulty] = None  # None = abaixo de "easy"
+
+class EncounterPlan(BaseModel):
+    party_levels: List[int]
+    thresholds: dict  # dificuldade -> XP do grupo
+    budget: int
+    suggestions: List[EncounterSuggestion]
+
+# --- Simulação de combate ---
+class SimulationRequest(BaseModel):
+    monster_ids: List[str] = Field(..., min_length=1, max_length=30)  # Repita o id para vários iguais
+    character_ids: List[str] = Field(default_factory=list)  # Vazio: último personagem de cada jogador
+    fights: int = Field(10_000, ge=1)
+    max_rounds: int = Field(20, ge=1, le=100)
+    seed: Optional[int] = None
+
+class Distribution(BaseModel):
+    mean: float
+    percentiles: dict  # p5, p25, p50, p75, p95
+    histogram: dict  # edges, counts
+
+class CombatantResult(BaseModel):
+    name: str
+    side: Literal["party", "monsters"]
+    down_rate: float
+    mean_damage_dealt: float
+    mean_damage_taken: float
+
+class SimulationResult(BaseModel):
+    fights: int
+    rounds_simulated: int
+    win_rate: dict  # party, monsters, draw
+    rounds: Distribution
+    party_damage_dealt: Distribution
+    party_damage_taken: Distribution
+    combatants: List[CombatantResult]
+
 # --- Schemas de NPC ---
 class NPCBase(BaseModel):
     name: str
@@ -114,6 +194,36 @@ class Story(StoryBase):
     class Config:
         from_attributes = True
 
+# --- Pacote de campanha para os jogadores: NPCs sem as notas do mestre ---
+class PlayerNPC(BaseModel):
+    id: str
+    creator_id: str
+    name: str
+    description: Optional[str] = None
+    role: Optional[str] = None
+    location: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class PlayerStory(StoryBase):
+    id: str
+    creator_id: str
+    items: List[Item] = []
+    monsters: List[Monster] = []
+    npcs: List[PlayerNPC] = []
+
+    class Config:
+        from_attributes = True
+
+# Só as colunas da história, sem relações (?include= / ?fields=)
+class StoryFields(StoryBase):
+    id: str
+    creator_id: str
+
+    class Config:
+        from_attributes = True
+
 # --- Modelos de Usuário ---
 class UserBase(BaseModel):
     username: str
@@ -141,6 +251,20 @@ class UserInDB(UserBase):
     class Config:
         from_attributes = True
 
+# --- Snapshot do usuário autenticado (mantido no cache de autenticação) ---
+class AuthenticatedUser(UserBase):
+    id: str
+    is_active: bool
+    bio: Optional[str] = None
+    avatar_url: Optional[str] = None
+    notify_on_join_request: bool = True
+    notify_on_request_approved: bool = True
+    notify_on_new_story: bool = True
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 # --- Schema para exibir uma solicitação ---
 class JoinRequest(BaseModel):
     id: str
@@ -151,6 +275,29 @@ class JoinRequest(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Schemas para decidir várias solicitações de uma vez ---
+class JoinRequestBatch(BaseModel):
+    approve: List[str] = []
+    decline: List[str] = []
+
+class JoinRequestBatchResult(BaseModel):
+    approved: List[str]
+    declined: List[str]
+    skipped: List[str]  # Não pendentes, de outra mesa ou presentes nas duas listas
+
+# --- Schemas para criar conteúdo em lote ---
+class ContentBatch(BaseModel):
+    # Validados um a um no servidor, para apontar o erro de cada posição
+    items: List[Any] = Field(..., min_length=1, max_length=500)
+
+class ContentBatchError(BaseModel):
+    index: int  # Posição em `items`
+    error: List[dict]
+
+class ContentBatchResult(BaseModel):
+    created: List[str]  # Ids novos, na ordem dos registros válidos
+    errors: List[ContentBatchError] = []
+
 # --- Atualize o User Schema para incluir as relações ---
 class User(UserBase):
     id: str
@@ -184,6 +331,16 @@ class TokenData(BaseModel):
     username: Optional[str] = None
     user_id: Optional[str] = None
 
+# --- Busca textual ---
+SearchType = Literal["item", "monster", "npc", "story"]
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: str
+    title: Optional[str] = None
+    snippet: Optional[str] = None  # Trecho do texto em volta dos termos encontrados
+    score: float  # Menor = mais relevante
+
 # --- Schema para Backup Completo do Usuário ---
 class UserBackup(BaseModel):
     characters: List[Character]
@@ -0,0 +1,164 @@
+import base64
+import json
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, literal, null, or_, select, text, union_all
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .pagination import InvalidCursor, MAX_PAGE_SIZE
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_TERMS = 8
+SNIPPET_TOKENS = 12
+FTS_TABLE = "search_fts"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Campos indexados por tipo: (modelo, título, corpo). São os mesmos que os
+# gatilhos da migração 0004 copiam para search_documents.
+SEARCH_SOURCES = {
+    "item": (models.Item, models.Item.name, (models.Item.type, models.Item.rarity, models.Item.description)),
+    "monster": (models.Monster, models.Monster.name, (models.Monster.type, models.Monster.size, models.Monster.actions)),
+    "npc": (models.NPC, models.NPC.name, (models.NPC.role, models.NPC.location, models.NPC.description, models.NPC.notes)),
+    "story": (models.Story, models.Story.title, (models.Story.synopsis,)),
+}
+
+# O peso de cada coluna do FTS (título, corpo, dono, tipo) foi gravado como
+# `rank` padrão do índice na migração; aqui só se ordena por ele.
+_FTS_SQL = text(
+    f"""
+    SELECT d.kind AS type, d.entity_id AS id, d.title AS title,
+           snippet({FTS_TABLE}, 1, '', '', '…', :snippet_tokens) AS snippet,
+           {FTS_TABLE}.rank AS score
+    FROM {FTS_TABLE} JOIN search_documents AS d ON d.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH :match
+    ORDER BY {FTS_TABLE}.rank, d.id
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+# --- CURSOR ---
+# Resultados ordenados por relevância não têm chave estável para keyset;
+# o cursor guarda só o deslocamento da próxima página.
+def encode_search_cursor(offset: int) -> str:
+    raw = json.dumps({"offset": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offset = int(json.loads(raw)["offset"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+    if offset < 0:
+        raise InvalidCursor("offset negativo")
+    return offset
+
+
+# --- CONSULTAS ---
+def search_terms(q: str) -> List[str]:
+    """Palavras da busca; pontuação e operadores do FTS5 são descartados."""
+    return _TERM.findall(q)[:MAX_SEARCH_TERMS]
+
+
+def fts_match_expression(terms: Sequence[str], owner_id: str, types: Sequence[str]) -> str:
+    """
+    Todos os termos como prefixo (`"dra"*`), para funcionar enquanto o usuário
+    digita. Dono e tipo entram no próprio MATCH: o FTS5 cruza as listas de
+    documentos antes de calcular o bm25, em vez de filtrar depois.
+    """
+    words = " ".join(f'"{term}"*' for term in terms)
+    expression = f'owner : "{owner_id.replace("-", "")}" AND ({words})'
+    if len(types) < len(SEARCH_SOURCES):
+        expression += " AND kind : (" + " OR ".join(types) + ")"
+    return expression
+
+
+def _like_pattern(term: str, prefix_only: bool = False) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def like_search_query(terms: Sequence[str], owner_id: str, types: Sequence[str]):
+    """
+    Alternativa sem FTS5: cada termo precisa aparecer (ILIKE) em algum campo do
+    documento. No PostgreSQL os índices GIN de trigramas (pg_trgm) atendem esses
+    padrões. Títulos que começam pelo primeiro termo vêm primeiro.
+    """
+    selects = []
+    for kind in types:
+        model, title, body = SEARCH_SOURCES[kind]
+        columns = (title,) + body
+        conditions = [
+            or_(*(column.ilike(_like_pattern(term), escape="\\") for column in columns))
+            for term in terms
+        ]
+        score = case(
+            (title.ilike(_like_pattern(terms[0], prefix_only=True), escape="\\"), 0.0),
+            (title.ilike(_like_pattern(terms[0]), escape="\\"), 1.0),
+            else_=2.0,
+        )
+        selects.append(
+            select(
+                literal(kind).label("type"),
+                model.id.label("id"),
+                title.label("title"),
+                null().label("snippet"),
+                score.label("score"),
+            ).where(model.creator_id == owner_id, *conditions)
+        )
+    hits = union_all(*selects).subquery()
+    return select(hits).order_by(hits.c.score, hits.c.title, hits.c.id)
+
+
+_fts_available: Dict[Engine, bool] = {}
+
+
+async def fts_available(db: AsyncSession) -> bool:
+    """O índice FTS5 só existe no SQLite, e só se o módulo fts5 estiver compilado."""
+    engine = db.get_bind()
+    if engine not in _fts_available:
+        available = False
+        if engine.dialect.name == "sqlite":
+            result = await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            )
+            available = result.first() is not None
+        _fts_available[engine] = available
+    return _fts_available[engine]
+
+
+async def search_content(db: AsyncSession, owner_id: str, q: str, types: Optional[Sequence[str]] = None,
+                         cursor: Optional[str] = None, limit: int = DEFAULT_SEARCH_LIMIT) -> Tuple[List[dict], Optional[str]]:
+    """
+    Busca no conteúdo do usuário (itens, monstros, NPCs e histórias), do mais
+    para o menos relevante. Retorna (resultados, próximo cursor).
+    """
+    offset = decode_search_cursor(cursor) if cursor else 0
+    terms = search_terms(q)
+    if not terms:
+        return [], None
+    types = [kind for kind in dict.fromkeys(types or SEARCH_SOURCES) if kind in SEARCH_SOURCES]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if await fts_available(db):
+        result = await db.execute(_FTS_SQL, {
+            "match": fts_match_expression(terms, owner_id, types),
+            "snippet_tokens": SNIPPET_TOKENS,
+            "limit": limit + 1,
+            "offset": offset,
+        })
+    else:
+        result = await db.execute(like_search_query(terms, owner_id, types).limit(limit + 1).offset(offset))
+
+    rows = [dict(row) for row in result.mappings()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(offset + limit)
+    return rows, next_cursor
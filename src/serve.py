@@ -0,0 +1,112 @@
+"""
+Servidor de produção com vários processos (supervisor multiprocess do uvicorn).
+
+    python -m src.serve [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+- Os workers validam os tokens uns dos outros só com chaves configuradas
+  (JWT_KEYS_FILE, JWT_SECRET_KEYS ou SECRET_KEY, ver signing_keys.py); sem
+  elas, o launcher se recusa a subir mais de um worker.
+- As migrações rodam uma vez aqui, antes de criar os workers, que sobem com
+  AUTO_MIGRATE=false: N processos não disputam o Alembic no mesmo banco.
+- Sem HASH_WORKERS/AVATAR_WORKERS explícitos, os núcleos são divididos entre
+  os workers, em vez de cada um abrir um pool do tamanho da máquina.
+- Sinais do supervisor: SIGHUP reinicia os workers um a um (recarrega chaves e
+  configuração sem fechar o socket), SIGTTIN/SIGTTOU adicionam/removem um
+  worker, SIGTERM/SIGINT encerram esperando até --graceful-timeout segundos
+  pelas requisições em andamento. Um worker que morre é substituído.
+- Com EVENTS_BACKEND=memory, os eventos das mesas não passam de um worker
+  para outro: use EVENTS_BACKEND=relay com `python -m src.event_relay`.
+  Do mesmo modo, RATE_LIMIT_BACKEND=database faz os limites por cliente
+  valerem para o conjunto dos workers (ver rate_limit.py).
+- O cache de autenticação (principal_cache.py) é invalidado só no worker que
+  fez a escrita: nos outros, um usuário desativado continua autenticado por
+  até AUTH_CACHE_TTL_SECONDS. Sem valor explícito, o launcher reduz esse TTL
+  para MULTI_WORKER_AUTH_CACHE_TTL_SECONDS.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from .config import get_settings
+from .signing_keys import KeyRingError, is_shared, load_key_ring
+
+logger = logging.getLogger(__name__)
+
+MULTI_WORKER_AUTH_CACHE_TTL_SECONDS = 5
+
+
+def _split_pool(name: str, workers: int):
+    if not os.getenv(name):
+        os.environ[name] = str(max(1, (os.cpu_count() or 1) // workers))
+
+
+def _cap_auth_cache_ttl(ttl_seconds: int, workers: int):
+    if workers == 1 or ttl_seconds <= MULTI_WORKER_AUTH_CACHE_TTL_SECONDS:
+        return
+    if os.getenv("AUTH_CACHE_TTL_SECONDS"):
+        logger.warning("AUTH_CACHE_TTL_SECONDS=%d: um usuário desativado segue autenticado por até %d s "
+                       "nos outros workers", ttl_seconds, ttl_seconds)
+        return
+    os.environ["AUTH_CACHE_TTL_SECONDS"] = str(MULTI_WORKER_AUTH_CACHE_TTL_SECONDS)
+
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.web_host)
+    parser.add_argument("--port", type=int, default=settings.web_port)
+    parser.add_argument("--workers", type=int, default=settings.web_workers)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.web_graceful_timeout_seconds)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    workers = max(1, args.workers)
+
+    try:
+        # Falha aqui, uma vez, em vez de em cada worker
+        load_key_ring(settings)
+    except (KeyRingError, OSError, ValueError) as e:
+        print(f"Chaves JWT inválidas: {e}", file=sys.stderr)
+        return 2
+    if workers > 1 and not is_shared(settings):
+        print("Vários workers exigem chaves JWT compartilhadas: defina JWT_KEYS_FILE, "
+              "JWT_SECRET_KEYS ou SECRET_KEY (ver src/signing_keys.py)", file=sys.stderr)
+        return 2
+    if workers > 1 and settings.events_backend == "memory":
+        logger.warning("EVENTS_BACKEND=memory: eventos das mesas só chegam a quem está no mesmo worker")
+    if workers > 1 and settings.rate_limit_enabled and settings.rate_limit_backend == "memory":
+        logger.warning("RATE_LIMIT_BACKEND=memory: cada worker conta à parte, o limite efetivo é %dx maior", workers)
+
+    if settings.auto_migrate:
+        from . import migrations, statblock
+        from .database import Database
+
+        db = Database(settings)
+        migrations.upgrade_to_head(db.engine)
+        with db.SessionLocal() as session:
+            statblock.backfill_stat_blocks(session)
+        # Os workers são processos novos (spawn): não herdam as conexões deste
+        db.engine.dispose()
+        os.environ["AUTO_MIGRATE"] = "false"
+
+    _split_pool("HASH_WORKERS", workers)
+    _split_pool("AVATAR_WORKERS", workers)
+    _cap_auth_cache_ttl(settings.auth_cache_ttl_seconds, workers)
+
+    import uvicorn
+
+    uvicorn.run(
+        "src.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
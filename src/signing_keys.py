@@ -0,0 +1,194 @@
+"""
+Chaves de assinatura dos tokens JWT, compartilhadas por todos os workers.
+
+Cada token leva no cabeçalho o `kid` da chave que o assinou; a validação usa
+a chave daquele `kid`, então trocar a chave ativa não invalida os tokens já
+emitidos enquanto a antiga continuar no arquivo. Rotação sem derrubar sessões:
+
+    python -m src.signing_keys --file keys.json add       # nova chave, ainda só valida
+    kill -HUP <pid do python -m src.serve>                # todos os workers passam a conhecê-la
+    python -m src.signing_keys --file keys.json activate <kid>
+    kill -HUP <pid>                                       # passa a assinar com a nova
+    # depois de ACCESS_TOKEN_EXPIRE_MINUTES, os tokens antigos expiraram:
+    python -m src.signing_keys --file keys.json prune --keep 2
+
+Ativar uma chave que algum worker ainda não carregou faria esse worker
+recusar os tokens novos; por isso `add` e `activate` são passos separados.
+"""
+import argparse
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KID = "default"
+MIN_SECRET_LENGTH = 32
+
+
+class KeyRingError(ValueError):
+    """Configuração de chaves inválida."""
+
+
+@dataclass(frozen=True)
+class KeyRing:
+    active_kid: str
+    keys: Dict[str, str]  # kid -> segredo
+    ephemeral: bool = False  # Gerada neste processo: não vale em outros workers
+
+    def __post_init__(self):
+        if self.active_kid not in self.keys:
+            raise KeyRingError(f"Chave ativa {self.active_kid!r} não está entre as chaves")
+
+    @property
+    def active_secret(self) -> str:
+        return self.keys[self.active_kid]
+
+    def secret_for(self, kid: Optional[str]) -> Optional[str]:
+        return self.keys.get(kid) if kid else None
+
+
+def _check_secrets(keys: Dict[str, str]):
+    for kid, secret in keys.items():
+        if not kid or not secret:
+            raise KeyRingError("kid e segredo não podem ser vazios")
+        if len(secret) < MIN_SECRET_LENGTH:
+            logger.warning("Chave JWT %r tem menos de %d caracteres", kid, MIN_SECRET_LENGTH)
+
+
+def parse_keys(text: str) -> KeyRing:
+    """"kid:segredo,kid:segredo" (JWT_SECRET_KEYS); a primeira é a ativa."""
+    keys = {}
+    for entry in filter(None, (part.strip() for part in text.split(","))):
+        kid, separator, secret = entry.partition(":")
+        if not separator:
+            raise KeyRingError("JWT_SECRET_KEYS deve ter o formato kid:segredo,kid:segredo")
+        keys[kid.strip()] = secret.strip()
+    if not keys:
+        raise KeyRingError("JWT_SECRET_KEYS está vazio")
+    _check_secrets(keys)
+    return KeyRing(active_kid=next(iter(keys)), keys=keys)
+
+
+def read_key_file(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data.get("keys"), dict) or not data["keys"]:
+        raise KeyRingError(f"{path}: esperado {{\"active\": kid, \"keys\": {{kid: segredo}}}}")
+    return data
+
+
+def load_key_file(path: str) -> KeyRing:
+    data = read_key_file(path)
+    keys = {str(kid): str(secret) for kid, secret in data["keys"].items()}
+    _check_secrets(keys)
+    return KeyRing(active_kid=data.get("active") or next(iter(keys)), keys=keys)
+
+
+def load_key_ring(settings: Settings) -> KeyRing:
+    """Arquivo (JWT_KEYS_FILE), lista (JWT_SECRET_KEYS) ou chave única (SECRET_KEY), nessa ordem."""
+    if settings.jwt_keys_file:
+        return load_key_file(settings.jwt_keys_file)
+    if settings.jwt_secret_keys:
+        return parse_keys(settings.jwt_secret_keys)
+    if settings.secret_key:
+        _check_secrets({DEFAULT_KID: settings.secret_key})
+        return KeyRing(active_kid=DEFAULT_KID, keys={DEFAULT_KID: settings.secret_key})
+    logger.warning("Nenhuma chave JWT configurada: usando uma chave temporária, válida só neste processo")
+    kid = f"ephemeral-{secrets.token_hex(4)}"
+    return KeyRing(active_kid=kid, keys={kid: secrets.token_hex(32)}, ephemeral=True)
+
+
+def is_shared(settings: Settings) -> bool:
+    """Se as chaves vêm da configuração (e valem em todos os workers)."""
+    return bool(settings.jwt_keys_file or settings.jwt_secret_keys or settings.secret_key)
+
+
+# --- ARQUIVO DE CHAVES (CLI) ---
+def write_key_file(path: str, data: dict):
+    """Grava de forma atômica e legível só pelo dono."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def add_key(path: str, kid: Optional[str] = None) -> str:
+    """Acrescenta uma chave nova; num arquivo novo ela já é a ativa."""
+    data = read_key_file(path) if os.path.exists(path) else {"active": None, "keys": {}}
+    kid = kid or time.strftime("%Y%m%d%H%M%S")
+    if kid in data["keys"]:
+        raise KeyRingError(f"kid {kid!r} já existe")
+    data["keys"][kid] = secrets.token_hex(32)
+    data["active"] = data.get("active") or kid
+    write_key_file(path, data)
+    return kid
+
+
+def activate_key(path: str, kid: str):
+    data = read_key_file(path)
+    if kid not in data["keys"]:
+        raise KeyRingError(f"kid {kid!r} não existe")
+    data["active"] = kid
+    write_key_file(path, data)
+
+
+def prune_keys(path: str, keep: int) -> list:
+    """Mantém a ativa e as `keep - 1` mais recentes além dela; retorna os kids removidos."""
+    data = read_key_file(path)
+    others = [kid for kid in data["keys"] if kid != data["active"]]
+    removed = others[:max(0, len(others) - max(keep - 1, 0))]
+    for kid in removed:
+        del data["keys"][kid]
+    write_key_file(path, data)
+    return removed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=get_settings().jwt_keys_file or "jwt_keys.json")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Gera uma chave nova (a ativa não muda)")
+    add.add_argument("--kid", help="Padrão: data e hora atuais")
+    activate = commands.add_parser("activate", help="Passa a assinar com a chave")
+    activate.add_argument("kid")
+    prune = commands.add_parser("prune", help="Remove as chaves mais antigas")
+    prune.add_argument("--keep", type=int, default=2, help="Chaves mantidas, contando a ativa")
+    commands.add_parser("list")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "add":
+            print(add_key(args.file, args.kid))
+        elif args.command == "activate":
+            activate_key(args.file, args.kid)
+        elif args.command == "prune":
+            for kid in prune_keys(args.file, args.keep):
+                print(kid)
+        else:
+            data = read_key_file(args.file)
+            for kid in data["keys"]:
+                print(f"{kid}{' (ativa)' if kid == data['active'] else ''}")
+    except (KeyRingError, OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
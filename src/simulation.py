@@ -0,0 +1,331 @@
+import multiprocessing
+import re
+import threading
+import unicodedata
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from starlette.requests import HTTPConnection
+
+from . import models
+from .config import Settings
+from .dice import CompiledDice, compile_dice
+
+DEFAULT_MAX_ROUNDS = 20
+HISTOGRAM_BINS = 10
+PERCENTILES = (5, 25, 50, 75, 95)
+
+PARTY, MONSTERS = 0, 1
+OUTCOMES = ("party", "monsters", "draw")  # "draw": ninguém caiu até max_rounds
+
+
+@dataclass(frozen=True)
+class Combatant:
+    name: str
+    hit_points: CompiledDice  # rolado por luta; uma constante também é uma expressão
+    armor_class: int
+    attack_bonus: int
+    damage: CompiledDice
+    attacks: int = 1
+
+
+# --- PERSONAGENS ---
+@dataclass(frozen=True)
+class ClassProfile:
+    hit_die: int
+    armor_class: int
+    damage: str  # Dado da arma (ou truque) sem o modificador
+    extra_attack_levels: tuple = ()
+    cantrip: bool = False  # Dano escala nos níveis 5/11/17 e não soma atributo
+
+
+CLASS_PROFILES = {
+    "barbarian": ClassProfile(12, 15, "1d12", (5,)),
+    "fighter": ClassProfile(10, 18, "1d8", (5, 11, 20)),
+    "paladin": ClassProfile(10, 18, "1d8", (5,)),
+    "ranger": ClassProfile(10, 16, "1d8", (5,)),
+    "monk": ClassProfile(8, 16, "1d6", (5,)),
+    "rogue": ClassProfile(8, 14, "1d6"),
+    "bard": ClassProfile(8, 14, "1d8", cantrip=True),
+    "cleric": ClassProfile(8, 18, "1d8", cantrip=True),
+    "druid": ClassProfile(8, 14, "1d8", cantrip=True),
+    "warlock": ClassProfile(8, 13, "1d10", cantrip=True),
+    "sorcerer": ClassProfile(6, 13, "1d10", cantrip=True),
+    "wizard": ClassProfile(6, 12, "1d10", cantrip=True),
+}
+DEFAULT_CLASS = ClassProfile(8, 14, "1d8")
+
+CLASS_ALIASES = {
+    "barbaro": "barbarian", "guerreiro": "fighter", "paladino": "paladin",
+    "patrulheiro": "ranger", "monge": "monk", "ladino": "rogue", "bardo": "bard",
+    "clerigo": "cleric", "druida": "druid", "bruxo": "warlock",
+    "feiticeiro": "sorcerer", "mago": "wizard",
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return text.strip().lower()
+
+
+def class_profile(character_class: Optional[str]) -> ClassProfile:
+    name = _normalize(character_class)
+    return CLASS_PROFILES.get(CLASS_ALIASES.get(name, name), DEFAULT_CLASS)
+
+
+def character_combatant(character: models.Character) -> Combatant:
+    """
+    O modelo só guarda classe e nível; o resto vem de um perfil típico da
+    classe (atributo principal +3, +1 nos níveis 4 e 8, Constituição +2).
+    """
+    level = max(1, min(20, character.level or 1))
+    profile = class_profile(character.character_class)
+    proficiency = 2 + (level - 1) // 4
+    ability = 3 + (level >= 4) + (level >= 8)
+    constitution = 2
+    hit_points = profile.hit_die + constitution + (level - 1) * (profile.hit_die // 2 + 1 + constitution)
+
+    if profile.cantrip:
+        dice = 1 + (level >= 5) + (level >= 11) + (level >= 17)
+        damage = f"{dice}d{profile.damage.split('d')[1]}"
+    elif profile is CLASS_PROFILES["rogue"]:
+        damage = f"{profile.damage}+{(level + 1) // 2}d6+{ability}"  # Ataque furtivo
+    else:
+        damage = f"{profile.damage}+{ability}"
+    return Combatant(
+        name=character.name,
+        hit_points=compile_dice(str(hit_points)),
+        armor_class=profile.armor_class,
+        attack_bonus=proficiency + ability,
+        damage=compile_dice(damage),
+        attacks=1 + sum(level >= threshold for threshold in profile.extra_attack_levels),
+    )
+
+
+# --- MONSTROS ---
+# Estatísticas por CR (Dungeon Master's Guide, "Monster Statistics by Challenge
+# Rating"): CA, PV médios, bônus de ataque e dano por rodada. Só usadas para o
+# que o bloco do monstro não informa.
+CR_STATISTICS = (
+    (0.0, 13, 4, 3, 1), (0.125, 13, 21, 3, 3), (0.25, 13, 43, 3, 5), (0.5, 13, 60, 3, 7),
+    (1.0, 13, 78, 3, 12), (2.0, 13, 93, 3, 18), (3.0, 13, 108, 4, 24), (4.0, 14, 123, 5, 30),
+    (5.0, 15, 138, 6, 36), (6.0, 15, 153, 6, 42), (7.0, 15, 168, 6, 48), (8.0, 16, 183, 7, 54),
+    (9.0, 16, 198, 7, 60), (10.0, 17, 213, 7, 66), (11.0, 17, 228, 8, 72), (12.0, 17, 243, 8, 78),
+    (13.0, 18, 258, 8, 84), (14.0, 18, 273, 8, 90), (15.0, 18, 288, 8, 96), (16.0, 18, 303, 9, 102),
+    (17.0, 19, 318, 10, 108), (18.0, 19, 333, 10, 114), (19.0, 19, 348, 10, 120), (20.0, 19, 378, 10, 132),
+)
+
+_TO_HIT = re.compile(r"([+\-]\d+)\s*to hit", re.IGNORECASE)
+_HIT_DAMAGE = re.compile(r"Hit:\s*\d+\s*\(([^)]+)\)", re.IGNORECASE)
+_MULTIATTACK = re.compile(r"makes (two|three|four|2|3|4) (?:\w+ )?attacks", re.IGNORECASE)
+_NUMBERS = {"two": 2, "three": 3, "four": 4, "2": 2, "3": 3, "4": 4}
+
+
+def _cr_statistics(cr_value: Optional[float]):
+    cr_value = cr_value or 0.0
+    row = CR_STATISTICS[0]
+    for candidate in CR_STATISTICS:
+        if candidate[0] <= cr_value:
+            row = candidate
+    return row
+
+
+def _damage_from_average(average: float) -> str:
+    dice = max(1, round(average * 0.6 / 3.5))
+    modifier = round(average - dice * 3.5)
+    return f"{dice}d6{modifier:+d}" if modifier else f"{dice}d6"
+
+
+def monster_combatant(monster: models.Monster) -> Combatant:
+    """Usa o texto das ações ("+5 to hit", "Hit: 7 (1d8 + 3)") quando possível."""
+    _, cr_ac, cr_hp, cr_attack, cr_damage = _cr_statistics(monster.cr_value)
+    if monster.hp_dice_count and monster.hp_dice_size:
+        hit_points = f"{monster.hp_dice_count}d{monster.hp_dice_size}{monster.hp_modifier or 0:+d}"
+    else:
+        hit_points = str(monster.hp_average or cr_hp)
+
+    actions = monster.actions or ""
+    to_hit = _TO_HIT.search(actions)
+    hit_damage = _HIT_DAMAGE.search(actions)
+    multiattack = _MULTIATTACK.search(actions)
+    attacks = _NUMBERS[multiattack.group(1).lower()] if multiattack else 1
+    damage = None
+    if hit_damage:
+        try:
+            damage = compile_dice(hit_damage.group(1).replace(" ", ""))
+        except ValueError:
+            damage = None
+    if damage is None:
+        damage = compile_dice(_damage_from_average(cr_damage / attacks))
+    return Combatant(
+        name=monster.name,
+        hit_points=compile_dice(hit_points),
+        armor_class=monster.armor_class or cr_ac,
+        attack_bonus=int(to_hit.group(1)) if to_hit else cr_attack,
+        damage=damage,
+        attacks=attacks,
+    )
+
+
+# --- SIMULAÇÃO VETORIZADA ---
+def run_fights(party: Sequence[Combatant], monsters: Sequence[Combatant], fights: int,
+               max_rounds: int = DEFAULT_MAX_ROUNDS, seed=None) -> Dict[str, np.ndarray]:
+    """
+    Roda `fights` lutas independentes em paralelo: cada linha dos arrays é uma
+    luta, e o laço em Python percorre só rodadas x atacantes. Em cada rodada o
+    grupo age antes dos monstros; cada ataque escolhe um alvo vivo ao acaso.
+    """
+    rng = np.random.default_rng(seed)
+    combatants = list(party) + list(monsters)
+    size = len(party)
+    sides = np.array([PARTY] * size + [MONSTERS] * len(monsters))
+    armor = np.array([c.armor_class for c in combatants])
+    opponents = {PARTY: np.nonzero(sides == MONSTERS)[0], MONSTERS: np.nonzero(sides == PARTY)[0]}
+
+    hp = np.column_stack([np.maximum(c.hit_points.roll(fights, rng), 1) for c in combatants])
+    max_hp = hp.copy()
+    dealt = np.zeros_like(hp)
+    rounds = np.full(fights, max_rounds, dtype=np.int16)
+    active = np.ones(fights, dtype=bool)
+
+    for round_number in range(1, max_rounds + 1):
+        for index, combatant in enumerate(combatants):
+            targets = opponents[sides[index]]
+            fighting = np.nonzero(active & (hp[:, index] > 0))[0]
+            for _ in range(combatant.attacks):
+                if fighting.size == 0:
+                    break
+                alive = hp[np.ix_(fighting, targets)] > 0
+                keys = rng.random(alive.shape)
+                keys[~alive] = -1.0
+                choice = keys.argmax(axis=1)
+                target = targets[choice]
+                d20 = rng.integers(1, 21, size=fighting.size)
+                critical = d20 == 20
+                hit = alive[np.arange(fighting.size), choice] & (
+                    critical | ((d20 > 1) & (d20 + combatant.attack_bonus >= armor[target]))
+                )
+                damage = combatant.damage.roll(fighting.size, rng)
+                damage += np.where(critical, combatant.damage.roll_dice(fighting.size, rng), 0)
+                damage = np.where(hit, np.maximum(damage, 0), 0)
+                # Dano efetivo: o excedente sobre os PV restantes não conta
+                damage = np.minimum(damage, np.maximum(hp[fighting, target], 0))
+                hp[fighting, target] -= damage
+                dealt[fighting, index] += damage
+
+        party_up = (hp[:, :size] > 0).any(axis=1)
+        monsters_up = (hp[:, size:] > 0).any(axis=1)
+        ended = active & ~(party_up & monsters_up)
+        rounds[ended] = round_number
+        active &= ~ended
+        if not active.any():
+            break
+
+    party_up = (hp[:, :size] > 0).any(axis=1)
+    monsters_up = (hp[:, size:] > 0).any(axis=1)
+    outcome = np.where(~monsters_up & party_up, 0, np.where(~party_up, 1, 2)).astype(np.int8)
+    return {
+        "outcome": outcome,
+        "rounds": rounds,
+        "down": hp <= 0,
+        "dealt": dealt,
+        "taken": max_hp - np.maximum(hp, 0),
+    }
+
+
+def _distribution(values: np.ndarray) -> dict:
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        "mean": float(values.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        "histogram": {"edges": edges.round(2).tolist(), "counts": counts.tolist()},
+    }
+
+
+def summarize(arrays: Dict[str, np.ndarray], party: Sequence[Combatant], monsters: Sequence[Combatant]) -> dict:
+    size = len(party)
+    outcome, rounds = arrays["outcome"], arrays["rounds"]
+    fights = len(outcome)
+    rates = np.bincount(outcome, minlength=3) / fights
+    combatants = [(c, "party") for c in party] + [(c, "monsters") for c in monsters]
+    return {
+        "fights": fights,
+        "rounds_simulated": int(rounds.sum()),
+        "win_rate": {name: float(rate) for name, rate in zip(OUTCOMES, rates)},
+        "rounds": _distribution(rounds),
+        "party_damage_dealt": _distribution(arrays["dealt"][:, :size].sum(axis=1)),
+        "party_damage_taken": _distribution(arrays["taken"][:, :size].sum(axis=1)),
+        "combatants": [
+            {
+                "name": combatant.name,
+                "side": side,
+                "down_rate": float(arrays["down"][:, i].mean()),
+                "mean_damage_dealt": float(arrays["dealt"][:, i].mean()),
+                "mean_damage_taken": float(arrays["taken"][:, i].mean()),
+            }
+            for i, (combatant, side) in enumerate(combatants)
+        ],
+    }
+
+
+# --- POOL DE PROCESSOS (OPCIONAL) ---
+class SimulationPool:
+    """
+    Divide simulações grandes entre processos (cada um com sua semente,
+    derivada por SeedSequence.spawn). Abaixo de `threshold` lutas, ou com
+    menos de 2 workers, tudo roda no próprio processo.
+    """
+
+    def __init__(self, workers: int, threshold: int):
+        self.workers = workers
+        self.threshold = threshold
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SimulationPool":
+        return cls(workers=settings.simulation_workers, threshold=settings.simulation_pool_threshold)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def run(self, party: Sequence[Combatant], monsters: Sequence[Combatant], fights: int,
+            max_rounds: int = DEFAULT_MAX_ROUNDS, seed=None) -> dict:
+        if self.workers < 2 or fights < self.threshold:
+            return summarize(run_fights(party, monsters, fights, max_rounds, seed), party, monsters)
+        seeds = np.random.SeedSequence(seed).spawn(self.workers)
+        chunks = [fights // self.workers + (i < fights % self.workers) for i in range(self.workers)]
+        futures = [
+            self._get_executor().submit(run_fights, party, monsters, chunk, max_rounds, child)
+            for chunk, child in zip(chunks, seeds) if chunk
+        ]
+        parts = [future.result() for future in futures]
+        merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        return summarize(merged, party, monsters)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def get_simulation_pool(connection: HTTPConnection) -> SimulationPool:
+    """Dependência: o pool de simulações da aplicação (app.state.simulation_pool)."""
+    return connection.app.state.simulation_pool
+
+
+def simulate(pool: SimulationPool, characters: List[models.Character], monsters: List[models.Monster], fights: int,
+             max_rounds: int = DEFAULT_MAX_ROUNDS, seed: Optional[int] = None) -> dict:
+    party = [character_combatant(c) for c in characters]
+    enemies = [monster_combatant(m) for m in monsters]
+    return pool.run(party, enemies, fights, max_rounds, seed)
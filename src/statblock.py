@@ -0,0 +1,157 @@
+import logging
+import re
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+from typing import Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from . import campaign_packs, database, models, versions
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+# XP por nível de desafio (D&D 5e, Dungeon Master's Guide)
+XP_BY_CR = {
+    0.0: 10, 0.125: 25, 0.25: 50, 0.5: 100,
+    1.0: 200, 2.0: 450, 3.0: 700, 4.0: 1100, 5.0: 1800,
+    6.0: 2300, 7.0: 2900, 8.0: 3900, 9.0: 5000, 10.0: 5900,
+    11.0: 7200, 12.0: 8400, 13.0: 10000, 14.0: 11500, 15.0: 13000,
+    16.0: 15000, 17.0: 18000, 18.0: 20000, 19.0: 22000, 20.0: 25000,
+    21.0: 33000, 22.0: 41000, 23.0: 50000, 24.0: 62000, 25.0: 75000,
+    26.0: 90000, 27.0: 105000, 28.0: 120000, 29.0: 135000, 30.0: 155000,
+}
+
+_DICE = re.compile(r"(\d+)\s*[dD]\s*(\d+)(?:\s*([+\-−–])\s*(\d+))?")
+_INTEGER = re.compile(r"\d+")
+_FRACTION = re.compile(r"(\d+)\s*/\s*(\d+)")
+_DECIMAL = re.compile(r"\d+(?:[.,]\d+)?")
+_UNICODE_FRACTIONS = {"½": "1/2", "¼": "1/4", "⅛": "1/8"}
+
+
+@dataclass(frozen=True)
+class StatBlock:
+    """Valores numéricos derivados dos campos de texto do monstro."""
+    hp_average: Optional[int] = None
+    hp_dice_count: Optional[int] = None
+    hp_dice_size: Optional[int] = None
+    hp_modifier: Optional[int] = None
+    cr_value: Optional[float] = None
+    xp: Optional[int] = None
+
+    def as_columns(self) -> dict:
+        return asdict(self)
+
+
+# --- PARSERS ---
+def parse_hit_points(text: Optional[str]) -> dict:
+    """
+    "22 (4d8 + 4)" -> média 22, 4d8, +4. Sem média explícita ("4d8+4"), ela
+    é calculada pela regra usual: dados * (faces + 1) / 2 + modificador.
+    """
+    result = {"hp_average": None, "hp_dice_count": None, "hp_dice_size": None, "hp_modifier": None}
+    if not text:
+        return result
+    dice = _DICE.search(text)
+    if dice:
+        count, size = int(dice.group(1)), int(dice.group(2))
+        modifier = int(dice.group(4) or 0)
+        if dice.group(3) and dice.group(3) != "+":
+            modifier = -modifier
+        result.update(hp_dice_count=count, hp_dice_size=size, hp_modifier=modifier)
+    average = _INTEGER.search(text[:dice.start()] if dice else text)
+    if average:
+        result["hp_average"] = int(average.group())
+    elif dice:
+        result["hp_average"] = max(1, count * (size + 1) // 2 + modifier)
+    return result
+
+
+def parse_challenge_rating(text: Optional[str]) -> Optional[float]:
+    """Aceita "1/2", "½", "0.5", "5" e variações como "CR 5 (1,800 XP)"."""
+    if not text:
+        return None
+    for symbol, fraction in _UNICODE_FRACTIONS.items():
+        text = text.replace(symbol, fraction)
+    fraction = _FRACTION.search(text)
+    if fraction:
+        if not int(fraction.group(2)):
+            return None
+        return float(Fraction(int(fraction.group(1)), int(fraction.group(2))))
+    decimal = _DECIMAL.search(text)
+    if decimal:
+        return float(decimal.group().replace(",", "."))
+    return None
+
+
+def parse_stat_block(hit_points: Optional[str], challenge_rating: Optional[str]) -> StatBlock:
+    cr_value = parse_challenge_rating(challenge_rating)
+    return StatBlock(
+        **parse_hit_points(hit_points),
+        cr_value=cr_value,
+        xp=XP_BY_CR.get(cr_value),
+    )
+
+
+def derived_columns(hit_points: Optional[str], challenge_rating: Optional[str]) -> dict:
+    """Colunas numéricas a gravar junto com o monstro (criação, importação...)."""
+    return parse_stat_block(hit_points, challenge_rating).as_columns()
+
+
+# --- BACKFILL ---
+def backfill_stat_blocks(db: Optional[Session] = None, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Preenche as colunas derivadas dos monstros gravados antes delas existirem.
+    Processa em lotes pela chave primária e pode ser interrompido e retomado;
+    retorna quantos monstros foram atualizados.
+    """
+    own_session = db is None
+    db = db or database.SessionLocal()
+    updated = 0
+    last_id = ""
+    try:
+        while True:
+            rows = db.execute(
+                select(models.Monster.id, models.Monster.creator_id, models.Monster.hit_points, models.Monster.challenge_rating)
+                .where(
+                    models.Monster.id > last_id,
+                    models.Monster.hp_average.is_(None),
+                    models.Monster.cr_value.is_(None),
+                    or_(models.Monster.hit_points.isnot(None), models.Monster.challenge_rating.isnot(None)),
+                )
+                .order_by(models.Monster.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            changes = []
+            creators = set()
+            for row in rows:
+                columns = derived_columns(row.hit_points, row.challenge_rating)
+                if any(value is not None for value in columns.values()):
+                    changes.append({"id": row.id, **columns})
+                    creators.add(row.creator_id)
+            if changes:
+                # UPDATE em massa pela chave primária (executemany)
+                db.execute(update(models.Monster), changes)
+                # Os monstros aparecem nas listagens do dono, nas histórias e nas mesas
+                versions.bump(db, versions.TABLES, *[
+                    versions.scope(kind, creator) for creator in creators if creator for kind in ("monsters", "stories")
+                ])
+                campaign_packs.invalidate(db, monster_ids=[change["id"] for change in changes])
+                db.commit()
+                updated += len(changes)
+    finally:
+        if own_session:
+            db.close()
+    if updated:
+        logger.info("Colunas numéricas preenchidas em %d monstros", updated)
+    return updated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    backfill_stat_blocks()
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Escopos versionados. As listagens de mesas são globais (e embutem história,
+# jogadores e solicitações); o resto é por usuário, um escopo por coleção.
+TABLES = "tables"
+USER_CONTENT = ("characters", "items", "monsters", "npcs", "stories")
+
+
+def scope(kind: str, user_id: str) -> str:
+    return f"{kind}:{user_id}"
+
+
+def profile_scopes(user_id: str) -> tuple:
+    """Tudo o que aparece em /users/me: o próprio usuário, suas coleções e as mesas."""
+    return (scope("user", user_id),) + tuple(scope(kind, user_id) for kind in USER_CONTENT) + (TABLES,)
+
+
+# --- ESCRITA ---
+def bump(db: Session, *scopes: str):
+    """
+    Incrementa a versão dos escopos na transação corrente; quem chama faz o
+    commit junto com a escrita, então leitores nunca veem dado novo com
+    versão velha.
+    """
+    # Ordem fixa: duas transações concorrentes travam as linhas na mesma sequência
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    table = models.ContentVersion.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        factory = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        stmt = factory(table).values([{"scope": name, "version": 1} for name in scopes])
+        db.execute(stmt.on_conflict_do_update(index_elements=[table.c.scope], set_={"version": table.c.version + 1}))
+        return
+    for name in scopes:
+        increment = update(table).where(table.c.scope == name).values(version=table.c.version + 1)
+        if db.execute(increment).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(table).values(scope=name, version=1))
+        except IntegrityError:
+            db.execute(increment)
+
+
+# --- LEITURA ---
+def _select(scopes: Iterable[str]):
+    return select(models.ContentVersion.scope, models.ContentVersion.version).where(
+        models.ContentVersion.scope.in_(scopes)
+    )
+
+
+def current(db: Session, scopes: Iterable[str]) -> Dict[str, int]:
+    """Versão de cada escopo (0 para os que nunca foram escritos), numa única consulta."""
+    scopes = tuple(scopes)
+    found = dict(db.execute(_select(scopes)).all())
+    return {name: found.get(name, 0) for name in scopes}
+
+
+async def current_async(db: AsyncSession, scopes: Iterable[str]) -> Dict[str, int]:
+    scopes = tuple(scopes)
+    found = dict((await db.execute(_select(scopes))).all())
+    return {name: found.get(name, 0) for name in scopes}
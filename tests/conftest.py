@@ -0,0 +1,78 @@
+"""
+Fixtures compartilhadas. Cada teste ganha um banco SQLite próprio, já
+migrado, em tmp_path; nada toca o dungeon_keeper.db do projeto.
+"""
+import dataclasses
+import os
+import uuid
+
+# Antes de importar a aplicação: hash barato e sem pool de processos
+os.environ.setdefault("HASH_EXECUTOR", "thread")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import migrations, models
+from src.config import get_settings
+from src.database import Database
+from src.main import create_app
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return dataclasses.replace(
+        get_settings(),
+        database_url=f"sqlite:///{tmp_path / 'test.db'}",
+        avatar_dir=str(tmp_path / "avatars"),
+    )
+
+
+@pytest.fixture
+def database(settings):
+    db = Database(settings)
+    migrations.upgrade_to_head(db.engine)
+    yield db
+    db.engine.dispose()
+
+
+@pytest.fixture
+def make_user():
+    """Grava um usuário direto no banco, sem passar pelo hash de senha."""
+
+    def make(db, username: str, **fields) -> models.User:
+        user = models.User(id=str(uuid.uuid4()), username=username, email=f"{username}@example.com",
+                           hashed_password="-", **fields)
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def app(settings):
+    return create_app(settings)
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    """Cria uma conta pela API e devolve os cabeçalhos de autenticação dela."""
+
+    def register(username: str, password: str = "segredo123") -> dict:
+        response = client.post("/api/v1/register", json={
+            "username": username, "email": f"{username}@example.com", "password": password,
+        })
+        assert response.status_code == 200, response.text
+        response = client.post("/api/v1/token", json={"username": username, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return register
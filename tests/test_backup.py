@@ -0,0 +1,113 @@
+"""Backup: registros e seções malformados na importação e a volta completa export -> import."""
+import gzip
+import json
+
+import pytest
+
+MONSTER = {"name": "Goblin", "size": "Small", "type": "humanoid", "armor_class": 15, "hit_points": "7 (2d6)",
+           "speed": "30 ft.", "challenge_rating": "1/4"}
+
+
+def import_backup(client, headers, content: bytes, filename: str, **params):
+    return client.post("/api/v1/backup/import", headers=headers, params=params,
+                       files={"file": (filename, content, "application/octet-stream")})
+
+
+def ndjson(*lines) -> bytes:
+    header = {"section": "header", "data": {"version": 1}}
+    return "".join(json.dumps(line) + "\n" for line in (header, *lines)).encode()
+
+
+# --- Registros e seções malformados ---
+@pytest.mark.parametrize("content, filename", [
+    (json.dumps({"items": [1, {"name": "Espada"}, "x", None]}).encode(), "backup.json"),
+    (ndjson({"section": "items", "data": 1}, {"section": "items", "data": {"name": "Espada"}},
+            {"section": "items", "data": "x"}, {"section": "items", "data": None}), "backup.ndjson"),
+])
+def test_non_object_records_are_skipped_and_reported(client, register, content, filename):
+    headers = register("mestre")
+    response = import_backup(client, headers, content, filename)
+    assert response.status_code == 200, response.text
+    items = response.json()["report"]["items"]
+    assert (items["received"], items["imported"], items["skipped"]) == (4, 1, 3)
+    assert [error["id"] for error in items["errors"]] == [None, None, None]
+    assert all(error["error"][0]["type"] == "model_type" for error in items["errors"])
+
+    # strict: um registro inválido cancela tudo
+    response = import_backup(client, headers, content, filename, strict=True)
+    assert response.status_code == 400
+    assert [item["name"] for item in client.get("/api/v1/items/", headers=headers).json()["items"]] == ["Espada"]
+
+
+@pytest.mark.parametrize("content, filename, message", [
+    (json.dumps({"items": "x"}).encode(), "backup.json", "A seção 'items' deve ser uma lista."),
+    (json.dumps({"items": {"name": "Espada"}}).encode(), "backup.json", "A seção 'items' deve ser uma lista."),
+    (ndjson(["items", {"name": "Espada"}]), "backup.ndjson", "A linha 2 não é um objeto JSON."),
+    (b'{"section": "header", "data": "v1"}\n', "backup.ndjson", "Versão de backup não suportada: None"),
+])
+def test_malformed_sections_are_rejected(client, register, content, filename, message):
+    headers = register("mestre")
+    response = import_backup(client, headers, content, filename)
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
+    assert client.get("/api/v1/items/", headers=headers).json()["items"] == []
+
+
+# --- Export -> import ---
+def _seed(client, headers) -> dict:
+    def post(path, body):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    post("/api/v1/characters", {"name": "Herói", "race": "Elfo", "character_class": "Mago"})
+    sword = post("/api/v1/items/", {"name": "Espada"})
+    post("/api/v1/items/", {"name": "Escudo"})
+    goblin = post("/api/v1/monsters/", MONSTER)
+    npc = post("/api/v1/npcs/", {"name": "Taverneiro"})
+    post("/api/v1/stories/", {"title": "A Cripta", "item_ids": [sword], "monster_ids": [goblin], "npc_ids": [npc]})
+    return {"items": [sword], "monsters": [goblin], "npcs": [npc]}
+
+
+def _export(client, headers, **params) -> bytes:
+    response = client.get("/api/v1/backup/export/stream", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def _names(client, headers, path):
+    return sorted(row["name"] for row in client.get(path, headers=headers).json()["items"])
+
+
+@pytest.mark.parametrize("params, filename", [
+    ({"format": "json"}, "backup.json"),
+    ({"format": "ndjson", "compress": True}, "backup.ndjson.gz"),
+])
+def test_export_import_round_trip(client, register, params, filename):
+    original = register("mestre")
+    original_links = _seed(client, original)
+    content = _export(client, original, batch_size=1, **params)
+    if params.get("compress"):
+        assert gzip.decompress(content)
+
+    restored = register("outro")
+    response = import_backup(client, restored, content, filename, batch_size=1)
+    assert response.status_code == 200, response.text
+    report = response.json()["report"]
+    assert {section: counts["imported"] for section, counts in report.items()} == {
+        "characters": 1, "items": 2, "monsters": 1, "npcs": 1, "stories": 1,
+    }
+    assert report["stories"]["unresolved_links"] == 0
+
+    for path in ("/api/v1/characters", "/api/v1/items/", "/api/v1/monsters/", "/api/v1/npcs/"):
+        assert _names(client, restored, path) == _names(client, original, path)
+
+    # A história aponta para as cópias novas, não para o conteúdo da conta original
+    (story,) = client.get("/api/v1/stories/", headers=restored).json()["items"]
+    assert story["title"] == "A Cripta"
+    restored_items = {row["name"]: row["id"] for row in client.get("/api/v1/items/", headers=restored).json()["items"]}
+    assert [item["id"] for item in story["items"]] == [restored_items["Espada"]]
+    for section in ("items", "monsters", "npcs"):
+        linked = [entry["id"] for entry in story[section]]
+        assert len(linked) == 1
+        assert linked != original_links[section]
@@ -0,0 +1,97 @@
+"""Pacotes de campanha: variante dos jogadores e remontagem quando o conteúdo vinculado muda."""
+import pytest
+from sqlalchemy import update
+
+from src import campaign_packs, models, statblock
+
+MONSTER = {"name": "Goblin", "size": "Small", "type": "humanoid", "armor_class": 15, "hit_points": "7 (2d6)",
+           "speed": "30 ft.", "challenge_rating": "1/4"}
+
+
+@pytest.fixture
+def campaign(client, register):
+    """Mestre com uma história (item, monstro e NPC com notas) numa mesa; um jogador aprovado."""
+    master, player = register("mestre"), register("jogador")
+
+    def post(path, body, headers=master):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    ids = {
+        "item": post("/api/v1/items/", {"name": "Espada"}),
+        "monster": post("/api/v1/monsters/", MONSTER),
+        "npc": post("/api/v1/npcs/", {"name": "Taverneiro", "notes": "É o vilão"}),
+    }
+    ids["story"] = post("/api/v1/stories/", {"title": "A Cripta", "item_ids": [ids["item"]],
+                                             "monster_ids": [ids["monster"]], "npc_ids": [ids["npc"]]})
+    ids["table"] = post("/api/v1/tables", {"title": "Mesa", "story_id": ids["story"]})
+    request_id = post(f"/api/v1/tables/{ids['table']}/join", {}, headers=player)
+    post(f"/api/v1/tables/requests/{request_id}/approve", {})
+    return master, player, ids
+
+
+def _pack(client, headers, path):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_player_variant_omits_npc_notes(client, campaign):
+    master, player, ids = campaign
+    table_pack = f"/api/v1/tables/{ids['table']}/pack"
+    story_pack = f"/api/v1/stories/{ids['story']}/pack"
+
+    for path in (table_pack, story_pack):
+        (npc,) = _pack(client, master, path).json()["npcs"]
+        assert npc["notes"] == "É o vilão"
+    for headers, path in ((player, table_pack), (master, f"{story_pack}?variant=player")):
+        pack = _pack(client, headers, path).json()
+        (npc,) = pack["npcs"]
+        assert npc["name"] == "Taverneiro" and "notes" not in npc
+        assert [item["name"] for item in pack["items"]] == ["Espada"]
+
+
+def test_pack_rebuilds_when_linked_npc_changes(app, client, campaign):
+    master, player, ids = campaign
+    path = f"/api/v1/tables/{ids['table']}/pack"
+    first = _pack(client, master, path)
+    builds = campaign_packs.stats.builds
+
+    def rename(name, invalidate):
+        with app.state.database.SessionLocal() as db:
+            db.execute(update(models.NPC).where(models.NPC.id == ids["npc"]).values(name=name))
+            if invalidate:
+                campaign_packs.invalidate(db, npc_ids=[ids["npc"]])
+            db.commit()
+
+    # A escrita invalida na mesma transação: a próxima leitura remonta as duas variantes
+    rename("Estalajadeiro", invalidate=True)
+    second = _pack(client, master, path)
+    assert second.json()["npcs"][0]["name"] == "Estalajadeiro"
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert _pack(client, player, path).json()["npcs"][0]["name"] == "Estalajadeiro"
+    assert campaign_packs.stats.builds == builds + 1
+
+    # Sem invalidate() o pacote gravado continua valendo
+    rename("Ninguém", invalidate=False)
+    assert _pack(client, master, path).headers["ETag"] == second.headers["ETag"]
+    assert client.get(path, headers={**master, "If-None-Match": second.headers["ETag"]}).status_code == 304
+
+
+def test_stat_block_backfill_rebuilds_pack(app, client, campaign):
+    master, _, ids = campaign
+    path = f"/api/v1/stories/{ids['story']}/pack"
+    with app.state.database.SessionLocal() as db:
+        # Como um monstro gravado antes das colunas derivadas existirem
+        db.execute(update(models.Monster).where(models.Monster.id == ids["monster"]).values(
+            **{column: None for column in statblock.derived_columns("7 (2d6)", "1/4")}
+        ))
+        campaign_packs.invalidate(db, story_ids=[ids["story"]])
+        db.commit()
+    assert _pack(client, master, path).json()["monsters"][0]["hp_average"] is None
+
+    with app.state.database.SessionLocal() as db:
+        assert statblock.backfill_stat_blocks(db) == 1
+    (monster,) = _pack(client, master, path).json()["monsters"]
+    assert (monster["hp_average"], monster["cr_value"], monster["xp"]) == (7, 0.25, 50)
@@ -0,0 +1,33 @@
+"""Criação em lote: todas as rotas de lote autenticam pelo usuário ativo."""
+import pytest
+from sqlalchemy import update
+
+from src import models
+
+ROUTES = ["/api/v1/characters/batch", "/api/v1/items/batch", "/api/v1/monsters/batch", "/api/v1/npcs/batch"]
+
+
+def test_character_batch_creates_for_current_user(client, register):
+    headers = register("mestre")
+    response = client.post("/api/v1/characters/batch", headers=headers, json={"items": [
+        {"name": "Herói", "race": "Elfo", "character_class": "Mago"},
+        {"name": "Sem classe"},
+    ]})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert len(result["created"]) == 1
+    assert [error["index"] for error in result["errors"]] == [1]
+
+    listed = client.get("/api/v1/characters", headers=headers).json()
+    assert [character["id"] for character in listed["items"]] == result["created"]
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_batch_rejects_deactivated_user(app, client, register, path):
+    headers = register("mestre")
+    with app.state.database.SessionLocal() as db:
+        db.execute(update(models.User).where(models.User.username == "mestre").values(is_active=False))
+        db.commit()
+    response = client.post(path, headers=headers, json={"items": [{"name": "X"}]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
@@ -0,0 +1,86 @@
+"""Solicitações para entrar numa mesa: duplicadas, decisões repetidas e o lote do mestre."""
+import pytest
+
+
+@pytest.fixture
+def post(client):
+    def post(path, headers, body=None):
+        return client.post(path, json=body or {}, headers=headers)
+    return post
+
+
+def _table(post, headers, title="Mesa") -> str:
+    story = post("/api/v1/stories/", headers, {"title": f"História de {title}"}).json()
+    response = post("/api/v1/tables", headers, {"title": title, "story_id": story["id"]})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def _join(post, headers, table_id) -> str:
+    response = post(f"/api/v1/tables/{table_id}/join", headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def _pending(client, headers, table_id):
+    return [row["id"] for row in client.get(f"/api/v1/tables/{table_id}/requests", headers=headers).json()["items"]]
+
+
+def test_duplicate_pending_request_is_rejected(post, register):
+    master, player = register("mestre"), register("jogador")
+    table_id = _table(post, master)
+    _join(post, player, table_id)
+    response = post(f"/api/v1/tables/{table_id}/join", player)
+    assert response.status_code == 400
+
+
+def test_request_is_decided_once_and_only_by_the_master(client, post, register):
+    master, player, intruder = register("mestre"), register("jogador"), register("intruso")
+    table_id = _table(post, master)
+    request_id = _join(post, player, table_id)
+
+    # Outro usuário não enxerga a solicitação: 404, e ela continua pendente
+    assert post(f"/api/v1/tables/requests/{request_id}/approve", intruder).status_code == 404
+    assert _pending(client, master, table_id) == [request_id]
+
+    response = post(f"/api/v1/tables/requests/{request_id}/approve", master)
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+    for action in ("approve", "decline"):
+        assert post(f"/api/v1/tables/requests/{request_id}/{action}", master).status_code == 404
+    assert _pending(client, master, table_id) == []
+
+    # Já é jogador: não pode pedir de novo
+    assert post(f"/api/v1/tables/{table_id}/join", player).status_code == 400
+
+
+def test_batch_skips_overlapping_and_foreign_ids(client, post, register):
+    master = register("mestre")
+    table_id = _table(post, master)
+    other_table_id = _table(post, master, "Outra mesa")
+    players = [register(f"jogador{i}") for i in range(4)]
+    approve, decline, both, already = (_join(post, headers, table_id) for headers in players)
+    foreign = _join(post, players[0], other_table_id)
+    post(f"/api/v1/tables/requests/{already}/decline", master)
+
+    response = post(f"/api/v1/tables/{table_id}/requests/batch", master, {
+        "approve": [approve, both, foreign, approve, "inexistente"],
+        "decline": [decline, both, already],
+    })
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "approved": [approve],
+        "declined": [decline],
+        "skipped": [both, foreign, "inexistente", already],
+    }
+    # Quem apareceu nas duas listas continua pendente; a da outra mesa também
+    assert _pending(client, master, table_id) == [both]
+    assert _pending(client, master, other_table_id) == [foreign]
+
+
+def test_batch_requires_the_table_master(post, register):
+    master, player = register("mestre"), register("jogador")
+    table_id = _table(post, master)
+    request_id = _join(post, player, table_id)
+    response = post(f"/api/v1/tables/{table_id}/requests/batch", player, {"approve": [request_id]})
+    assert response.status_code == 403
@@ -0,0 +1,118 @@
+"""
+Migrações e índices: as consultas de dono/criador e da fila de solicitações
+varrem a tabela antes da 0003 e usam o índice delas depois.
+"""
+import uuid
+
+import pytest
+from alembic import command
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+
+from src import migrations, models
+from src.database import Database
+from src.diagnostics import assert_no_full_scan, assert_uses_index
+
+# (modelo, filtro, índice esperado na última revisão)
+QUERIES = [
+    (models.Character, lambda m: [m.owner_id == "u1"], "ix_characters_owner_id_created_at"),
+    (models.Item, lambda m: [m.creator_id == "u1"], "ix_items_creator_id_created_at"),
+    (models.Monster, lambda m: [m.creator_id == "u1"], "ix_monsters_creator_id_created_at"),
+    (models.NPC, lambda m: [m.creator_id == "u1"], "ix_npcs_creator_id_created_at"),
+    (models.Story, lambda m: [m.creator_id == "u1"], "ix_stories_creator_id_created_at"),
+    (models.JoinRequest, lambda m: [m.table_id == "t1", m.status == "pending"], "ix_join_requests_table_id_status"),
+    (models.JoinRequest, lambda m: [m.user_id == "u1"], "ix_join_requests_user_id"),
+    (models.Table, lambda m: [m.master_id == "u1"], "ix_tables_master_id"),
+]
+IDS = [index for _, _, index in QUERIES]
+
+
+def page_query(model, criteria, *columns):
+    """Mesmo formato da paginação do crud: filtro + ORDER BY created_at, id + LIMIT."""
+    return select(*(columns or [model])).where(*criteria(model)).order_by(model.created_at, model.id).limit(21)
+
+
+@pytest.fixture
+def engine(settings):
+    """Banco vazio, sem migração nenhuma."""
+    db = Database(settings)
+    yield db.engine
+    db.engine.dispose()
+
+
+def upgrade(engine, revision: str):
+    with engine.begin() as connection:
+        command.upgrade(migrations.alembic_config(connection), revision)
+
+
+@pytest.mark.parametrize("model, criteria, index", QUERIES, ids=IDS)
+def test_queries_scan_before_indexes(engine, model, criteria, index):
+    upgrade(engine, "0002")
+    with engine.connect() as connection:
+        # Só o id: as colunas das migrações seguintes ainda não existem
+        with pytest.raises(AssertionError, match="Varredura completa"):
+            assert_no_full_scan(connection, page_query(model, criteria, model.id), model.__tablename__)
+
+
+@pytest.mark.parametrize("model, criteria, index", QUERIES, ids=IDS)
+def test_queries_use_indexes_at_head(engine, model, criteria, index):
+    upgrade(engine, "head")
+    with engine.connect() as connection:
+        stmt = page_query(model, criteria)
+        assert_uses_index(connection, stmt, index)
+        assert_no_full_scan(connection, stmt, model.__tablename__)
+
+
+def _table_with_master(db, make_user):
+    master = make_user(db, "mestre")
+    story = models.Story(id=str(uuid.uuid4()), title="História", creator_id=master.id)
+    table = models.Table(id=str(uuid.uuid4()), title="Mesa", master_id=master.id, story_id=story.id)
+    db.add_all([story, table])
+    db.commit()
+    return table
+
+
+def test_one_pending_request_per_table_and_user(database, make_user):
+    with database.SessionLocal() as db:
+        table = _table_with_master(db, make_user)
+        player = make_user(db, "jogador")
+
+        def request(status="pending"):
+            db.add(models.JoinRequest(id=str(uuid.uuid4()), table_id=table.id, user_id=player.id, status=status))
+            db.commit()
+
+        request()
+        with pytest.raises(IntegrityError, match="UNIQUE"):
+            request()
+        db.rollback()
+
+        # Recusadas não contam: o jogador pode pedir de novo
+        db.execute(text("UPDATE join_requests SET status = 'declined'"))
+        db.commit()
+        request()
+        request("declined")
+        statuses = db.execute(select(models.JoinRequest.status).order_by(models.JoinRequest.status)).scalars().all()
+        assert statuses == ["declined", "declined", "pending"]
+
+
+def test_upgrade_declines_duplicate_pending_requests(engine):
+    upgrade(engine, "0002")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, email) VALUES ('u1', 'mestre', 'm@x'), ('u2', 'jogador', 'j@x')"))
+        connection.execute(text("INSERT INTO stories (id, title, creator_id, created_at) VALUES ('s1', 'H', 'u1', '2026-01-01 00:00:00.000000')"))
+        connection.execute(text(
+            "INSERT INTO tables (id, title, master_id, story_id, created_at) "
+            "VALUES ('t1', 'Mesa', 'u1', 's1', '2026-01-01 00:00:00.000000')"
+        ))
+        connection.execute(text(
+            "INSERT INTO join_requests (id, table_id, user_id, status, created_at) VALUES "
+            "('r2', 't1', 'u2', 'pending', '2026-01-02 00:00:00.000000'), "
+            "('r1', 't1', 'u2', 'pending', '2026-01-01 00:00:00.000000'), "
+            "('r3', 't1', 'u2', 'pending', '2026-01-03 00:00:00.000000')"
+        ))
+
+    upgrade(engine, "head")
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, status FROM join_requests ORDER BY id")).all()
+    # Fica a mais antiga; as outras são recusadas para o índice único existir
+    assert [tuple(row) for row in rows] == [("r1", "pending"), ("r2", "declined"), ("r3", "declined")]
@@ -0,0 +1,168 @@
+"""Outbox de notificações: o dispatcher contra um servidor SMTP de verdade (aiosmtpd)."""
+import dataclasses
+import socket
+from datetime import datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import update
+
+from src import models, notifications
+
+
+class Inbox:
+    """Handler do aiosmtpd: guarda as mensagens e recusa as `fail` primeiras."""
+
+    def __init__(self):
+        self.messages = []
+        self.fail = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail:
+            self.fail -= 1
+            return "451 Tente mais tarde"
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def inbox():
+    handler = Inbox()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+@pytest.fixture
+def dispatcher(inbox, settings, database):
+    _, port = inbox
+    settings = dataclasses.replace(
+        settings, smtp_host="127.0.0.1", smtp_port=port, notification_digest_seconds=60,
+        notification_retry_base_seconds=30, notification_max_attempts=3,
+    )
+    return notifications.NotificationDispatcher(settings, database.SessionLocal)
+
+
+def _enqueue_join_requests(dispatcher, db, master, usernames):
+    for username in usernames:
+        notifications.enqueue(dispatcher.settings, db, [master.id], "join_request", table_id="t1", table_title="Mesa", username=username)
+    db.commit()
+
+
+def _outbox(db, recipient_id):
+    db.expire_all()
+    return db.query(models.Notification).filter_by(recipient_id=recipient_id).order_by(models.Notification.id).all()
+
+
+def _make_due(db, *notification_ids, ago=timedelta(seconds=1)):
+    db.execute(
+        update(models.Notification)
+        .where(models.Notification.id.in_(notification_ids))
+        .values(available_at=datetime.utcnow() - ago)
+    )
+    db.commit()
+
+
+def test_staggered_requests_go_out_in_one_digest(dispatcher, inbox, database, make_user):
+    handler, _ = inbox
+    with database.SessionLocal() as db:
+        master = make_user(db, "mestre")
+        _enqueue_join_requests(dispatcher, db, master, ["ana", "bia", "caio"])
+        first, second, third = _outbox(db, master.id)
+        # Ninguém venceu a janela ainda
+        assert dispatcher.dispatch_once() == 0
+
+        # Só a mais antiga venceu; as outras chegaram depois, ainda dentro da janela
+        _make_due(db, first.id)
+        assert dispatcher.dispatch_once() == 3
+        assert dispatcher.dispatch_once() == 0
+
+        assert [n.status for n in _outbox(db, master.id)] == ["sent"] * 3
+    assert len(handler.messages) == 1
+    message = handler.messages[0]
+    assert message["To"] == "mestre@example.com"
+    assert message["Subject"] == "Dungeon Keeper: 3 novidades"
+    body = message.get_payload(decode=True).decode()
+    for username in ("ana", "bia", "caio"):
+        assert f"{username} pediu para entrar" in body
+    assert dispatcher.emails == 1 and dispatcher.sent == 3
+
+
+def test_smtp_failure_is_retried_with_backoff(dispatcher, inbox, database, make_user):
+    handler, _ = inbox
+    handler.fail = 2
+    with database.SessionLocal() as db:
+        master = make_user(db, "mestre")
+        _enqueue_join_requests(dispatcher, db, master, ["ana"])
+        (notification,) = _outbox(db, master.id)
+
+        for attempt, delay in ((1, 30), (2, 60)):
+            _make_due(db, notification.id)
+            before = datetime.utcnow()
+            assert dispatcher.dispatch_once() == 1
+            (notification,) = _outbox(db, master.id)
+            assert notification.status == "pending"
+            assert notification.attempts == attempt
+            assert notification.claim_token is None
+            assert "451" in notification.last_error
+            # Backoff exponencial: 30 s, depois 60 s
+            wait = notification.available_at - before
+            assert timedelta(seconds=delay - 1) <= wait <= timedelta(seconds=delay + 1)
+            # Em backoff ela não é reservada de novo
+            assert dispatcher.dispatch_once() == 0
+
+        _make_due(db, notification.id)
+        assert dispatcher.dispatch_once() == 1
+        (notification,) = _outbox(db, master.id)
+        assert notification.status == "sent"
+        assert notification.sent_at is not None
+    assert len(handler.messages) == 1
+    assert dispatcher.retried == 2 and dispatcher.sent == 1
+
+
+def test_gives_up_after_max_attempts(dispatcher, inbox, database, make_user):
+    handler, _ = inbox
+    handler.fail = 10
+    with database.SessionLocal() as db:
+        master = make_user(db, "mestre")
+        _enqueue_join_requests(dispatcher, db, master, ["ana"])
+        (notification,) = _outbox(db, master.id)
+        for _ in range(dispatcher.settings.notification_max_attempts):
+            _make_due(db, notification.id)
+            assert dispatcher.dispatch_once() == 1
+        (notification,) = _outbox(db, master.id)
+        assert notification.status == "failed"
+        assert notification.attempts == 3
+        _make_due(db, notification.id)
+        assert dispatcher.dispatch_once() == 0
+    assert handler.messages == []
+    assert dispatcher.failed == 1
+
+
+def test_opted_out_recipients_are_skipped(dispatcher, inbox, database, make_user):
+    handler, _ = inbox
+    with database.SessionLocal() as db:
+        master = make_user(db, "mestre")
+        quiet = make_user(db, "quieto", notify_on_join_request=False)
+        # Quem já tinha desligado nem entra na fila
+        _enqueue_join_requests(dispatcher, db, quiet, ["ana"])
+        assert _outbox(db, quiet.id) == []
+
+        # Quem desliga depois de enfileirado é pulado na hora do envio
+        _enqueue_join_requests(dispatcher, db, master, ["ana", "bia"])
+        master.notify_on_join_request = False
+        db.commit()
+        _make_due(db, *[n.id for n in _outbox(db, master.id)])
+        assert dispatcher.dispatch_once() == 2
+
+        assert [n.status for n in _outbox(db, master.id)] == ["skipped", "skipped"]
+    assert handler.messages == []
+    assert dispatcher.skipped == 2 and dispatcher.sent == 0
@@ -0,0 +1,122 @@
+"""Cache de usuários autenticados: TTL, LRU, contadores e invalidação nas escritas."""
+import time
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from src import crud, schemas
+from src.principal_cache import PrincipalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def principal(user_id: str) -> schemas.AuthenticatedUser:
+    return schemas.AuthenticatedUser(id=user_id, username=user_id, email=f"{user_id}@example.com", is_active=True)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put("t1", principal("u1"))
+    clock.now += 59
+    assert cache.get("t1") == principal("u1")
+    clock.now += 1
+    assert cache.get("t1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_token_exp_shortens_ttl(clock):
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put("t1", principal("u1"), token_exp=time.time() + 5)
+    clock.now += 6
+    assert cache.get("t1") is None
+    # Token já expirado nem entra
+    cache.put("t2", principal("u1"), token_exp=time.time() - 1)
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.put("a", principal("u1"))
+    cache.put("b", principal("u2"))
+    assert cache.get("a") is not None  # "b" passa a ser o menos usado
+    cache.put("c", principal("u3"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_hit_and_miss_counters(clock):
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    assert cache.get("t1") is None
+    cache.put("t1", principal("u1"))
+    for _ in range(3):
+        cache.get("t1")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (3, 1, 0.75)
+
+
+def test_invalidate_user_drops_only_their_tokens(clock):
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put("u1-laptop", principal("u1"))
+    cache.put("u1-phone", principal("u1"))
+    cache.put("u2", principal("u2"))
+    cache.invalidate_user("u1")
+    assert cache.get("u1-laptop") is None and cache.get("u1-phone") is None
+    assert cache.get("u2") is not None
+    assert cache.stats()["invalidations"] == 2
+
+
+# --- Invalidação pelas escritas ---
+class StatusUpdate(BaseModel):
+    """update_user aplica qualquer schema parcial; a desativação só mexe em is_active."""
+    is_active: Optional[bool] = None
+
+
+def _user_id(client, headers) -> str:
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_profile_update_invalidates_cached_principal(app, client, register):
+    headers = register("mestre")
+    _user_id(client, headers)
+    cache = app.state.principal_cache
+    assert cache.stats()["size"] == 1
+
+    response = client.put("/api/v1/users/me", headers=headers, json={"bio": "Mestre há 20 anos"})
+    assert response.status_code == 200
+    assert (cache.stats()["size"], cache.stats()["invalidations"]) == (0, 1)
+
+
+def test_deactivation_is_seen_on_next_request(app, client, register):
+    headers = register("mestre")
+    user_id = _user_id(client, headers)
+    with app.state.database.SessionLocal() as db:
+        crud.update_user(db, user_id, StatusUpdate(is_active=False), principal_cache=app.state.principal_cache)
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_without_invalidation_cached_principal_outlives_deactivation(app, client, register):
+    # Scripts e o CLI não passam o cache: o usuário segue autenticado até o TTL
+    headers = register("mestre")
+    user_id = _user_id(client, headers)
+    with app.state.database.SessionLocal() as db:
+        crud.update_user(db, user_id, StatusUpdate(is_active=False))
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    app.state.principal_cache.clear()
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 400
@@ -0,0 +1,59 @@
+"""
+Orçamento de consultas das listagens principais: o número de comandos SQL
+é fixo, não cresce com o tamanho das coleções.
+"""
+import pytest
+
+from src.diagnostics import assert_query_budget
+
+# Comandos por requisição com o cache de respostas frio, incluindo a leitura
+# das versões de conteúdo. O usuário autenticado já está no cache de autenticação.
+BUDGETS = {
+    "/api/v1/users/me": 17,  # perfil + coleções + relações das mesas e histórias
+    "/api/v1/tables": 7,
+    "/api/v1/stories/": 5,
+}
+
+MONSTER = {"size": "Medium", "type": "humanoid", "armor_class": 12, "hit_points": "11 (2d8 + 2)",
+           "speed": "30 ft.", "challenge_rating": "1/4"}
+
+
+def seed(client, register, n: int) -> dict:
+    """Mestre com `n` registros por relação; `n` jogadores pedem para entrar em cada mesa."""
+    master = register("mestre")
+
+    def post(path, body, headers=master):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    for i in range(n):
+        post("/api/v1/characters", {"name": f"Herói {i}", "race": "Elfo", "character_class": "Mago"})
+    item_ids = [post("/api/v1/items/", {"name": f"Item {i}"})["id"] for i in range(n)]
+    monster_ids = [post("/api/v1/monsters/", {"name": f"Goblin {i}", **MONSTER})["id"] for i in range(n)]
+    npc_ids = [post("/api/v1/npcs/", {"name": f"NPC {i}"})["id"] for i in range(n)]
+    story_ids = [
+        post("/api/v1/stories/", {"title": f"História {i}", "item_ids": item_ids,
+                                  "monster_ids": monster_ids, "npc_ids": npc_ids})["id"]
+        for i in range(n)
+    ]
+    table_ids = [post("/api/v1/tables", {"title": f"Mesa {i}", "story_id": story_id})["id"]
+                 for i, story_id in enumerate(story_ids)]
+    for p in range(n):
+        player = register(f"jogador{p}")
+        for table_id in table_ids:
+            join_request = post(f"/api/v1/tables/{table_id}/join", {}, headers=player)
+            if p % 2 == 0:
+                post(f"/api/v1/tables/requests/{join_request['id']}/approve", {})
+    return master
+
+
+@pytest.mark.parametrize("n", [2, 6])
+@pytest.mark.parametrize("path", list(BUDGETS))
+def test_listing_query_budget(app, client, register, path, n):
+    headers = seed(client, register, n)
+    database = app.state.database
+    with assert_query_budget(BUDGETS[path], database.engine, database.async_engine):
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()
@@ -0,0 +1,110 @@
+"""Limites por cliente (429) e admissão das rotas pesadas (503)."""
+import asyncio
+import dataclasses
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import rate_limit
+from src.main import create_app
+
+POLICY = rate_limit.Policy("login", capacity=2, period=60)
+
+
+# --- Token buckets ---
+@pytest.fixture(params=["memory", "database"])
+def backend(request, database):
+    if request.param == "memory":
+        return rate_limit.MemoryBackend(max_keys=100)
+    return rate_limit.DatabaseBackend(database.async_engine)
+
+
+async def test_denied_take_spends_no_tokens(backend):
+    now = 1000.0
+    assert await backend.take(["ip:a", "user:ana"], POLICY, now) == 0
+    assert await backend.take(["ip:a", "user:ana"], POLICY, now) == 0
+    # ana esgotou: a tentativa de outro IP contra ela é recusada...
+    assert await backend.take(["ip:b", "user:ana"], POLICY, now) == pytest.approx(30)
+    # ...e não gastou nada do IP b, que ainda tem as duas fichas
+    assert await backend.take(["ip:b"], POLICY, now) == 0
+    assert await backend.take(["ip:b"], POLICY, now) == 0
+    assert await backend.take(["ip:b"], POLICY, now) > 0
+    # Uma ficha volta a cada 30 s
+    assert await backend.take(["ip:a", "user:ana"], POLICY, now + 30) == 0
+
+
+@pytest.fixture
+def limited_client(settings):
+    app = create_app(dataclasses.replace(settings, rate_limit_enabled=True, rate_limit_login="2/60"))
+    with TestClient(app) as client:
+        yield client
+
+
+def test_login_limit_answers_429_with_retry_after(limited_client):
+    for _ in range(2):
+        response = limited_client.post("/api/v1/token", json={"username": "ana", "password": "errada123"})
+        assert response.status_code == 401
+    response = limited_client.post("/api/v1/token", json={"username": "ana", "password": "errada123"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    policy = limited_client.get("/api/v1/health/rate-limits").json()["rate_limits"]["policies"]["login"]
+    assert (policy["allowed"], policy["limited"]) == (2, 1)
+
+
+# --- Admissão das rotas pesadas ---
+@pytest.fixture
+def heavy(app):
+    """Troca a admissão da aplicação por uma de uma vaga, com a fila escolhida pelo teste."""
+    def configure(max_queue: int, queue_timeout: float = 0.05) -> rate_limit.ConcurrencyLimiter:
+        app.state.heavy_routes = rate_limit.ConcurrencyLimiter(1, max_queue, queue_timeout)
+        return app.state.heavy_routes
+    return configure
+
+
+def _batch(client, headers):
+    return client.post("/api/v1/items/batch", headers=headers, json={"items": [{"name": "Espada"}]})
+
+
+@pytest.mark.parametrize("max_queue, counter", [(0, "shed"), (1, "timeouts")])
+def test_heavy_route_overload_answers_503(client, register, heavy, max_queue, counter):
+    headers = register("mestre")
+    limiter = heavy(max_queue)
+    client.portal.call(limiter.acquire)
+
+    # Fila cheia: recusa na hora; fila com lugar: espera o timeout e desiste
+    response = _batch(client, headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    stats = limiter.stats()
+    assert stats[counter] == 1
+    assert (stats["in_flight"], stats["waiting"]) == (1, 0)
+
+    limiter.release()
+    assert _batch(client, headers).status_code == 200
+    assert limiter.stats()["in_flight"] == 0
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    limiter = rate_limit.ConcurrencyLimiter(1, 2, queue_timeout=5)
+    await limiter.acquire()
+
+    # Cancelado enquanto espera na fila
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.stats()["waiting"] == 1
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limiter.stats()["waiting"] == 0
+
+    # Cancelado depois de release() já ter passado a vaga para ele
+    handed_over = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()
+    handed_over.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await handed_over
+
+    assert limiter.stats()["in_flight"] == 0
+    await asyncio.wait_for(limiter.acquire(), timeout=1)
+    assert limiter.stats()["in_flight"] == 1
@@ -0,0 +1,66 @@
+"""Cache de respostas e GET condicional: versões, ETag, 304 e isolamento por usuário."""
+from src import versions
+
+
+def _get(client, path, headers, etag=None):
+    if etag is not None:
+        headers = {**headers, "If-None-Match": etag}
+    return client.get(path, headers=headers)
+
+
+def _items_version(app, user_id) -> int:
+    with app.state.database.SessionLocal() as db:
+        scope = versions.scope("items", user_id)
+        return versions.current(db, [scope])[scope]
+
+
+def test_write_bumps_version_and_changes_etag(app, client, register):
+    headers = register("mestre")
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    first = _get(client, "/api/v1/items/", headers)
+    assert first.status_code == 200 and first.json()["items"] == []
+    assert _get(client, "/api/v1/items/", headers).headers["ETag"] == first.headers["ETag"]
+    assert app.state.response_cache.stats()["hits"] >= 1
+    before = _items_version(app, user_id)
+
+    assert client.post("/api/v1/items/", json={"name": "Espada"}, headers=headers).status_code == 200
+    assert _items_version(app, user_id) == before + 1
+
+    second = _get(client, "/api/v1/items/", headers)
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [item["name"] for item in second.json()["items"]] == ["Espada"]
+    # A query string faz parte do ETag: outra página, outro corpo
+    assert _get(client, "/api/v1/items/?limit=1", headers).headers["ETag"] != second.headers["ETag"]
+
+
+def test_if_none_match_answers_304_until_a_write(client, register):
+    headers = register("mestre")
+    etag = _get(client, "/api/v1/items/", headers).headers["ETag"]
+    for candidate in (etag, etag.removeprefix("W/"), f'"outro", {etag}', "*"):
+        response = _get(client, "/api/v1/items/", headers, candidate)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    assert _get(client, "/api/v1/items/", headers, '"outro"').status_code == 200
+
+    client.post("/api/v1/items/", json={"name": "Espada"}, headers=headers)
+    response = _get(client, "/api/v1/items/", headers, etag)
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["items"]] == ["Espada"]
+
+
+def test_cached_entries_are_per_user(client, register):
+    master, player = register("mestre"), register("jogador")
+    client.post("/api/v1/items/", json={"name": "Espada"}, headers=master)
+
+    for path in ("/api/v1/items/", "/api/v1/users/me", "/api/v1/tables"):
+        mine = _get(client, path, master)
+        _get(client, path, master)  # Agora com certeza no cache
+        theirs = _get(client, path, player)
+        assert theirs.status_code == 200
+        assert theirs.headers["ETag"] != mine.headers["ETag"]
+        # Nem o ETag do outro usuário vale como validador
+        assert _get(client, path, player, mine.headers["ETag"]).status_code == 200
+
+    assert _get(client, "/api/v1/items/", player).json()["items"] == []
+    assert _get(client, "/api/v1/users/me", player).json()["username"] == "jogador"
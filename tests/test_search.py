@@ -0,0 +1,111 @@
+"""Busca: o índice FTS5 da migração 0004 e a alternativa com LIKE quando ele não existe."""
+import pytest
+from sqlalchemy import text
+
+from src import search
+
+MONSTER = {"size": "Huge", "type": "dragon", "armor_class": 19, "hit_points": "178 (17d12 + 68)",
+           "speed": "40 ft.", "challenge_rating": "13"}
+
+
+def _drop_fts(engine):
+    """Estado de um SQLite sem o módulo fts5, em que a 0004 não cria nada."""
+    with engine.begin() as connection:
+        triggers = connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search_%'"
+        )).scalars().all()
+        for name in triggers:
+            connection.exec_driver_sql(f"DROP TRIGGER {name}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {search.FTS_TABLE}")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_documents")
+
+
+@pytest.fixture(params=["fts", "like"])
+def backend(request, app, client):
+    # Depois do client: a aplicação migra o banco ao subir
+    engine = app.state.database.engine
+    if request.param == "like":
+        _drop_fts(engine)
+    else:
+        with engine.connect() as connection:
+            if connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                  {"name": search.FTS_TABLE}).first() is None:
+                pytest.skip("SQLite sem fts5")
+    return request.param
+
+
+@pytest.fixture
+def content(backend, client, register):
+    """Conteúdo do mestre e, com os mesmos termos, de outro usuário."""
+    master, other = register("mestre"), register("outro")
+
+    def post(path, body, headers=master):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    ids = {
+        "monster": post("/api/v1/monsters/", {"name": "Dragão Vermelho", **MONSTER}),
+        "item": post("/api/v1/items/", {"name": "Escama de dragão", "description": "Arrancada de um dragão vermelho"}),
+        "npc": post("/api/v1/npcs/", {"name": "Caçador", "notes": "Persegue dragões"}),
+        "story": post("/api/v1/stories/", {"title": "O Covil", "synopsis": "Um dragão dorme sob a montanha"}),
+    }
+    post("/api/v1/items/", {"name": "Dragão de pelúcia"}, headers=other)
+    return master, other, ids
+
+
+def _search(client, headers, **params):
+    response = client.get("/api/v1/search", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_prefix_matches_every_type(client, content, backend):
+    master, _, ids = content
+    page = _search(client, master, q="drag")
+    assert {(hit["type"], hit["id"]) for hit in page["items"]} == {(kind, id_) for kind, id_ in ids.items()}
+    assert page["next_cursor"] is None
+    # Um título que começa pelo termo vem primeiro nas duas implementações
+    assert page["items"][0]["id"] == ids["monster"]
+    # Só o FTS5 devolve trecho destacado
+    assert all((hit["snippet"] is None) == (backend == "like") for hit in page["items"])
+
+    # Todos os termos precisam casar
+    assert [hit["id"] for hit in _search(client, master, q="drag verm")["items"]] == [ids["monster"], ids["item"]]
+    assert _search(client, master, q="drag montanhaX")["items"] == []
+
+
+def test_results_never_include_other_users_content(client, content):
+    master, other, _ = content
+    assert _search(client, master, q="pelúcia")["items"] == []
+    (hit,) = _search(client, other, q="drag")["items"]
+    assert hit["title"] == "Dragão de pelúcia"
+
+
+def test_type_filter(client, content):
+    master, _, ids = content
+    assert [hit["id"] for hit in _search(client, master, q="drag", type="monster")["items"]] == [ids["monster"]]
+    hits = _search(client, master, q="drag", type=["npc", "story"])["items"]
+    assert sorted((hit["type"], hit["id"]) for hit in hits) == [("npc", ids["npc"]), ("story", ids["story"])]
+
+
+def test_paging_with_next_cursor(backend, client, register):
+    headers = register("mestre")
+    created = {
+        client.post("/api/v1/items/", json={"name": f"Espada {n}"}, headers=headers).json()["id"]
+        for n in range(5)
+    }
+    seen, sizes, cursor = [], [], None
+    while True:
+        params = {"q": "espada", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = _search(client, headers, **params)
+        seen += [hit["id"] for hit in page["items"]]
+        sizes.append(len(page["items"]))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sizes == [2, 2, 1]
+    assert len(seen) == len(set(seen)) and set(seen) == created
+
+    response = client.get("/api/v1/search", headers=headers, params={"q": "espada", "cursor": "!!"})
+    assert response.status_code == 400
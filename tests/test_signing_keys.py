@@ -0,0 +1,185 @@
+"""Chaves de assinatura JWT: formatos de configuração, rotação pelo arquivo e o launcher."""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from src import auth, serve, signing_keys
+from src.config import get_settings
+from src.signing_keys import KeyRingError
+
+SECRET_A = "a" * 32
+SECRET_B = "b" * 32
+
+
+# --- JWT_SECRET_KEYS ---
+def test_parse_keys_first_is_active():
+    ring = signing_keys.parse_keys(f" k1:{SECRET_A} , k2:{SECRET_B},")
+    assert ring.active_kid == "k1"
+    assert ring.keys == {"k1": SECRET_A, "k2": SECRET_B}
+    assert ring.active_secret == SECRET_A
+    assert ring.secret_for("k2") == SECRET_B
+    assert ring.secret_for("k3") is None
+    assert ring.secret_for(None) is None
+    assert not ring.ephemeral
+
+
+@pytest.mark.parametrize("text", ["", " , ", f"k1{SECRET_A}", f":{SECRET_A}", "k1:"])
+def test_parse_keys_rejects_malformed(text):
+    with pytest.raises(KeyRingError):
+        signing_keys.parse_keys(text)
+
+
+def test_short_secret_only_warns(caplog):
+    ring = signing_keys.parse_keys("k1:curta")
+    assert ring.active_secret == "curta"
+    assert "menos de 32 caracteres" in caplog.text
+
+
+# --- JWT_KEYS_FILE ---
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_load_key_file(tmp_path):
+    path = _write(tmp_path / "keys.json", {"active": "k2", "keys": {"k1": SECRET_A, "k2": SECRET_B}})
+    ring = signing_keys.load_key_file(path)
+    assert ring.active_kid == "k2"
+    assert ring.keys == {"k1": SECRET_A, "k2": SECRET_B}
+
+
+def test_load_key_file_defaults_to_first_key(tmp_path):
+    path = _write(tmp_path / "keys.json", {"keys": {"k1": SECRET_A, "k2": SECRET_B}})
+    assert signing_keys.load_key_file(path).active_kid == "k1"
+
+
+@pytest.mark.parametrize("data", [
+    {"active": "k1", "keys": {}},
+    {"active": "k1"},
+    {"active": "k3", "keys": {"k1": SECRET_A}},
+])
+def test_load_key_file_rejects_invalid(tmp_path, data):
+    path = _write(tmp_path / "keys.json", data)
+    with pytest.raises(KeyRingError):
+        signing_keys.load_key_file(path)
+
+
+# --- Rotação pelo CLI ---
+def test_add_activate_prune(tmp_path):
+    path = str(tmp_path / "keys.json")
+    assert signing_keys.add_key(path, "k1") == "k1"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    # Num arquivo novo a primeira chave já é a ativa; as seguintes só validam
+    for kid in ("k2", "k3", "k4"):
+        signing_keys.add_key(path, kid)
+    ring = signing_keys.load_key_file(path)
+    assert ring.active_kid == "k1"
+    assert list(ring.keys) == ["k1", "k2", "k3", "k4"]
+    with pytest.raises(KeyRingError):
+        signing_keys.add_key(path, "k2")
+
+    signing_keys.activate_key(path, "k3")
+    assert signing_keys.load_key_file(path).active_kid == "k3"
+    with pytest.raises(KeyRingError):
+        signing_keys.activate_key(path, "k9")
+
+    # Vão as mais antigas; a ativa fica, mesmo não sendo a mais recente
+    assert signing_keys.prune_keys(path, keep=2) == ["k1", "k2"]
+    ring = signing_keys.load_key_file(path)
+    assert ring.active_kid == "k3"
+    assert list(ring.keys) == ["k3", "k4"]
+
+
+@pytest.mark.parametrize("keep", [0, 1])
+def test_prune_never_removes_active_key(tmp_path, keep):
+    path = str(tmp_path / "keys.json")
+    for kid in ("k1", "k2", "k3"):
+        signing_keys.add_key(path, kid)
+    signing_keys.activate_key(path, "k1")
+    assert signing_keys.prune_keys(path, keep=keep) == ["k2", "k3"]
+    assert list(signing_keys.load_key_file(path).keys) == ["k1"]
+
+
+def test_cli(tmp_path, capsys):
+    path = str(tmp_path / "keys.json")
+    assert signing_keys.main(["--file", path, "add", "--kid", "k1"]) == 0
+    assert signing_keys.main(["--file", path, "add", "--kid", "k2"]) == 0
+    assert signing_keys.main(["--file", path, "activate", "k2"]) == 0
+    capsys.readouterr()
+    assert signing_keys.main(["--file", path, "list"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["k1", "k2 (ativa)"]
+    assert signing_keys.main(["--file", path, "activate", "k9"]) == 1
+    assert "não existe" in capsys.readouterr().err
+
+
+# --- Validação por kid ---
+def _token(kid: str, secret: str) -> str:
+    claims = {"sub": "mestre", "user_id": "u1", "exp": datetime.utcnow() + timedelta(minutes=5)}
+    return jwt.encode(claims, secret, algorithm=auth.ALGORITHM, headers={"kid": kid})
+
+
+def test_token_signed_by_inactive_key_is_accepted(tmp_path):
+    path = str(tmp_path / "keys.json")
+    signing_keys.add_key(path, "old")
+    ring = signing_keys.load_key_file(path)
+    issued_before_rotation = auth.create_access_token({"sub": "mestre", "user_id": "u1"}, ring)
+    assert jwt.get_unverified_header(issued_before_rotation)["kid"] == "old"
+
+    signing_keys.add_key(path, "new")
+    signing_keys.activate_key(path, "new")
+    ring = signing_keys.load_key_file(path)
+    assert jwt.get_unverified_header(auth.create_access_token({"sub": "mestre", "user_id": "u1"}, ring))["kid"] == "new"
+    assert auth._decode_token(issued_before_rotation, ring)["user_id"] == "u1"
+
+    # Depois do prune a chave antiga some e os tokens dela deixam de valer
+    signing_keys.prune_keys(path, keep=1)
+    with pytest.raises(HTTPException) as excinfo:
+        auth._decode_token(issued_before_rotation, signing_keys.load_key_file(path))
+    assert excinfo.value.status_code == 401
+
+
+@pytest.mark.parametrize("kid, secret", [("k9", SECRET_A), ("k1", SECRET_B), ("", SECRET_A)])
+def test_token_with_unknown_kid_or_wrong_secret_is_rejected(kid, secret):
+    ring = signing_keys.parse_keys(f"k1:{SECRET_A}")
+    with pytest.raises(HTTPException) as excinfo:
+        auth._decode_token(_token(kid, secret), ring)
+    assert excinfo.value.status_code == 401
+
+
+# --- Launcher ---
+@pytest.fixture
+def env(monkeypatch):
+    """Ambiente sem chaves configuradas; get_settings() relido a cada teste."""
+    for name in ("JWT_KEYS_FILE", "JWT_SECRET_KEYS", "SECRET_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    get_settings.cache_clear()
+    yield monkeypatch
+    get_settings.cache_clear()
+
+
+def test_serve_refuses_several_workers_without_shared_keys(env, capsys):
+    assert serve.main(["--workers", "2"]) == 2
+    assert "chaves JWT compartilhadas" in capsys.readouterr().err
+
+
+def test_serve_rejects_invalid_key_configuration(env, capsys):
+    env.setenv("JWT_SECRET_KEYS", "sem-separador")
+    get_settings.cache_clear()
+    assert serve.main(["--workers", "2"]) == 2
+    assert "Chaves JWT inválidas" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("workers, explicit, expected", [
+    (1, "", ""),        # Um worker: a invalidação alcança todo mundo
+    (4, "", "5"),       # Vários: o TTL padrão cai para o atraso aceitável
+    (4, "30", "30"),    # Valor explícito fica, com aviso
+])
+def test_serve_caps_auth_cache_ttl_with_several_workers(monkeypatch, caplog, workers, explicit, expected):
+    monkeypatch.setenv("AUTH_CACHE_TTL_SECONDS", explicit)
+    serve._cap_auth_cache_ttl(int(explicit or 60), workers)
+    assert os.environ["AUTH_CACHE_TTL_SECONDS"] == expected
+    assert ("segue autenticado" in caplog.text) == bool(explicit)
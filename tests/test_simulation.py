@@ -0,0 +1,139 @@
+"""Expressões de dados e o simulador de combate: erros de sintaxe, sementes e o limite de lutas."""
+import dataclasses
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src import simulation
+from src.dice import DiceSyntaxError, compile_dice
+from src.main import create_app
+
+MONSTER = {"name": "Goblin", "size": "Small", "type": "humanoid", "armor_class": 15, "hit_points": "7 (2d6)",
+           "speed": "30 ft.", "challenge_rating": "1/4",
+           "actions": "Scimitar. Melee Weapon Attack: +4 to hit. Hit: 5 (1d6 + 2) slashing damage."}
+
+
+# --- Dados ---
+@pytest.mark.parametrize("expression, minimum, maximum", [
+    ("2d6+3", 5, 15),
+    ("1d8 + 1d6 - 1", 1, 13),
+    ("d20", 1, 20),
+    ("4d6kh3", 3, 18),
+    ("2d20kl1", 1, 20),
+    ("1d20+5 adv", 6, 25),
+    ("7", 7, 7),
+])
+def test_compile_dice_bounds(expression, minimum, maximum):
+    dice = compile_dice(expression)
+    assert (dice.minimum, dice.maximum) == (minimum, maximum)
+    rolls = dice.roll(2000, np.random.default_rng(1))
+    assert rolls.min() >= minimum and rolls.max() <= maximum
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("", "vazia"),
+    ("   ", "vazia"),
+    ("2d", "inválida"),
+    ("1d20 2", "inválida"),
+    ("bola de fogo", "inválida"),
+    ("1d6 +", "inválida"),
+    ("101d6", "fora dos limites"),
+    ("1d1001", "fora dos limites"),
+    ("0d6", "fora dos limites"),
+    ("3d6kh4", "fora dos limites"),
+    ("2d6 adv", "Vantagem exige"),
+])
+def test_compile_dice_rejects_bad_syntax(expression, message):
+    with pytest.raises(DiceSyntaxError, match=message):
+        compile_dice(expression)
+
+
+# --- Sementes ---
+def _combatants():
+    hero = simulation.Combatant("Herói", compile_dice("30"), 16, 5, compile_dice("1d8+3"))
+    goblin = simulation.Combatant("Goblin", compile_dice("2d6"), 15, 4, compile_dice("1d6+2"))
+    return [hero], [goblin, goblin]
+
+
+def test_seeded_fights_are_deterministic():
+    party, monsters = _combatants()
+    first = simulation.run_fights(party, monsters, 500, seed=42)
+    second = simulation.run_fights(party, monsters, 500, seed=42)
+    for key in first:
+        np.testing.assert_array_equal(first[key], second[key])
+    other = simulation.run_fights(party, monsters, 500, seed=43)
+    assert not np.array_equal(first["dealt"], other["dealt"])
+
+
+def test_seeded_pool_split_is_deterministic():
+    party, monsters = _combatants()
+    pool = simulation.SimulationPool(workers=2, threshold=1)
+    try:
+        first = pool.run(party, monsters, 301, seed=7)
+        assert first == pool.run(party, monsters, 301, seed=7)
+    finally:
+        pool.shutdown()
+    assert first["fights"] == 301
+
+
+# --- Rota ---
+@pytest.fixture
+def limited_client(settings):
+    app = create_app(dataclasses.replace(settings, simulation_max_fights=50))
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def table(limited_client):
+    """Mesa com um jogador aprovado e o personagem dele; devolve (cabeçalhos do mestre, id da mesa)."""
+    client = limited_client
+
+    def register(username):
+        body = {"username": username, "email": f"{username}@example.com", "password": "segredo123"}
+        assert client.post("/api/v1/register", json=body).status_code == 200
+        token = client.post("/api/v1/token", json={"username": username, "password": "segredo123"}).json()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    def post(path, body, headers):
+        response = client.post(path, json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    master, player = register("mestre"), register("jogador")
+    story_id = post("/api/v1/stories/", {"title": "A Cripta"}, master)
+    table_id = post("/api/v1/tables", {"title": "Mesa", "story_id": story_id}, master)
+    post("/api/v1/characters", {"name": "Herói", "race": "Humano", "character_class": "Fighter"}, player)
+    request_id = post(f"/api/v1/tables/{table_id}/join", {}, player)
+    post(f"/api/v1/tables/requests/{request_id}/approve", {}, master)
+    return master, table_id
+
+
+def _simulate(client, headers, table_id, monster_id, **body):
+    return client.post(f"/api/v1/tables/{table_id}/simulate", headers=headers,
+                       json={"monster_ids": [monster_id, monster_id], **body})
+
+
+def test_simulation_route_limits_fights_and_honours_seed(limited_client, table):
+    master, table_id = table
+    goblin = limited_client.post("/api/v1/monsters/", json=MONSTER, headers=master).json()["id"]
+
+    response = _simulate(limited_client, master, table_id, goblin, fights=51)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No máximo 50 lutas por simulação"
+
+    first = _simulate(limited_client, master, table_id, goblin, fights=50, seed=3)
+    assert first.status_code == 200, first.text
+    assert first.json()["fights"] == 50
+    assert _simulate(limited_client, master, table_id, goblin, fights=50, seed=3).json() == first.json()
+
+
+def test_simulation_route_reports_unusable_dice(limited_client, table):
+    master, table_id = table
+    # 150 dados passam do limite por termo: a ficha grava, a simulação recusa
+    titan = limited_client.post("/api/v1/monsters/", headers=master,
+                                json={**MONSTER, "name": "Titã", "hit_points": "975 (150d12)"}).json()["id"]
+    response = _simulate(limited_client, master, table_id, titan, fights=10)
+    assert response.status_code == 400
+    assert "fora dos limites" in response.json()["detail"]
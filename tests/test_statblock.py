@@ -0,0 +1,74 @@
+"""Leitura das fichas de monstro (PV, ND, XP) e o orçamento de XP dos encontros."""
+import uuid
+
+import pytest
+
+from src import encounters, models, statblock
+
+HP_CASES = [
+    # texto, (média, dados, faces, modificador)
+    ("178 (17d12 + 68)", (178, 17, 12, 68)),
+    ("22 (4d8+4)", (22, 4, 8, 4)),
+    ("7 (2d6 − 1)", (7, 2, 6, -1)),
+    ("4d8 + 4", (22, 4, 8, 4)),  # Sem média: calculada
+    ("1d4 - 5", (1, 1, 4, -5)),  # Nunca abaixo de 1
+    ("45", (45, None, None, None)),
+    ("muitos", (None, None, None, None)),
+    ("", (None, None, None, None)),
+    (None, (None, None, None, None)),
+]
+
+CR_CASES = [
+    ("1/4", 0.25),
+    ("½", 0.5),
+    ("0.5", 0.5),
+    ("0,5", 0.5),
+    ("13", 13.0),
+    ("CR 5 (1,800 XP)", 5.0),
+    ("1/0", None),
+    ("desconhecido", None),
+    ("", None),
+    (None, None),
+]
+
+
+@pytest.mark.parametrize("text, expected", HP_CASES)
+def test_parse_hit_points(text, expected):
+    parsed = statblock.parse_hit_points(text)
+    assert (parsed["hp_average"], parsed["hp_dice_count"], parsed["hp_dice_size"], parsed["hp_modifier"]) == expected
+
+
+@pytest.mark.parametrize("text, expected", CR_CASES)
+def test_parse_challenge_rating(text, expected):
+    assert statblock.parse_challenge_rating(text) == expected
+
+
+@pytest.mark.parametrize("challenge_rating, xp", [("1/4", 50), ("13", 10000), ("7.5", None), ("x", None)])
+def test_stat_block_xp(challenge_rating, xp):
+    block = statblock.parse_stat_block("178 (17d12 + 68)", challenge_rating)
+    assert block.xp == xp
+    assert block.hp_average == 178
+
+
+def test_encounter_stays_within_party_budget(database, make_user):
+    with database.SessionLocal() as db:
+        master = make_user(db, "mestre")
+        for name, challenge_rating in (("Kobold", "1/4"), ("Goblin", "1/2"), ("Bugbear", "1"), ("Ogro", "2")):
+            db.add(models.Monster(id=str(uuid.uuid4()), name=name, creator_id=master.id, challenge_rating=challenge_rating,
+                                  **statblock.derived_columns(None, challenge_rating)))
+        db.commit()
+
+        # Quatro personagens de nível 3: 4 x (75, 150, 225, 400)
+        plan = encounters.build_encounter(db, master.id, [3, 3, 3, 3], "medium")
+
+    assert plan["thresholds"] == {"easy": 300, "medium": 600, "hard": 900, "deadly": 1600}
+    assert plan["budget"] == 600
+    for suggestion in plan["suggestions"]:
+        multiplier = encounters.encounter_multiplier(suggestion["monster_count"], 4)
+        assert suggestion["adjusted_xp"] == int(suggestion["total_xp"] * multiplier)
+        assert suggestion["adjusted_xp"] <= plan["budget"]
+        assert suggestion["difficulty"] == encounters.classify(suggestion["adjusted_xp"], plan["thresholds"])
+    # Dois bugbears: 400 XP x 1,5 fecham o orçamento médio
+    best = plan["suggestions"][0]
+    assert [(group["monster"].name, group["count"]) for group in best["groups"]] == [("Bugbear", 2)]
+    assert (best["total_xp"], best["adjusted_xp"], best["difficulty"]) == (400, 600, "medium")